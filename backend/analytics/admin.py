@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import SurveyAnalyticsSnapshot, QuestionCorrelation
+from .models import SurveyAnalyticsSnapshot, QuestionCorrelation, ActivityRollup, SurveyVoteTally
 
 
 @admin.register(SurveyAnalyticsSnapshot)
@@ -11,3 +11,14 @@ class SurveyAnalyticsSnapshotAdmin(admin.ModelAdmin):
 @admin.register(QuestionCorrelation)
 class QuestionCorrelationAdmin(admin.ModelAdmin):
     list_display = ("survey", "question_a", "question_b", "correlation_value", "created_at")
+
+
+@admin.register(ActivityRollup)
+class ActivityRollupAdmin(admin.ModelAdmin):
+    list_display = ("period", "period_start", "new_users", "votes", "surveys")
+    list_filter = ("period",)
+
+
+@admin.register(SurveyVoteTally)
+class SurveyVoteTallyAdmin(admin.ModelAdmin):
+    list_display = ("survey", "votes")
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0002_initial"),
+        ("surveys", "0004_remove_survey_vote_limit_per_device"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SurveyVoteTally",
+            fields=[
+                (
+                    "survey",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="vote_tally",
+                        serialize=False,
+                        to="surveys.survey",
+                    ),
+                ),
+                ("votes", models.PositiveIntegerField(db_index=True, default=0)),
+            ],
+            options={
+                "ordering": ["-votes"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ActivityRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("hour", "Час"), ("day", "Сутки")], max_length=8
+                    ),
+                ),
+                ("period_start", models.DateTimeField()),
+                ("new_users", models.PositiveIntegerField(default=0)),
+                ("votes", models.PositiveIntegerField(default=0)),
+                ("surveys", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["-period_start"],
+                "unique_together": {("period", "period_start")},
+            },
+        ),
+    ]
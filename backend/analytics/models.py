@@ -25,3 +25,38 @@ class QuestionCorrelation(models.Model):
 
     class Meta:
         unique_together = ("survey", "question_a", "question_b")
+
+
+class ActivityRollup(models.Model):
+    """Агрегат активности за час или сутки: новые пользователи, голоса и опросы."""
+    PERIOD_HOUR = "hour"
+    PERIOD_DAY = "day"
+    PERIOD_CHOICES = [
+        (PERIOD_HOUR, "Час"),
+        (PERIOD_DAY, "Сутки"),
+    ]
+
+    period = models.CharField(max_length=8, choices=PERIOD_CHOICES)
+    period_start = models.DateTimeField()
+    new_users = models.PositiveIntegerField(default=0)
+    votes = models.PositiveIntegerField(default=0)
+    surveys = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-period_start"]
+        unique_together = ("period", "period_start")
+
+    def __str__(self):
+        return f"{self.get_period_display()} {self.period_start:%Y-%m-%d %H:%M}"
+
+
+class SurveyVoteTally(models.Model):
+    """Счетчик голосов опроса для таблицы лидеров в мониторинге."""
+    survey = models.OneToOneField(Survey, on_delete=models.CASCADE, primary_key=True, related_name="vote_tally")
+    votes = models.PositiveIntegerField(default=0, db_index=True)
+
+    class Meta:
+        ordering = ["-votes"]
+
+    def __str__(self):
+        return f"{self.survey.title}: {self.votes}"
@@ -0,0 +1,153 @@
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from surveys.models import Survey
+from responses.models import SurveyResponse
+from users.models import User
+from .models import ActivityRollup, SurveyVoteTally
+
+TOP_SURVEYS_LIMIT = 5
+
+# Поле агрегата -> (модель, поле даты), по которым строятся агрегаты при пересчете
+ROLLUP_SOURCES = {
+    "new_users": (User, "date_joined"),
+    "surveys": (Survey, "created_at"),
+    "votes": (SurveyResponse, "submitted_at"),
+}
+
+
+def _period_starts(moment):
+    """Возвращает начало часа и суток (в текущей временной зоне) для момента времени."""
+    hour = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    return (
+        (ActivityRollup.PERIOD_HOUR, hour),
+        (ActivityRollup.PERIOD_DAY, hour.replace(hour=0)),
+    )
+
+
+def _increment(queryset, create_kwargs, deltas):
+    """Атомарно увеличивает счетчики строки, создавая ее при отсутствии."""
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if queryset.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            queryset.model.objects.create(**create_kwargs, **deltas)
+    except IntegrityError:
+        # Строку успел создать параллельный запрос
+        queryset.update(**updates)
+
+
+def record_activity(moment, **deltas):
+    """Добавляет события (new_users/votes/surveys) в часовой и суточный агрегаты."""
+    for period, period_start in _period_starts(moment):
+        _increment(
+            ActivityRollup.objects.filter(period=period, period_start=period_start),
+            {"period": period, "period_start": period_start},
+            deltas,
+        )
+
+
+def discard_activity(moment, **deltas):
+    """
+    Убирает удаленные события (new_users/votes/surveys) из агрегатов. Счетчики не ограничиваются нулем:
+    расхождение с данными проявится ошибкой, а не скроется; исправляется rebuild_rollups.
+    """
+    updates = {field: F(field) - delta for field, delta in deltas.items()}
+    for period, period_start in _period_starts(moment):
+        ActivityRollup.objects.filter(period=period, period_start=period_start).update(**updates)
+
+
+def discard_votes(responses):
+    """
+    Убирает голоса queryset responses из агрегатов и таблицы лидеров до их удаления. Голоса не загружаются:
+    один запрос с группировкой по опросу и часу и по обновлению на затронутый агрегат.
+    """
+    by_period, by_survey = Counter(), Counter()
+    rows = (
+        responses.order_by()
+        .annotate(hour=TruncHour("submitted_at"))
+        .values("survey_id", "hour")
+        .annotate(total=Count("pk"))
+    )
+    for row in rows:
+        by_survey[row["survey_id"]] += row["total"]
+        for period_key in _period_starts(row["hour"]):
+            by_period[period_key] += row["total"]
+    for (period, period_start), total in by_period.items():
+        ActivityRollup.objects.filter(period=period, period_start=period_start).update(votes=F("votes") - total)
+    for survey_id, total in by_survey.items():
+        SurveyVoteTally.objects.filter(survey_id=survey_id).update(votes=F("votes") - total)
+
+
+def discard_survey(survey):
+    """Убирает опрос и все его голоса из агрегатов (строка таблицы лидеров удаляется каскадом)."""
+    discard_activity(survey.created_at, surveys=1)
+    discard_votes(SurveyResponse.objects.filter(survey=survey))
+
+
+def bump_survey_votes(survey_id, count=1):
+    """Увеличивает счетчик голосов опроса в таблице лидеров."""
+    _increment(SurveyVoteTally.objects.filter(survey_id=survey_id), {"survey_id": survey_id}, {"votes": count})
+
+
+def total_users():
+    """Количество пользователей по суточным агрегатам."""
+    result = ActivityRollup.objects.filter(period=ActivityRollup.PERIOD_DAY).aggregate(total=Sum("new_users"))
+    return result["total"] or 0
+
+
+def votes_since(moment):
+    """Количество голосов начиная с часа, в который попадает момент времени."""
+    hour_start = _period_starts(moment)[0][1]
+    result = ActivityRollup.objects.filter(
+        period=ActivityRollup.PERIOD_HOUR, period_start__gte=hour_start
+    ).aggregate(total=Sum("votes"))
+    return result["total"] or 0
+
+
+def top_surveys(limit=TOP_SURVEYS_LIMIT):
+    """Опросы с наибольшим числом голосов по таблице лидеров."""
+    return SurveyVoteTally.objects.select_related("survey").filter(votes__gt=0)[:limit]
+
+
+@transaction.atomic
+def rebuild_rollups():
+    """Пересчитывает агрегаты и таблицу лидеров по исходным данным."""
+    buckets = defaultdict(Counter)
+    for field, (model, date_field) in ROLLUP_SOURCES.items():
+        for period, trunc in ((ActivityRollup.PERIOD_HOUR, TruncHour), (ActivityRollup.PERIOD_DAY, TruncDay)):
+            rows = (
+                model.objects.order_by()
+                .annotate(bucket=trunc(date_field))
+                .values("bucket")
+                .annotate(total=Count("pk"))
+            )
+            for row in rows:
+                buckets[(period, row["bucket"])][field] += row["total"]
+
+    ActivityRollup.objects.all().delete()
+    ActivityRollup.objects.bulk_create(
+        [
+            ActivityRollup(period=period, period_start=period_start, **counters)
+            for (period, period_start), counters in buckets.items()
+        ],
+        batch_size=1000,
+    )
+
+    SurveyVoteTally.objects.all().delete()
+    tallies = (
+        Survey.objects.order_by()
+        .annotate(total=Count("responses"))
+        .filter(total__gt=0)
+        .values_list("pk", "total")
+    )
+    SurveyVoteTally.objects.bulk_create(
+        [SurveyVoteTally(survey_id=survey_id, votes=total) for survey_id, total in tallies],
+        batch_size=1000,
+    )
+    return {"rollups": len(buckets), "tallies": SurveyVoteTally.objects.count()}
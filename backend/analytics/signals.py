@@ -0,0 +1,62 @@
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from surveys.models import Survey
+from surveys.signals import surveys_cloned
+from responses.models import SurveyResponse
+from responses.signals import responses_batch_created
+from users.models import User
+from .rollups import bump_survey_votes, discard_activity, discard_survey, record_activity
+
+
+@receiver(post_save, sender=User)
+def on_user_created(sender, instance: User, created, raw=False, **kwargs):
+    """Сигнал: учитывает нового пользователя в агрегатах активности."""
+    if created and not raw:
+        record_activity(instance.date_joined, new_users=1)
+
+
+@receiver(pre_delete, sender=User)
+def on_user_deleted(sender, instance: User, **kwargs):
+    """Сигнал: убирает удаленного пользователя из агрегатов (его опросы - через on_survey_deleted при каскаде)."""
+    discard_activity(instance.date_joined, new_users=1)
+
+
+@receiver(post_save, sender=Survey)
+def on_survey_created(sender, instance: Survey, created, raw=False, **kwargs):
+    """Сигнал: учитывает новый опрос в агрегатах активности."""
+    if created and not raw:
+        record_activity(instance.created_at, surveys=1)
+
+
+@receiver(surveys_cloned)
+def on_surveys_cloned(sender, surveys, **kwargs):
+    """Сигнал: учитывает пакет скопированных опросов в агрегатах активности одним обновлением."""
+    if surveys:
+        record_activity(surveys[-1].created_at, surveys=len(surveys))
+
+
+@receiver(pre_delete, sender=Survey)
+def on_survey_deleted(sender, instance: Survey, **kwargs):
+    """
+    Сигнал: убирает удаленный опрос и его голоса из агрегатов до каскадного удаления голосов.
+    Приемников удаления SurveyResponse нет: с ними каскад загружал бы каждый голос. Отдельные голоса
+    удаляются через админку (SurveyResponseAdmin), остальные расхождения исправляет rebuild_rollups.
+    """
+    discard_survey(instance)
+
+
+@receiver(post_save, sender=SurveyResponse)
+def on_vote_created(sender, instance: SurveyResponse, created, raw=False, **kwargs):
+    """Сигнал: учитывает голос в агрегатах и в таблице лидеров."""
+    if created and not raw:
+        record_activity(instance.submitted_at, votes=1)
+        bump_survey_votes(instance.survey_id)
+
+
+@receiver(responses_batch_created)
+def on_votes_batch_created(sender, survey, responses, **kwargs):
+    """Сигнал: учитывает пакет голосов в агрегатах и таблице лидеров одним обновлением."""
+    if responses:
+        record_activity(responses[-1].submitted_at, votes=len(responses))
+        bump_survey_votes(survey.pk, len(responses))
@@ -1,3 +1,106 @@
+from datetime import timedelta
+
+from django.contrib import admin
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from surveys.models import Survey
+from responses.admin import SurveyResponseAdmin
+from responses.models import SurveyResponse
+from .models import ActivityRollup, SurveyVoteTally
+from .rollups import rebuild_rollups, top_surveys, total_users, votes_since
+
+User = get_user_model()
+
+
+class ActivityRollupTest(TestCase):
+    """Тесты для агрегатов активности и таблицы лидеров."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpass123"
+        )
+        self.survey = Survey.objects.create(author=self.user, title="Popular", status=Survey.STATUS_ACTIVE)
+        self.other_survey = Survey.objects.create(author=self.user, title="Quiet", status=Survey.STATUS_ACTIVE)
+
+    def test_signals_maintain_rollups(self):
+        """Тест: создание пользователей, опросов и голосов обновляет агрегаты."""
+        for _ in range(3):
+            SurveyResponse.objects.create(survey=self.survey, is_anonymous=True)
+        SurveyResponse.objects.create(survey=self.other_survey, is_anonymous=True)
+
+        day = ActivityRollup.objects.get(period=ActivityRollup.PERIOD_DAY)
+        self.assertEqual(day.new_users, 1)
+        self.assertEqual(day.surveys, 2)
+        self.assertEqual(day.votes, 4)
+        self.assertEqual(total_users(), 1)
+        self.assertEqual(votes_since(timezone.now() - timedelta(days=7)), 4)
+        self.assertEqual([entry.survey for entry in top_surveys()], [self.survey, self.other_survey])
+        self.assertEqual(SurveyVoteTally.objects.get(survey=self.survey).votes, 3)
+
+    def test_user_deletion_keeps_count_exact(self):
+        """Тест: удаление пользователя уменьшает счетчик пользователей."""
+        extra = User.objects.create_user(username="extra", email="extra@example.com", password="testpass123")
+        self.assertEqual(total_users(), 2)
+        extra.delete()
+        self.assertEqual(total_users(), 1)
+
+    def test_deletions_keep_counts_exact(self):
+        """Тест: удаление голоса в админке, опроса и каскадное удаление через автора уменьшают агрегаты."""
+        votes = [SurveyResponse.objects.create(survey=self.survey, is_anonymous=True) for _ in range(4)]
+        old = SurveyResponse.objects.create(survey=self.other_survey, is_anonymous=True)
+        SurveyResponse.objects.create(survey=self.other_survey, is_anonymous=True)
+        SurveyResponse.objects.filter(pk=old.pk).update(submitted_at=timezone.now() - timedelta(days=2))
+        rebuild_rollups()
+
+        SurveyResponseAdmin(SurveyResponse, admin.site).delete_model(None, votes[0])
+        self.assertEqual(SurveyVoteTally.objects.get(survey=self.survey).votes, 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.other_survey.delete()
+        # Голоса считаются группировкой, а не загружаются по одному для сигналов
+        loaded = [query["sql"] for query in queries.captured_queries if '"responses_surveyresponse"."user_agent"' in query["sql"]]
+        self.assertEqual(loaded, [])
+        days = ActivityRollup.objects.filter(period=ActivityRollup.PERIOD_DAY).order_by("period_start")
+        self.assertEqual(list(days.values_list("votes", flat=True)), [0, 3])
+        self.assertEqual(votes_since(timezone.now() - timedelta(days=7)), 3)
+
+        self.user.delete()
+        self.assertEqual(
+            set(ActivityRollup.objects.values_list("new_users", "surveys", "votes")), {(0, 0, 0)}
+        )
+        self.assertFalse(SurveyVoteTally.objects.exists())
+
+    def test_rebuild_matches_history(self):
+        """Тест: пересчет восстанавливает агрегаты, включая старые голоса."""
+        old = SurveyResponse.objects.create(survey=self.survey, is_anonymous=True)
+        SurveyResponse.objects.filter(pk=old.pk).update(submitted_at=timezone.now() - timedelta(days=10))
+        SurveyResponse.objects.create(survey=self.survey, is_anonymous=True)
+        ActivityRollup.objects.all().delete()
+        SurveyVoteTally.objects.all().delete()
+
+        rebuild_rollups()
+
+        self.assertEqual(total_users(), 1)
+        self.assertEqual(votes_since(timezone.now() - timedelta(days=7)), 1)
+        self.assertEqual(ActivityRollup.objects.filter(period=ActivityRollup.PERIOD_DAY).count(), 2)
+        self.assertEqual(SurveyVoteTally.objects.get(survey=self.survey).votes, 2)
+
+    def test_admin_monitor_reads_rollups(self):
+        """Тест: мониторинг показывает данные из агрегатов без полного сканирования таблиц."""
+        self.user.is_staff = True
+        self.user.save()
+        SurveyResponse.objects.create(survey=self.survey, is_anonymous=True)
+        self.client.force_login(self.user)
+
+        response = self.client.get("/dashboard/monitor/")
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["users_count"], 1)
+        self.assertEqual(response.context["votes_last_7_days"], 1)
+        self.assertContains(response, "Popular — 1 голосов")
@@ -1,16 +1,16 @@
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import TemplateView
 from django.utils import timezone
-from django.db.models import Count
 
 from surveys.models import Survey
 from responses.models import SurveyResponse
-from users.models import User
+from .rollups import top_surveys, total_users, votes_since
 
 
 class DashboardView(LoginRequiredMixin, TemplateView):
     """Дашборд пользователя: статистика по опросам и последние ответы."""
     template_name = "dashboard/index.html"
+    use_replica = True
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -21,26 +21,22 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         context["active_surveys"] = surveys.filter(status=Survey.STATUS_ACTIVE).count()
         context["responses_count"] = responses.count()
         context["participants"] = responses.values("user").distinct().count()
-        context["recent_responses"] = responses[:10]
+        context["recent_responses"] = responses.select_related("survey")[:10]
         return context
 
 
 class AdminMonitorView(UserPassesTestMixin, TemplateView):
-    """Админ-панель: общая статистика по системе (только для staff)."""
+    """Админ-панель: общая статистика по системе (только для staff). Читает предрасчитанные агрегаты."""
     template_name = "dashboard/admin_monitor.html"
+    use_replica = True
 
     def test_func(self):
         return self.request.user.is_staff
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["users_count"] = User.objects.count()
+        context["users_count"] = total_users()
         context["active_surveys"] = Survey.objects.filter(status=Survey.STATUS_ACTIVE).count()
-        context["votes_last_7_days"] = SurveyResponse.objects.filter(
-            submitted_at__gte=timezone.now() - timezone.timedelta(days=7)
-        ).count()
-        context["top_surveys"] = (
-            Survey.objects.annotate(votes=Count("responses"))
-            .order_by("-votes")[:5]
-        )
+        context["votes_last_7_days"] = votes_since(timezone.now() - timezone.timedelta(days=7))
+        context["top_surveys"] = top_surveys()
         return context
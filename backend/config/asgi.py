@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Async-версии голосования и статистики (responses.urls); QUICKVOTE_ASYNC_VIEWS=0 возвращает синхронные
+os.environ.setdefault("QUICKVOTE_ASYNC_VIEWS", "1")
 
 application = get_asgi_application()
@@ -0,0 +1,40 @@
+"""
+Async-представления DRF для ASGI.
+
+DRF выполняет dispatch синхронно, поэтому при ASGI каждый запрос к обычному APIView занимает поток.
+AsyncAPIView вызывает async-обработчики (get/post ...) в цикле событий; синхронные этапы DRF
+с обращениями к сессии, БД и кэшу - аутентификация, права и throttling (APIView.initial) -
+выполняются одним вызовом через sync_to_async. Обработчики используют async ORM и async API кэша,
+а оставшиеся синхронные части (сериализаторы, транзакции) также оборачивают в sync_to_async.
+"""
+import inspect
+
+from asgiref.sync import sync_to_async
+from rest_framework import views
+
+
+class AsyncAPIView(views.APIView):
+    """APIView с async-обработчиками; обработка ошибок и финализация ответа - как в APIView.dispatch."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            # options из APIView остается синхронным
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,141 @@
+"""
+Профилировщик SQL-запросов по запросам к приложению.
+
+Подключается через QUERY_PROFILER_ENABLED: считает запросы, суммарное время SQL,
+повторяющиеся запросы (N+1) и места вызова в коде проекта, проверяет бюджет
+запросов для view и дописывает отчет по каждому запросу в QUERY_PROFILER_REPORT.
+"""
+import json
+import logging
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TOP_ENTRIES = 5
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """View выполнила больше SQL-запросов, чем разрешено бюджетом."""
+
+
+def fingerprint(sql):
+    """Нормализует SQL: убирает литералы и длину IN-списков, чтобы N+1 сливались в один отпечаток."""
+    sql = _LITERAL_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(?)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def _call_site():
+    """Ближайшая к запросу строка кода проекта (вне Django и сторонних пакетов)."""
+    project_root = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(project_root) and "site-packages" not in frame.filename and frame.filename != __file__:
+            return f"{Path(frame.filename).relative_to(project_root)}:{frame.lineno} in {frame.name}"
+    return "<unknown>"
+
+
+class QueryProfile:
+    """Собирает сведения о SQL-запросах; используется как execute_wrapper подключения."""
+
+    def __init__(self, track_call_sites=True):
+        self.track_call_sites = track_call_sites
+        self.count = 0
+        self.total_time = 0.0
+        self.fingerprints = Counter()
+        self.call_sites = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.total_time += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+            if self.track_call_sites:
+                self.call_sites[_call_site()] += 1
+
+    def duplicates(self):
+        return [
+            {"fingerprint": sql, "count": count}
+            for sql, count in self.fingerprints.most_common(TOP_ENTRIES)
+            if count > 1
+        ]
+
+    def top_call_sites(self):
+        return [{"site": site, "count": count} for site, count in self.call_sites.most_common(TOP_ENTRIES)]
+
+    def as_report(self, **extra):
+        return {
+            **extra,
+            "queries": self.count,
+            "sql_time_ms": round(self.total_time * 1000, 3),
+            "duplicates": self.duplicates(),
+            "call_sites": self.top_call_sites(),
+        }
+
+
+class QueryProfilerMiddleware:
+    """
+    Middleware профилирования запросов к БД.
+    Добавляет заголовки X-Query-Count/X-Query-Time-Ms, проверяет QUERY_BUDGETS
+    (по имени view) и пишет JSON-строку отчета в QUERY_PROFILER_REPORT.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = QueryProfile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match else request.path
+        response["X-Query-Count"] = str(profile.count)
+        response["X-Query-Time-Ms"] = f"{profile.total_time * 1000:.3f}"
+
+        report = profile.as_report(
+            view=view_name,
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+            timestamp=timezone.now().isoformat(),
+        )
+        self._write_report(report)
+        self._check_budget(view_name, report)
+        return response
+
+    def _write_report(self, report):
+        report_path = getattr(settings, "QUERY_PROFILER_REPORT", None)
+        if not report_path:
+            return
+        with open(report_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False) + "\n")
+
+    def _check_budget(self, view_name, report):
+        budget = getattr(settings, "QUERY_BUDGETS", {}).get(view_name)
+        if budget is None or report["queries"] <= budget:
+            return
+        message = (
+            f"{view_name}: {report['queries']} SQL-запросов при бюджете {budget}. "
+            f"Повторы: {report['duplicates']}. Места вызова: {report['call_sites']}"
+        )
+        if getattr(settings, "QUERY_BUDGET_ENFORCE", False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,78 @@
+"""
+Быстрые JSON renderer и parser для REST API.
+
+Если установлен orjson, кодирование и разбор выполняет он, иначе - стандартный json через
+классы DRF. Вывод совпадает с JSONRenderer DRF: UTF-8 без экранирования, компактные
+разделители, даты и Decimal через encoders.JSONEncoder, экранированные U+2028/U+2029.
+Форматированный вывод (indent, Browsable API) и данные, которые orjson не кодирует,
+передаются стандартному renderer.
+"""
+import json
+
+from rest_framework.utils import encoders
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson необязателен
+    orjson = None
+
+_default = encoders.JSONEncoder().default
+_stdlib_encoder = encoders.JSONEncoder(ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+
+
+def _js_safe(data):
+    # Как и DRF: вывод остается подмножеством JavaScript
+    return data.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+
+
+def dumps(data):
+    """Кодирует данные в компактный JSON (bytes) так же, как JSONRenderer DRF."""
+    if orjson is not None:
+        try:
+            # Даты - через кодировщик DRF (миллисекунды, "Z"), а не собственный формат orjson
+            return _js_safe(
+                orjson.dumps(data, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+            )
+        except TypeError:
+            pass
+    return _js_safe(_stdlib_encoder.encode(data).encode("utf-8"))
+
+
+def loads(data):
+    """Разбирает JSON из bytes или str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data, parse_constant=_reject_constant)
+
+
+def _reject_constant(value):
+    # NaN и Infinity не входят в JSON - как STRICT_JSON в DRF и orjson
+    raise ValueError(f"Недопустимое значение JSON: {value}")
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson с возвратом к стандартному при indent или неподдерживаемых данных."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser на orjson для тел запросов в UTF-8."""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", "utf-8")
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,141 @@
+"""
+Маршрутизация чтений на реплику БД.
+
+Тяжелые чтения (статистика, экспорт, дашборды) выполняются на реплике (REPLICA_DATABASE_ALIAS),
+все записи и чтения "своих записей" - на основной БД. Чтения с реплики включаются явно:
+атрибутом view use_replica = True или контекстом read_from_replica(). После записи в рамках
+запроса чтения закрепляются за основной БД, а ReplicaRoutingMiddleware ставит cookie,
+закрепляющую следующие запросы клиента на REPLICA_STICKY_SECONDS (задержка репликации).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+STICKY_COOKIE_NAME = "qv_primary"
+
+
+class RoutingState:
+    """Состояние маршрутизации текущего запроса или блока read_from_*."""
+
+    def __init__(self, sticky=False):
+        self.replica_reads = False
+        self.primary_only = False
+        self.sticky = sticky
+        self.wrote = False
+
+
+_state = ContextVar("db_routing_state", default=None)
+
+
+def current_state():
+    """Состояние текущего запроса или блока read_from_*; вне их - пустое (реплика не используется)."""
+    return _state.get() or RoutingState()
+
+
+def _replicated(model):
+    return model._meta.app_label in settings.REPLICA_READ_APPS
+
+
+@contextmanager
+def _reading(replica_reads):
+    state, token = _state.get(), None
+    if state is None:
+        state = RoutingState()
+        token = _state.set(state)
+    previous = state.replica_reads, state.primary_only
+    state.replica_reads = replica_reads
+    state.primary_only = previous[1] or not replica_reads
+    try:
+        yield
+    finally:
+        state.replica_reads, state.primary_only = previous
+        if token is not None:
+            _state.reset(token)
+
+
+def read_from_replica():
+    """Чтения внутри блока (или декорированной функции) идут на реплику, если она настроена и не было записи."""
+    return _reading(True)
+
+
+def read_from_primary():
+    """Чтения внутри блока идут на основную БД (read-your-writes), в том числе во вложенных read_from_replica."""
+    return _reading(False)
+
+
+class ReplicaRouter:
+    """Роутер: чтения реплицируемых приложений - на реплику по запросу, записи - всегда на основную БД."""
+
+    def db_for_read(self, model, **hints):
+        alias = settings.REPLICA_DATABASE_ALIAS
+        state = current_state()
+        if alias and state.replica_reads and not state.primary_only and not state.sticky and not state.wrote and _replicated(model):
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and _replicated(model):
+            state.wrote = True
+        # Явно основная БД: иначе объект, прочитанный с реплики, сохранялся бы на нее
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == settings.REPLICA_DATABASE_ALIAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Создает состояние маршрутизации на запрос, включает реплику для view с use_replica и ставит sticky-cookie после записи."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(sticky=STICKY_COOKIE_NAME in request.COOKIES)
+        token = _state.set(state)
+        try:
+            return self._finish(state, self.get_response(request))
+        finally:
+            _state.reset(token)
+
+    async def __acall__(self, request):
+        # Без синхронного звена в цепочке async-view не занимает поток на время запроса
+        state = RoutingState(sticky=STICKY_COOKIE_NAME in request.COOKIES)
+        token = _state.set(state)
+        try:
+            return self._finish(state, await self.get_response(request))
+        finally:
+            _state.reset(token)
+
+    def _finish(self, state, response):
+        if state.wrote and settings.REPLICA_DATABASE_ALIAS:
+            response.set_cookie(
+                STICKY_COOKIE_NAME, "1", max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite="Lax"
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, "view_class", view_func)
+        state = _state.get()
+        if state is not None and getattr(view, "use_replica", False):
+            state.replica_reads = True
+        return None
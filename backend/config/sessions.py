@@ -0,0 +1,122 @@
+"""
+Сессии с минимумом записей.
+
+SessionStore - cached_db для сессий авторизованных пользователей (чтение из кэша, запись
+в кэш и БД), а сессии без пользователя (анонимные голосующие) хранятся только в кэше
+и не создают строк в django_session - если кэш SESSION_CACHE_ALIAS общий для процессов
+(Redis, Memcached, БД). С локальным кэшем процесса анонимные сессии тоже пишутся в БД,
+иначе другой процесс или перезапуск теряли бы их; check_session_cache предупреждает об этом
+при manage.py check --deploy. Сессия сохраняется только при изменении
+(SESSION_SAVE_EVERY_REQUEST = False); SessionRefreshMiddleware продлевает сессии
+пользователей не чаще раза в SESSION_REFRESH_INTERVAL секунд. Просроченные строки удаляет
+clear_expired_sessions (scripts/clear_sessions.py).
+"""
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core import checks
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+REFRESHED_AT_KEY = "_session_refreshed_at"
+
+# Кэши, данные которых видны только текущему процессу
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def anonymous_sessions_in_cache():
+    """Можно ли хранить анонимные сессии только в кэше: кэш сессий общий для всех процессов."""
+    return settings.CACHES[settings.SESSION_CACHE_ALIAS]["BACKEND"] not in PROCESS_LOCAL_CACHES
+
+
+def check_session_cache(app_configs, **kwargs):
+    """Проверка для check --deploy: анонимные сессии пишутся в БД, пока кэш сессий локален для процесса."""
+    if settings.SESSION_ENGINE != __name__ or anonymous_sessions_in_cache():
+        return []
+    return [
+        checks.Warning(
+            f"Кэш сессий {settings.SESSION_CACHE_ALIAS!r} локален для процесса: анонимные сессии сохраняются в БД.",
+            hint="Укажите для SESSION_CACHE_ALIAS общий бэкенд кэша (Redis, Memcached).",
+            id="quickvote.W001",
+        )
+    ]
+
+
+class SessionStore(CachedDBStore):
+    """cached_db для сессий пользователей, только кэш - для анонимных сессий."""
+    cache_only = False
+
+    def load(self):
+        data = super().load()
+        self.cache_only = SESSION_KEY not in data and anonymous_sessions_in_cache()
+        return data
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        if SESSION_KEY not in data and anonymous_sessions_in_cache():
+            if self.session_key is None:
+                return self.create()
+            store = self._cache.add if must_create else self._cache.set
+            if not store(self.cache_key, data, self.get_expiry_age()) and must_create:
+                raise CreateError
+            self.cache_only = True
+        elif self.cache_only and not must_create:
+            # Вход в анонимной сессии: строки в БД еще нет
+            try:
+                super().save(must_create=True)
+            except CreateError:
+                super().save()
+            self.cache_only = False
+        else:
+            super().save(must_create)
+
+
+class SessionRefreshMiddleware:
+    """Продлевает сессию пользователя раз в SESSION_REFRESH_INTERVAL вместо записи на каждый запрос."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self._refresh(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self._refresh(request)
+        return response
+
+    def _refresh(self, request):
+        session = getattr(request, "session", None)
+        # Не загружаем сессию ради проверки: только если запрос уже к ней обращался
+        if session is None or not session.accessed or session.modified or SESSION_KEY not in session:
+            return
+        now = int(time.time())
+        if now - session.get(REFRESHED_AT_KEY, 0) >= settings.SESSION_REFRESH_INTERVAL:
+            session[REFRESHED_AT_KEY] = now
+
+
+def clear_expired_sessions(batch_size=5000):
+    """Удаляет просроченные сессии из БД пачками по индексу expire_date. Возвращает число удаленных."""
+    expired = Session.objects.filter(expire_date__lt=timezone.now())
+    deleted = 0
+    while True:
+        batch = list(expired.values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        deleted += Session.objects.filter(pk__in=batch)._raw_delete(Session.objects.db)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,7 +51,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "config.routers.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "config.sessions.SessionRefreshMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -81,13 +84,89 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
+# Профиль БД выбирается переменной окружения QUICKVOTE_DB_PROFILE:
+#   sqlite          - SQLite, настроенный для конкурентной записи (WAL, busy timeout, synchronous=NORMAL,
+#                     BEGIN IMMEDIATE), с постоянными соединениями (по умолчанию);
+#   sqlite-basic    - SQLite с настройками Django по умолчанию (для сравнения в бенчмарках);
+#   postgres        - PostgreSQL с постоянными соединениями (нужен psycopg);
+#   postgres-pooled - PostgreSQL с пулом соединений psycopg (нужен psycopg[pool]).
+# Параметры PostgreSQL берутся из QUICKVOTE_DB_NAME/USER/PASSWORD/HOST/PORT.
+DB_PROFILE = os.environ.get("QUICKVOTE_DB_PROFILE", "sqlite")
+DB_CONN_MAX_AGE = int(os.environ.get("QUICKVOTE_DB_CONN_MAX_AGE", "60"))
+
+_POSTGRES_DATABASE = {
+    "ENGINE": "django.db.backends.postgresql",
+    "NAME": os.environ.get("QUICKVOTE_DB_NAME", "quickvote"),
+    "USER": os.environ.get("QUICKVOTE_DB_USER", "quickvote"),
+    "PASSWORD": os.environ.get("QUICKVOTE_DB_PASSWORD", ""),
+    "HOST": os.environ.get("QUICKVOTE_DB_HOST", "localhost"),
+    "PORT": os.environ.get("QUICKVOTE_DB_PORT", "5432"),
+}
+
+DATABASE_PROFILES = {
+    "sqlite": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # Выполняется при каждом новом соединении
+            "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+            # Ожидание блокировки (секунды) вместо мгновенной ошибки "database is locked"
+            "timeout": 20,
+            # Блокировка на запись берется в начале транзакции, а не при первом INSERT
+            "transaction_mode": "IMMEDIATE",
+        },
+    },
+    "sqlite-basic": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.sqlite3",
+    },
+    "postgres": {
+        **_POSTGRES_DATABASE,
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
+    },
+    "postgres-pooled": {
+        **_POSTGRES_DATABASE,
+        # С пулом соединений CONN_MAX_AGE должен быть 0: соединения возвращаются в пул после запроса
+        "CONN_MAX_AGE": 0,
+        "OPTIONS": {
+            "pool": {
+                "min_size": int(os.environ.get("QUICKVOTE_DB_POOL_MIN", "2")),
+                "max_size": int(os.environ.get("QUICKVOTE_DB_POOL_MAX", "20")),
+                "timeout": 10,
+            },
+        },
+    },
 }
 
+DATABASES = {
+    "default": DATABASE_PROFILES[DB_PROFILE],
+}
+
+# Реплика для тяжелых чтений (config.routers): включается QUICKVOTE_DB_REPLICA_NAME (файл SQLite-снимка,
+# см. scripts/sync_replica.py, или имя БД) и/или QUICKVOTE_DB_REPLICA_HOST (PostgreSQL).
+# После записи клиент закрепляется за основной БД на REPLICA_STICKY_SECONDS.
+REPLICA_DATABASE_ALIAS = None
+REPLICA_READ_APPS = ["surveys", "responses", "analytics", "notifications"]
+REPLICA_STICKY_SECONDS = 15
+
+if os.environ.get("QUICKVOTE_DB_REPLICA_NAME") or os.environ.get("QUICKVOTE_DB_REPLICA_HOST"):
+    REPLICA_DATABASE_ALIAS = "replica"
+    DATABASES[REPLICA_DATABASE_ALIAS] = {
+        **DATABASES["default"],
+        "NAME": os.environ.get("QUICKVOTE_DB_REPLICA_NAME", DATABASES["default"]["NAME"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+        # Снимок только для чтения; без BEGIN IMMEDIATE, чтобы не блокировать обновление снимка
+        DATABASES[REPLICA_DATABASE_ALIAS]["OPTIONS"] = {"timeout": 20, "init_command": "PRAGMA query_only=ON;"}
+    else:
+        DATABASES[REPLICA_DATABASE_ALIAS]["HOST"] = os.environ.get("QUICKVOTE_DB_REPLICA_HOST", DATABASES["default"]["HOST"])
+
+DATABASE_ROUTERS = ["config.routers.ReplicaRouter"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -140,17 +219,42 @@ LOGOUT_REDIRECT_URL = "/"
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 DEFAULT_FROM_EMAIL = "no-reply@quickvote.local"
 
+# Сессии (config.sessions): пользователи - cached_db, анонимные сессии - только в кэше, если он общий
+# для процессов (Redis, Memcached); с LocMemCache анонимные сессии тоже пишутся в БД (предупреждение quickvote.W001).
+# Сессия пишется только при изменении; срок сессии пользователя продлевается раз в SESSION_REFRESH_INTERVAL.
+# Просроченные строки удаляет scripts/clear_sessions.py.
+SESSION_ENGINE = "config.sessions"
+SESSION_CACHE_ALIAS = "default"
 SESSION_COOKIE_AGE = 60 * 60 * 24 * 30
-SESSION_SAVE_EVERY_REQUEST = True
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_INTERVAL = 60 * 60 * 24
 
 PASSWORD_RESET_TIMEOUT = 60 * 60 * 24
 
+# Кэш проверенных API-токенов в памяти процесса (users.authentication): время жизни записи и максимум записей.
+# Отозванный токен перестает приниматься другими процессами не позже чем через TOKEN_AUTH_CACHE_TTL секунд.
+TOKEN_AUTH_CACHE_TTL = 60
+TOKEN_AUTH_CACHE_SIZE = 10000
+
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
+    # config.renderers: orjson, если установлен, иначе стандартный json с тем же выводом
+    "DEFAULT_RENDERER_CLASSES": [
+        "config.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "config.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # Клиенты без cookie сессии проверяются только по токену: без загрузки сессии и CSRF.
+    # SessionAuthentication первой - анонимные запросы по-прежнему получают 403, а не 401.
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
+        "users.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -161,6 +265,71 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 20,
 }
 
+# Профилирование SQL-запросов (config.profiling): включается переменной окружения QUICKVOTE_QUERY_PROFILER=1.
+# QUERY_BUDGETS задает максимум запросов по имени view; при QUERY_BUDGET_ENFORCE превышение - ошибка (для тестов).
+QUERY_PROFILER_ENABLED = os.environ.get("QUICKVOTE_QUERY_PROFILER") == "1"
+QUERY_PROFILER_REPORT = os.environ.get("QUICKVOTE_QUERY_PROFILER_REPORT")
+QUERY_BUDGET_ENFORCE = False
+QUERY_BUDGETS = {
+    "responses:api-submit": 30,
+    "responses:api-submit-batch": 20,
+    "responses:api-stats": 20,
+    "responses:api-export": 20,
+    "survey-public": 10,
+    "survey-clone": 15,
+    "survey-clone-many": 15,
+    "users:history": 10,
+    "dashboard": 15,
+}
+
+if QUERY_PROFILER_ENABLED:
+    MIDDLEWARE.insert(0, "config.profiling.QueryProfilerMiddleware")
+
+# Кэши: "default" хранит в том числе сессии (SESSION_CACHE_ALIAS), "throttle" - корзины ограничения
+# частоты голосов (responses.throttling).
+# Локальный кэш работает в пределах процесса; при нескольких процессах укажите общий бэкенд (Redis/Memcached).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "throttle": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "quickvote-throttle",
+    },
+}
+
+# Ограничение частоты анонимных голосов (token bucket): capacity - запас, refill_seconds - время на один токен.
+# client - IP + User-Agent (+ cookie VOTE_THROTTLE_COOKIE) в одном опросе, ip - IP во всех опросах,
+# survey - все анонимные голоса в опросе. Отключается QUICKVOTE_VOTE_THROTTLE=0.
+VOTE_THROTTLE_ENABLED = os.environ.get("QUICKVOTE_VOTE_THROTTLE", "1") == "1"
+VOTE_THROTTLE_COOKIE = "qv_voter"
+VOTE_THROTTLE_BUCKETS = {
+    "client": {"capacity": 5, "refill_seconds": 60},
+    "ip": {"capacity": 120, "refill_seconds": 1},
+    "survey": {"capacity": 1000, "refill_seconds": 0.01},
+}
+
+# Сколько секунд хранится результат отправки ответа по Idempotency-Key (responses.idempotency).
+# Просроченные ключи удаляет scripts/purge_idempotency_keys.py.
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+
+# Время жизни версии и фрагментов публичной страницы опроса (surveys.page_cache), секунды
+SURVEY_PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Async-представления отправки голоса и статистики (config.async_views): включаются config.asgi
+# или QUICKVOTE_ASYNC_VIEWS=1. Под WSGI каждый async-запрос выполнялся бы через async_to_sync - медленнее.
+ASYNC_API_VIEWS = os.environ.get("QUICKVOTE_ASYNC_VIEWS") == "1"
+
+# Максимальный возраст снимка каталога шаблонов в памяти процесса (surveys.catalog), секунды.
+# В пределах процесса изменения шаблонов применяются сразу, в других процессах - не позже этого срока.
+TEMPLATE_CATALOG_TTL = 60 * 5
+
+# Максимум ответов в одном запросе пакетной отправки (responses.batch)
+SUBMIT_BATCH_MAX_SIZE = 500
+
+# Максимум опросов в одном запросе пакетного копирования (surveys.cloning)
+SURVEY_CLONE_MAX_SIZE = 50
+
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost",
     "http://127.0.0.1",
@@ -0,0 +1,368 @@
+import io
+import json
+import os
+import tempfile
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.test import RequestFactory, SimpleTestCase, TestCase, modify_settings, override_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from surveys.models import Survey, Question, Choice
+from responses.models import SurveyResponse, Answer
+from notifications.models import Notification, NotificationRule
+from . import renderers
+from .profiling import QueryBudgetExceeded, fingerprint
+from .renderers import FastJSONParser, FastJSONRenderer
+from .sessions import REFRESHED_AT_KEY, SessionStore, check_session_cache, clear_expired_sessions
+from .routers import STICKY_COOKIE_NAME, ReplicaRouter, ReplicaRoutingMiddleware, read_from_primary, read_from_replica
+
+User = get_user_model()
+
+PROFILER = {"prepend": "config.profiling.QueryProfilerMiddleware"}
+
+
+@modify_settings(MIDDLEWARE=PROFILER)
+class QueryProfilerTest(TestCase):
+    """Тесты для профилировщика SQL-запросов и бюджетов запросов."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpass123"
+        )
+        self.survey = Survey.objects.create(
+            author=self.user,
+            title="Profiled Survey",
+            status=Survey.STATUS_ACTIVE,
+            survey_type=Survey.TYPE_PUBLIC
+        )
+        self.question = Question.objects.create(
+            survey=self.survey,
+            text="Single choice?",
+            question_type=Question.TYPE_SINGLE
+        )
+        self.choice = Choice.objects.create(question=self.question, label="Yes", order=0)
+        for index in range(3):
+            voter = User.objects.create_user(username=f"voter{index}", email=f"voter{index}@example.com", password="x")
+            response = SurveyResponse.objects.create(survey=self.survey, user=voter, is_anonymous=False)
+            Answer.objects.create(response=response, question=self.question).selected_choices.add(self.choice)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_fingerprint_collapses_literals_and_in_lists(self):
+        """Тест: запросы, отличающиеся только значениями, дают один отпечаток."""
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'a' AND x IN (%s, %s)"),
+            fingerprint("SELECT  *  FROM t WHERE id = 25 AND name = 'bb' AND x IN (%s)"),
+        )
+
+    def test_headers_and_report_file(self):
+        """Тест: профилировщик добавляет заголовки и пишет отчет с повторами и местами вызова."""
+        with tempfile.TemporaryDirectory() as tmp:
+            report_path = os.path.join(tmp, "queries.ndjson")
+            with override_settings(QUERY_PROFILER_REPORT=report_path):
+                response = self.client.get(f"/responses/api/{self.survey.slug}/stats/")
+            with open(report_path, encoding="utf-8") as f:
+                report = json.loads(f.readline())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(int(response["X-Query-Count"]), report["queries"])
+        self.assertEqual(report["view"], "responses:api-stats")
+        # Статистика строится без повторяющихся запросов (prefetch ответов и вариантов)
+        self.assertEqual(report["duplicates"], [])
+        self.assertTrue(any("responses/views.py" in site["site"] for site in report["call_sites"]))
+
+    @override_settings(QUERY_BUDGET_ENFORCE=True, QUERY_BUDGETS={"responses:api-stats": 1})
+    def test_enforced_budget_fails(self):
+        """Тест: превышение бюджета при QUERY_BUDGET_ENFORCE приводит к ошибке."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(f"/responses/api/{self.survey.slug}/stats/")
+
+    def add_votes(self, count):
+        text_question = Question.objects.create(survey=self.survey, text="Why?", question_type=Question.TYPE_TEXT, order=1)
+        for index in range(count):
+            response = SurveyResponse.objects.create(survey=self.survey)
+            Answer.objects.create(response=response, question=self.question).selected_choices.add(self.choice)
+            Answer.objects.create(response=response, question=text_question, text_answer=f"Because {index}")
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            # Потоковый ответ (CSV экспорт) читает БД по мере отдачи
+            b"".join(getattr(response, "streaming_content", []))
+        return len(queries)
+
+    @override_settings(QUERY_BUDGET_ENFORCE=True)
+    def test_hot_endpoints_fit_configured_budgets(self):
+        """Тест: горячие endpoints укладываются в бюджеты, статистика и экспорт - независимо от числа голосов."""
+        self.add_votes(0)
+        urls = [f"/responses/api/{self.survey.slug}/stats/", f"/responses/api/{self.survey.slug}/export/csv/"]
+        few = [self.count_queries(url) for url in urls]
+        self.add_votes(47)
+        cache.clear()
+        self.assertEqual([self.count_queries(url) for url in urls], few)
+        self.assertEqual(self.client.get(f"/api/surveys/{self.survey.slug}/public/").status_code, 200)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/dashboard/").status_code, 200)
+        self.assertEqual(self.client.get("/auth/history/").status_code, 200)
+
+
+class DatabaseProfileTest(TestCase):
+    """Тесты для профилей БД."""
+
+    def test_profiles_are_complete(self):
+        """Тест: все профили описывают движок, пул соединений исключает CONN_MAX_AGE"""
+        for name, profile in settings.DATABASE_PROFILES.items():
+            self.assertIn("ENGINE", profile, name)
+        self.assertEqual(settings.DATABASE_PROFILES["postgres-pooled"]["CONN_MAX_AGE"], 0)
+        self.assertIn("pool", settings.DATABASE_PROFILES["postgres-pooled"]["OPTIONS"])
+
+    def test_sqlite_init_command_applied(self):
+        """Тест: настроенный SQLite-профиль применяет PRAGMA при создании соединения"""
+        if settings.DB_PROFILE != "sqlite":
+            self.skipTest("Активен другой профиль БД")
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+
+@override_settings(REPLICA_DATABASE_ALIAS="replica")
+class ReplicaRouterTest(SimpleTestCase):
+    """Тесты для маршрутизации чтений на реплику."""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def run_request(self, view, cookies=None):
+        """Прогоняет запрос через middleware; view получает запрос и возвращает HttpResponse."""
+        middleware = ReplicaRoutingMiddleware(lambda request: middleware.process_view(request, view, (), {}) or view(request))
+        request = self.factory.get("/")
+        request.COOKIES.update(cookies or {})
+        return middleware(request)
+
+    def test_reads_use_primary_by_default(self):
+        """Тест: без явного контекста чтения идут на основную БД"""
+        self.assertIsNone(self.router.db_for_read(Survey))
+
+    def test_replica_context_and_primary_override(self):
+        """Тест: read_from_replica включает реплику, read_from_primary внутри него выключает ее и для вложенных блоков"""
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(SurveyResponse), "replica")
+            self.assertIsNone(self.router.db_for_read(User))
+            with read_from_primary():
+                self.assertIsNone(self.router.db_for_read(SurveyResponse))
+                with read_from_replica():
+                    self.assertIsNone(self.router.db_for_read(SurveyResponse))
+            self.assertEqual(self.router.db_for_read(SurveyResponse), "replica")
+
+    def test_write_pins_request_and_sets_sticky_cookie(self):
+        """Тест: после записи чтения в запросе идут на основную БД, клиенту ставится sticky-cookie"""
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Survey))
+            self.assertEqual(self.router.db_for_write(SurveyResponse), "default")
+            seen.append(self.router.db_for_read(Survey))
+            return HttpResponse()
+
+        view.use_replica = True
+        response = self.run_request(view)
+        self.assertEqual(seen, ["replica", None])
+        self.assertIn(STICKY_COOKIE_NAME, response.cookies)
+
+    def test_sticky_cookie_keeps_reads_on_primary(self):
+        """Тест: клиент с sticky-cookie читает с основной БД даже во view с use_replica"""
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Survey))
+            return HttpResponse()
+
+        view.use_replica = True
+        response = self.run_request(view, cookies={STICKY_COOKIE_NAME: "1"})
+        self.assertEqual(seen, [None])
+        self.assertNotIn(STICKY_COOKIE_NAME, response.cookies)
+
+
+class HotQueryIndexTest(TestCase):
+    """Тесты планов запросов: горячие выборки должны использовать составные индексы."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="planner", email="planner@example.com", password="testpass123")
+        self.survey = Survey.objects.create(author=self.user, title="Indexed Survey")
+        self.question = Question.objects.create(survey=self.survey, text="Q?", question_type=Question.TYPE_TEXT)
+        self.rule = NotificationRule.objects.create(survey=self.survey, threshold=5, email="planner@example.com")
+        if connection.vendor == "postgresql":
+            # На маленьких таблицах PostgreSQL предпочитает полный просмотр
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+        if connection.vendor == "sqlite":
+            self.assertNotIn("TEMP B-TREE", plan, plan)
+
+    def test_response_indexes(self):
+        """Тест: ответы по опросу/пользователю и дате используют индексы без сортировки"""
+        responses = SurveyResponse.objects.order_by("-submitted_at")
+        self.assertUsesIndex(responses.filter(survey=self.survey, user=self.user), "survey_id_user_id")
+        self.assertUsesIndex(responses.filter(survey=self.survey), "response_survey_submitted_idx")
+        self.assertUsesIndex(responses.filter(user=self.user).order_by("-submitted_at", "-pk"), "response_user_submitted_idx")
+
+    def test_survey_indexes(self):
+        """Тест: опросы автора по статусу/дате и активные по сроку используют индексы"""
+        self.assertUsesIndex(
+            Survey.objects.filter(author=self.user, status=Survey.STATUS_ACTIVE).order_by(), "survey_author_status_idx"
+        )
+        self.assertUsesIndex(Survey.objects.filter(author=self.user), "survey_author_created_idx")
+        self.assertUsesIndex(
+            Survey.objects.filter(status=Survey.STATUS_ACTIVE, ends_at__lte=timezone.now()).order_by(),
+            "survey_status_ends_idx",
+        )
+
+    def test_answer_and_notification_indexes(self):
+        """Тест: ответы на вопрос и проверка порога уведомления используют составные индексы"""
+        self.assertUsesIndex(
+            Answer.objects.filter(question=self.question).values("response_id"), "answer_question_response_idx"
+        )
+        self.assertUsesIndex(
+            self.rule.notifications.filter(total_responses__gte=self.rule.threshold), "notification_rule_total_idx"
+        )
+
+
+class FastJSONTest(SimpleTestCase):
+    """Тесты для JSON renderer и parser на orjson."""
+
+    payload = {
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "created_at": datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        "day": date(2026, 3, 1),
+        "price": Decimal("12.50"),
+        "text": "Привет\u2028мир\u2029 \"кавычки\"",
+        "ratio": 33.33,
+        "counts": {1: 2, "b": None},
+        "items": [{"flag": True, "value": 0}, [], "строка"],
+    }
+
+    def test_output_matches_drf_renderer(self):
+        """Тест: вывод совпадает с JSONRenderer DRF побайтно, с orjson и без него"""
+        expected = JSONRenderer().render(self.payload)
+        self.assertEqual(FastJSONRenderer().render(self.payload), expected)
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(FastJSONRenderer().render(self.payload), expected)
+
+    def test_indent_and_unsupported_data_fall_back(self):
+        """Тест: форматированный вывод и большие целые кодируются стандартным json"""
+        media_type = "application/json; indent=4"
+        self.assertEqual(
+            FastJSONRenderer().render(self.payload, media_type), JSONRenderer().render(self.payload, media_type)
+        )
+        self.assertEqual(FastJSONRenderer().render({"big": 2 ** 70}), b'{"big":%d}' % 2 ** 70)
+
+    def test_parser_reads_utf8_and_rejects_invalid_json(self):
+        """Тест: parser разбирает UTF-8 и превращает ошибки в ParseError"""
+        parser = FastJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"a": ["б", 1.5]}'.encode())), {"a": ["б", 1.5]})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"a": NaN}'))
+
+
+class SessionStoreTest(TestCase):
+    """Тесты для хранения сессий с минимумом записей в БД."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="sessionuser",
+            email="sessionuser@example.com",
+            password="testpass123"
+        )
+
+    def session_writes(self, queries):
+        return [
+            query["sql"] for query in queries
+            if "django_session" in query["sql"] and query["sql"].lstrip().upper().startswith(("INSERT", "UPDATE"))
+        ]
+
+    def test_anonymous_session_is_kept_in_cache_only(self):
+        """Тест: с общим кэшем анонимная сессия не создает строку в django_session"""
+        with tempfile.TemporaryDirectory() as location, override_settings(
+            CACHES={**settings.CACHES, "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location}}
+        ):
+            session = SessionStore()
+            session["voted"] = ["abc"]
+            session.save()
+
+            self.assertFalse(Session.objects.exists())
+            self.assertEqual(SessionStore(session.session_key)["voted"], ["abc"])
+            self.assertEqual(check_session_cache(None), [])
+
+    def test_anonymous_session_is_saved_to_database_with_local_cache(self):
+        """Тест: с кэшем процесса анонимная сессия переживает очистку кэша, check --deploy предупреждает"""
+        session = SessionStore()
+        session["voted"] = ["abc"]
+        session.save()
+        cache.clear()
+
+        self.assertTrue(Session.objects.filter(session_key=session.session_key).exists())
+        self.assertEqual(SessionStore(session.session_key)["voted"], ["abc"])
+        self.assertEqual([warning.id for warning in check_session_cache(None)], ["quickvote.W001"])
+
+    def test_login_moves_session_to_database(self):
+        """Тест: после входа сессия хранится в БД и переживает очистку кэша"""
+        self.client.force_login(self.user)
+        self.assertEqual(Session.objects.count(), 1)
+        cache.clear()
+        self.assertEqual(self.client.get("/dashboard/").status_code, 200)
+
+    def test_unmodified_session_is_not_written(self):
+        """Тест: запросы без изменения сессии не пишут в django_session"""
+        self.client.force_login(self.user)
+        self.client.get("/dashboard/")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/dashboard/")
+            self.client.get("/surveys/")
+        self.assertEqual(self.session_writes(queries.captured_queries), [])
+
+    @override_settings(SESSION_REFRESH_INTERVAL=60)
+    def test_session_is_refreshed_after_interval(self):
+        """Тест: срок сессии продлевается, когда с прошлого продления прошло SESSION_REFRESH_INTERVAL"""
+        self.client.force_login(self.user)
+        self.client.get("/dashboard/")
+        session = self.client.session
+        session[REFRESHED_AT_KEY] -= 120
+        session.save()
+        Session.objects.update(expire_date=timezone.now() + timedelta(days=1))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/dashboard/")
+
+        self.assertEqual(len(self.session_writes(queries.captured_queries)), 1)
+        self.assertGreater(Session.objects.get().expire_date, timezone.now() + timedelta(days=20))
+
+    def test_expired_sessions_are_cleared_in_batches(self):
+        """Тест: clear_expired_sessions удаляет только просроченные строки"""
+        expired = timezone.now() - timedelta(days=1)
+        for index in range(5):
+            Session.objects.create(session_key=f"expired{index}", session_data="", expire_date=expired)
+        self.client.force_login(self.user)
+
+        self.assertEqual(clear_expired_sessions(batch_size=2), 5)
+        self.assertEqual(Session.objects.count(), 1)
@@ -21,12 +21,13 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 from users.views import LandingPageView
-from analytics.views import DashboardView
+from analytics.views import DashboardView, AdminMonitorView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", LandingPageView.as_view(), name="home"),
     path("dashboard/", DashboardView.as_view(), name="dashboard"),
+    path("dashboard/monitor/", AdminMonitorView.as_view(), name="admin-monitor"),
     path("auth/", include(("users.urls", "users"), namespace="users")),
     path("surveys/", include(("surveys.urls", "surveys"), namespace="surveys")),
     path("responses/", include(("responses.urls", "responses"), namespace="responses")),
@@ -17,11 +17,17 @@ class NotificationRule(models.Model):
 
 class Notification(models.Model):
     """Модель отправленного уведомления по правилу."""
-    rule = models.ForeignKey(NotificationRule, on_delete=models.CASCADE, related_name="notifications")
+    rule = models.ForeignKey(NotificationRule, on_delete=models.CASCADE, related_name="notifications", db_index=False)
     sent_at = models.DateTimeField(auto_now_add=True)
     total_responses = models.PositiveIntegerField(default=0)
     message = models.TextField()
 
+    class Meta:
+        indexes = [
+            # Проверка "уведомление по порогу уже отправлено"
+            models.Index(fields=["rule", "total_responses"], name="notification_rule_total_idx"),
+        ]
+
 
 class Complaint(models.Model):
     """Модель жалобы на опрос от пользователя."""
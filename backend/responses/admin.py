@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.db import transaction
 
-from .models import SurveyResponse, Answer
+from analytics.rollups import discard_votes
+from surveys import etags
+from .models import SurveyResponse, Answer, SurveyArchive
 
 
 class AnswerInline(admin.TabularInline):
@@ -14,3 +17,34 @@ class SurveyResponseAdmin(admin.ModelAdmin):
     list_filter = ("survey", "is_anonymous")
     search_fields = ("survey__title", "user__username", "ip_address")
     inlines = [AnswerInline]
+    readonly_fields = ("packed_answers_display",)
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, SurveyResponse.objects.filter(pk=obj.pk))
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        # У SurveyResponse нет приемников удаления (каскад от опроса не загружает голоса) -
+        # агрегаты и ETag статистики обновляются здесь
+        discard_votes(queryset)
+        for survey_id in set(queryset.values_list("survey_id", flat=True)):
+            etags.bump("responses", survey_id)
+        queryset.delete()
+
+    @admin.display(description="Упакованные ответы")
+    def packed_answers_display(self, obj):
+        if not obj.packed_answers:
+            return "-"
+        lines = []
+        for answer in obj.answer_list():
+            value = ", ".join(answer.selected_choices.values_list("label", flat=True)) or answer.text_answer or answer.rating_value
+            lines.append(f"{answer.question.text}: {value}")
+        return "; ".join(lines)
+
+
+@admin.register(SurveyArchive)
+class SurveyArchiveAdmin(admin.ModelAdmin):
+    list_display = ("survey", "archived_at", "total_responses", "answer_count")
+    search_fields = ("survey__title",)
+    exclude = ("answers",)
+    readonly_fields = ("survey", "total_responses", "answer_count", "statistics")
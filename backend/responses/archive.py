@@ -0,0 +1,148 @@
+"""
+Архивация закрытых опросов.
+
+Итоговая статистика опроса замораживается в SurveyArchive.statistics, а ответы на вопросы
+(Answer и связи с вариантами) переносятся в сжатый zlib JSON в SurveyArchive.answers и удаляются
+из горячих таблиц. Строки SurveyResponse остаются: они небольшие и нужны для истории
+пользователя, проверки участия и дашбордов. Статистика и экспорт архивных опросов
+отдаются из архива (см. responses.views).
+"""
+import json
+import zlib
+
+from django.db import transaction
+
+from config.routers import read_from_primary
+
+from surveys.models import Survey
+from .models import Answer, SurveyArchive
+
+ARCHIVE_FORMAT_VERSION = 1
+
+AnswerChoice = Answer.selected_choices.through
+
+
+def _pack(rows):
+    """Сжимает строки ответов по мере чтения итератора. Возвращает (blob, число строк)."""
+    compressor = zlib.compressobj(6)
+    chunks = [compressor.compress(b'{"version":%d,"answers":[' % ARCHIVE_FORMAT_VERSION)]
+    count = 0
+    for row in rows:
+        encoded = json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        chunks.append(compressor.compress(b"," + encoded if count else encoded))
+        count += 1
+    chunks.append(compressor.compress(b"]}"))
+    chunks.append(compressor.flush())
+    return b"".join(chunks), count
+
+
+def _answer_rows(survey):
+    """Строки архива по ответам опроса в порядке id; варианты подставляются слиянием с упорядоченными связями."""
+    links = (
+        AnswerChoice.objects.filter(answer__response__survey=survey)
+        .order_by("answer_id", "choice_id")
+        .values_list("answer_id", "choice_id")
+        .iterator()
+    )
+    link = next(links, None)
+    answers = Answer.objects.filter(response__survey=survey).order_by("id")
+    for answer_id, response_id, question_id, text_answer, rating_value in answers.values_list(
+        "id", "response_id", "question_id", "text_answer", "rating_value"
+    ).iterator():
+        choice_ids = []
+        while link is not None and link[0] == answer_id:
+            choice_ids.append(link[1])
+            link = next(links, None)
+        yield [answer_id, response_id, question_id, text_answer, rating_value, choice_ids]
+
+
+def _unpack(blob):
+    payload = json.loads(zlib.decompress(bytes(blob)).decode("utf-8"))
+    if payload.get("version") != ARCHIVE_FORMAT_VERSION:
+        raise ValueError(f"Неподдерживаемая версия архива: {payload.get('version')}")
+    return payload["answers"]
+
+
+def get_archive(survey, with_answers=False):
+    """Архив опроса или None. Без with_answers сжатые ответы не загружаются."""
+    queryset = SurveyArchive.objects.filter(survey=survey)
+    if not with_answers:
+        queryset = queryset.defer("answers")
+    return queryset.first()
+
+
+def archived_answers(archive):
+    """
+    Ответы из архива в порядке id: словари с ключами id, response_id, question_id,
+    text_answer, rating_value, choice_ids.
+    """
+    keys = ("id", "response_id", "question_id", "text_answer", "rating_value", "choice_ids")
+    return [dict(zip(keys, row)) for row in _unpack(archive.answers)]
+
+
+@transaction.atomic
+def archive_survey(survey):
+    """Переносит ответы закрытого опроса в архив. Возвращает созданный SurveyArchive."""
+    from .views import build_statistics_payload
+
+    if survey.status != Survey.STATUS_CLOSED:
+        raise ValueError("Архивировать можно только закрытый опрос")
+    if survey.answer_storage == Survey.STORAGE_PACKED:
+        raise ValueError("Ответы опроса уже хранятся компактно")
+    if get_archive(survey) is not None:
+        raise ValueError("Опрос уже в архиве")
+
+    # Статистика замораживается по тем же данным, что удаляются ниже, - не с отстающей реплики
+    with read_from_primary():
+        statistics = build_statistics_payload(survey)
+    blob, answer_count = _pack(_answer_rows(survey))
+
+    archive = SurveyArchive.objects.create(
+        survey=survey,
+        total_responses=statistics["total_responses"],
+        answer_count=answer_count,
+        statistics=statistics,
+        answers=blob,
+    )
+    answers = Answer.objects.filter(response__survey=survey)
+    links = AnswerChoice.objects.filter(answer__response__survey=survey)
+    # Прямое удаление без загрузки строк и сигналов, связи - раньше ответов
+    links._raw_delete(links.db)
+    answers._raw_delete(answers.db)
+    survey.is_archived = True
+    return archive
+
+
+@transaction.atomic
+def restore_survey(survey):
+    """Возвращает ответы из архива в горячие таблицы (с исходными id) и удаляет архив."""
+    archive = get_archive(survey, with_answers=True)
+    if archive is None:
+        raise ValueError("Опрос не в архиве")
+    rows = archived_answers(archive)
+    Answer.objects.bulk_create(
+        [
+            Answer(
+                id=row["id"],
+                response_id=row["response_id"],
+                question_id=row["question_id"],
+                text_answer=row["text_answer"],
+                rating_value=row["rating_value"],
+            )
+            for row in rows
+        ],
+        batch_size=2000,
+    )
+    AnswerChoice.objects.bulk_create(
+        [AnswerChoice(answer_id=row["id"], choice_id=choice_id) for row in rows for choice_id in row["choice_ids"]],
+        batch_size=2000,
+    )
+    archive.delete()
+    survey.is_archived = False
+    return len(rows)
+
+
+def archivable_surveys(closed_before):
+    """Закрытые опросы без архива, не изменявшиеся с closed_before."""
+    return Survey.objects.filter(status=Survey.STATUS_CLOSED, updated_at__lt=closed_before, archive__isnull=True)
+
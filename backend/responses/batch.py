@@ -0,0 +1,78 @@
+"""
+Пакетная отправка ответов (киоски и офлайн-сбор).
+
+Все ответы пакета проверяются по одной схеме опроса, загруженной двумя запросами
+(surveys.schema.SurveySchema), и вставляются bulk_create в одной транзакции: несколько запросов
+на пакет вместо десятков на каждый голос. post_save для отдельных ответов не отправляется;
+уведомления и агрегаты обновляются один раз на пакет по сигналу responses_batch_created
+(агрегаты - в транзакции пакета, уведомления - после ее фиксации).
+"""
+from django.db import transaction
+
+from surveys.models import Survey
+from surveys.schema import SurveySchema
+from .models import Answer, SurveyResponse
+from .serializers import BatchResponseSerializer, pack_answers
+from .signals import responses_batch_created
+
+AnswerChoice = Answer.selected_choices.through
+
+
+def validate_batch(survey, items):
+    """Проверяет элементы пакета. Возвращает (схема, [(индекс, validated_data)], [{"index", "errors"}])."""
+    schema = SurveySchema.for_survey(survey)
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        serializer = BatchResponseSerializer(data=item, context={"schema": schema})
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors.append({"index": index, "errors": serializer.errors})
+    return schema, valid, errors
+
+
+def create_batch(survey, schema, items, ip_address=None, user_agent=""):
+    """Сохраняет проверенные ответы пакета одной транзакцией. Возвращает созданные SurveyResponse."""
+    packed = survey.answer_storage == Survey.STORAGE_PACKED
+    with transaction.atomic():
+        responses = SurveyResponse.objects.bulk_create(
+            [
+                SurveyResponse(
+                    survey=survey,
+                    is_anonymous=True,
+                    ip_address=ip_address,
+                    user_agent=user_agent[:500],
+                    duration_seconds=item.get("duration_seconds") or 0,
+                    packed_answers=pack_answers(schema, item["answers"]) if packed else None,
+                )
+                for item in items
+            ],
+            batch_size=500,
+        )
+        if not packed:
+            answers, selected = [], []
+            for response, item in zip(responses, items):
+                for answer in item["answers"]:
+                    answers.append(
+                        Answer(
+                            response=response,
+                            question=answer["question"],
+                            text_answer=answer.get("text_answer", ""),
+                            rating_value=answer.get("rating_value"),
+                        )
+                    )
+                    selected.append(answer.get("selected_choices") or [])
+            # bulk_create возвращает pk (SQLite 3.35+, PostgreSQL) - связи с вариантами вставляются следом
+            Answer.objects.bulk_create(answers, batch_size=1000)
+            AnswerChoice.objects.bulk_create(
+                [
+                    AnswerChoice(answer_id=answer.pk, choice_id=choice_id)
+                    for answer, choice_ids in zip(answers, selected)
+                    for choice_id in dict.fromkeys(choice_ids)
+                ],
+                batch_size=2000,
+            )
+        # Как post_save одиночного голоса - в транзакции: агрегаты откатываются вместе с пакетом,
+        # уведомления и ETag подписчики откладывают до фиксации
+        responses_batch_created.send(sender=SurveyResponse, survey=survey, responses=responses)
+    return responses
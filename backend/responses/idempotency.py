@@ -0,0 +1,89 @@
+"""
+Идемпотентная отправка ответов (заголовок Idempotency-Key).
+
+Клиент с нестабильной сетью повторяет POST с тем же ключом. Первый успешный ответ сохраняется
+в IdempotencyKey вместе с отпечатком тела запроса; повтор в пределах IDEMPOTENCY_KEY_TTL
+получает сохраненный ответ без сериализатора, сигналов и новых строк SurveyResponse.
+Ключ действует в рамках опроса и отправителя: пользователя или, для анонимов, IP.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from config.routers import read_from_primary
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyError(ValueError):
+    """Некорректный ключ или ключ уже использован с другим телом запроса."""
+
+
+def _digest(*parts):
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def request_key(request, survey):
+    """Хэш ключа из заголовка в рамках опроса и отправителя или None, если заголовка нет."""
+    key = request.headers.get(HEADER)
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise IdempotencyKeyError(f"{HEADER} должен содержать от 1 до {MAX_KEY_LENGTH} символов")
+    if request.user.is_authenticated:
+        sender = f"user:{request.user.pk}"
+    else:
+        sender = f"ip:{request.META.get('REMOTE_ADDR', '')}"
+    return _digest(str(survey.pk), sender, key)
+
+
+def request_fingerprint(request):
+    """Отпечаток тела запроса: повтор с тем же ключом должен отправлять те же данные."""
+    return _digest(json.dumps(request.data, sort_keys=True, ensure_ascii=False, default=str))
+
+
+def _expires_before():
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def _checked(stored, fingerprint):
+    if stored is not None and stored.request_hash != fingerprint:
+        raise IdempotencyKeyError(f"{HEADER} уже использован с другим запросом")
+    return stored
+
+
+def find_stored(key_hash, fingerprint):
+    """Сохраненный результат по ключу или None. Ключ с другим телом запроса - IdempotencyKeyError."""
+    with read_from_primary():
+        stored = IdempotencyKey.objects.filter(key_hash=key_hash, created_at__gte=_expires_before()).first()
+    return _checked(stored, fingerprint)
+
+
+async def afind_stored(key_hash, fingerprint):
+    """Async-версия find_stored (async ORM)."""
+    with read_from_primary():
+        stored = await IdempotencyKey.objects.filter(key_hash=key_hash, created_at__gte=_expires_before()).afirst()
+    return _checked(stored, fingerprint)
+
+
+def store(key_hash, fingerprint, status_code, body):
+    """Сохраняет результат запроса; просроченная запись с тем же ключом заменяется."""
+    IdempotencyKey.objects.filter(key_hash=key_hash, created_at__lt=_expires_before())._raw_delete(IdempotencyKey.objects.db)
+    return IdempotencyKey.objects.create(key_hash=key_hash, request_hash=fingerprint, status_code=status_code, body=body)
+
+
+def purge_expired(batch_size=5000):
+    """Удаляет просроченные ключи пачками по индексу created_at. Возвращает число удаленных строк."""
+    expired = IdempotencyKey.objects.filter(created_at__lt=_expires_before())
+    deleted = 0
+    while True:
+        batch = list(expired.values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(pk__in=batch)._raw_delete(IdempotencyKey.objects.db)
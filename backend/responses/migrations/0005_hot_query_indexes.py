@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("responses", "0004_alter_surveyresponse_unique_together_and_more"),
+        ("surveys", "0005_hot_query_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="answer",
+            name="question",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="surveys.question",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="surveyresponse",
+            name="survey",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="responses",
+                to="surveys.survey",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="surveyresponse",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="answer",
+            index=models.Index(
+                fields=["question", "response"], name="answer_question_response_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="surveyresponse",
+            index=models.Index(
+                fields=["survey", "submitted_at"], name="response_survey_submitted_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="surveyresponse",
+            index=models.Index(
+                fields=["user", "submitted_at"], name="response_user_submitted_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("responses", "0005_hot_query_indexes"),
+        ("surveys", "0005_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SurveyArchive",
+            fields=[
+                (
+                    "survey",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="archive",
+                        serialize=False,
+                        to="surveys.survey",
+                    ),
+                ),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                ("total_responses", models.PositiveIntegerField(default=0)),
+                ("answer_count", models.PositiveIntegerField(default=0)),
+                ("statistics", models.JSONField()),
+                ("answers", models.BinaryField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("responses", "0006_survey_archive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="surveyresponse",
+            name="packed_answers",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -6,29 +6,77 @@ from surveys.models import Survey, Question, Choice
 
 class SurveyResponse(models.Model):
     """Модель ответа на опрос. Один пользователь может ответить на опрос только один раз."""
-    survey = models.ForeignKey(Survey, on_delete=models.CASCADE, related_name="responses")
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    # Отдельные индексы FK не нужны: поля - префиксы составных индексов ниже
+    survey = models.ForeignKey(Survey, on_delete=models.CASCADE, related_name="responses", db_index=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, db_index=False)
     is_anonymous = models.BooleanField(default=True)
     submitted_at = models.DateTimeField(auto_now_add=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.CharField(max_length=500, blank=True)
     duration_seconds = models.PositiveIntegerField(default=0)
+    # Ответы опроса с answer_storage="packed" одним blob'ом вместо строк Answer (responses.packing)
+    packed_answers = models.BinaryField(null=True, blank=True)
 
     class Meta:
         ordering = ["-submitted_at"]
         unique_together = ("survey", "user")  # Один ответ от одного пользователя на опрос
+        indexes = [
+            # Ответы опроса по дате (статистика, дашборд) и история пользователя (keyset по дате и pk)
+            models.Index(fields=["survey", "submitted_at"], name="response_survey_submitted_idx"),
+            models.Index(fields=["user", "submitted_at"], name="response_user_submitted_idx"),
+        ]
 
     def __str__(self):
         return f"{self.survey.title} response {self.pk}"
 
+    def answer_list(self):
+        """Ответы на вопросы независимо от способа хранения: Answer или AnswerAdapter."""
+        if self.survey.answer_storage == Survey.STORAGE_PACKED:
+            from .packing import adapt_answers
+
+            return adapt_answers(self)
+        return list(self.answers.all())
+
 
 class Answer(models.Model):
     """Модель ответа на конкретный вопрос в рамках SurveyResponse."""
     response = models.ForeignKey(SurveyResponse, on_delete=models.CASCADE, related_name="answers")
-    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, db_index=False)
     text_answer = models.TextField(blank=True)
     rating_value = models.PositiveSmallIntegerField(null=True, blank=True)
     selected_choices = models.ManyToManyField(Choice, blank=True)
 
+    class Meta:
+        indexes = [
+            # Ответы на вопрос вместе с response_id без чтения строк таблицы (статистика, экспорт)
+            models.Index(fields=["question", "response"], name="answer_question_response_idx"),
+        ]
+
     def __str__(self):
         return f"{self.question.text[:40]}"
+
+
+class SurveyArchive(models.Model):
+    """Архив закрытого опроса: итоговая статистика и сжатые ответы на вопросы (см. responses.archive)."""
+    survey = models.OneToOneField(Survey, on_delete=models.CASCADE, primary_key=True, related_name="archive")
+    archived_at = models.DateTimeField(auto_now_add=True)
+    total_responses = models.PositiveIntegerField(default=0)
+    answer_count = models.PositiveIntegerField(default=0)
+    statistics = models.JSONField()
+    answers = models.BinaryField()
+
+    def __str__(self):
+        return f"Архив: {self.survey.title}"
+
+
+class IdempotencyKey(models.Model):
+    """Сохраненный результат отправки ответа по заголовку Idempotency-Key (см. responses.idempotency)."""
+    # sha256 от опроса, отправителя (пользователь или IP) и ключа клиента - строка фиксированной длины
+    key_hash = models.CharField(max_length=64, primary_key=True)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    body = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.key_hash
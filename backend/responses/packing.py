@@ -0,0 +1,291 @@
+"""
+Компактное хранение ответов (Survey.answer_storage = "packed").
+
+Все ответы одного SurveyResponse кодируются в один blob по скомпилированной схеме опроса
+(surveys.schema.SurveySchema) вместо строк Answer и связей с вариантами:
+
+    версия (1 байт) | отпечаток схемы (uint32) | маска отвеченных вопросов
+    | для каждого отвеченного вопроса: набор битов вариантов, байт рейтинга или varint длины текста
+    | тексты ответов подряд в UTF-8
+
+Статистика считается пакетным декодированием blob'ов; счетчики по вопросам кэшируются
+и дополняются только новыми ответами. AnswerAdapter повторяет интерфейс Answer
+для кода, который читает ответы по одному.
+"""
+import struct
+
+from django.core.cache import cache
+
+from surveys.models import Question
+from surveys.schema import SurveySchema
+from .models import SurveyResponse
+
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<BI")
+TALLY_CACHE_TIMEOUT = 60 * 60 * 24
+DECODE_CHUNK_SIZE = 2000
+
+
+class PackingError(ValueError):
+    """Blob не соответствует формату или схеме опроса."""
+
+
+def _write_varint(buffer, value):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            buffer.append(byte | 0x80)
+        else:
+            buffer.append(byte)
+            return
+
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def encode_answers(schema, answers):
+    """
+    Кодирует ответы по схеме. answers - {question_id: {"choice_ids", "text_answer", "rating_value"}}
+    (отсутствующие ключи означают пустой ответ). Вопросы вне схемы - PackingError.
+    """
+    unknown = set(answers) - set(schema.by_question)
+    if unknown:
+        raise PackingError(f"Вопросы не из схемы опроса: {sorted(unknown)}")
+    mask = bytearray((len(schema.slots) + 7) // 8)
+    body = bytearray()
+    texts = []
+    for slot in schema.slots:
+        answer = answers.get(slot.question_id)
+        if answer is None:
+            continue
+        mask[slot.position // 8] |= 1 << (slot.position % 8)
+        if slot.has_choices:
+            bits = bytearray((len(slot.choice_ids) + 7) // 8)
+            for choice_id in answer.get("choice_ids") or []:
+                index = slot.choice_positions.get(choice_id)
+                if index is None:
+                    raise PackingError(f"Вариант {choice_id} не относится к вопросу {slot.question_id}")
+                bits[index // 8] |= 1 << (index % 8)
+            body += bits
+        elif slot.question_type == Question.TYPE_TEXT:
+            text = (answer.get("text_answer") or "").encode("utf-8")
+            _write_varint(body, len(text))
+            texts.append(text)
+        else:
+            body.append(answer.get("rating_value") or 0)
+    return HEADER.pack(FORMAT_VERSION, schema.fingerprint) + bytes(mask) + bytes(body) + b"".join(texts)
+
+
+def decode_answers(schema, blob):
+    """Декодирует blob: {question_id: {"choice_ids", "text_answer", "rating_value"}} в порядке схемы."""
+    data = bytes(blob)
+    version, fingerprint = HEADER.unpack_from(data)
+    if version != FORMAT_VERSION or fingerprint != schema.fingerprint:
+        raise PackingError("Ответ упакован по другой схеме опроса")
+    offset = HEADER.size
+    mask = data[offset:offset + (len(schema.slots) + 7) // 8]
+    offset += len(mask)
+    decoded = {}
+    text_slots = []
+    for slot in schema.slots:
+        if not mask[slot.position // 8] & (1 << (slot.position % 8)):
+            continue
+        if slot.has_choices:
+            size = (len(slot.choice_ids) + 7) // 8
+            bits = data[offset:offset + size]
+            offset += size
+            choice_ids = [choice_id for index, choice_id in enumerate(slot.choice_ids) if bits[index // 8] & (1 << (index % 8))]
+            decoded[slot.question_id] = {"choice_ids": choice_ids, "text_answer": "", "rating_value": None}
+        elif slot.question_type == Question.TYPE_TEXT:
+            length, offset = _read_varint(data, offset)
+            text_slots.append((slot.question_id, length))
+            decoded[slot.question_id] = {"choice_ids": [], "text_answer": "", "rating_value": None}
+        else:
+            decoded[slot.question_id] = {"choice_ids": [], "text_answer": "", "rating_value": data[offset] or None}
+            offset += 1
+    for question_id, length in text_slots:
+        decoded[question_id]["text_answer"] = data[offset:offset + length].decode("utf-8")
+        offset += length
+    return decoded
+
+
+class ChoiceList:
+    """Минимальная замена менеджера Answer.selected_choices для упакованных ответов."""
+
+    def __init__(self, choices):
+        self._choices = list(choices)
+
+    def all(self):
+        return list(self._choices)
+
+    def __iter__(self):
+        return iter(self._choices)
+
+    def __len__(self):
+        return len(self._choices)
+
+    def count(self):
+        return len(self._choices)
+
+    def exists(self):
+        return bool(self._choices)
+
+    def values_list(self, *fields, flat=False):
+        if flat:
+            return [getattr(choice, fields[0]) for choice in self._choices]
+        return [tuple(getattr(choice, field) for field in fields) for choice in self._choices]
+
+
+class AnswerAdapter:
+    """Упакованный ответ на вопрос с интерфейсом Answer (только чтение)."""
+
+    def __init__(self, response, question, text_answer="", rating_value=None, choices=()):
+        self.response = response
+        self.response_id = response.pk
+        self.question = question
+        self.question_id = question.pk
+        self.text_answer = text_answer
+        self.rating_value = rating_value
+        self.selected_choices = ChoiceList(choices)
+
+    def __str__(self):
+        return f"{self.question.text[:40]}"
+
+
+def adapt_answers(response, schema=None):
+    """Ответы SurveyResponse в упакованном виде как список AnswerAdapter в порядке вопросов."""
+    if not response.packed_answers:
+        return []
+    schema = schema or SurveySchema.for_survey(response.survey)
+    decoded = decode_answers(schema, response.packed_answers)
+    result = []
+    for slot in schema.slots:
+        answer = decoded.get(slot.question_id)
+        if answer is None:
+            continue
+        choices_by_id = {choice.id: choice for choice in slot.question.choices.all()}
+        result.append(
+            AnswerAdapter(
+                response,
+                slot.question,
+                answer["text_answer"],
+                answer["rating_value"],
+                [choices_by_id[choice_id] for choice_id in answer["choice_ids"]],
+            )
+        )
+    return result
+
+
+def _empty_tallies(schema):
+    questions = {}
+    for slot in schema.slots:
+        if slot.has_choices:
+            questions[slot.question_id] = [0] * len(slot.choice_ids)
+        elif slot.question_type == Question.TYPE_TEXT:
+            questions[slot.question_id] = []
+        else:
+            questions[slot.question_id] = [0] * 6
+    return {"last_pk": 0, "count": 0, "questions": questions}
+
+
+def _accumulate(schema, tallies, responses):
+    """Добавляет к счетчикам ответы (pk, blob), упорядоченные по pk."""
+    questions = tallies["questions"]
+    for pk, blob in responses:
+        tallies["last_pk"] = pk
+        tallies["count"] += 1
+        if not blob:
+            continue
+        for question_id, answer in decode_answers(schema, blob).items():
+            slot = schema.by_question[question_id]
+            if slot.has_choices:
+                counts = questions[question_id]
+                for choice_id in answer["choice_ids"]:
+                    counts[slot.choice_positions[choice_id]] += 1
+            elif slot.question_type == Question.TYPE_TEXT:
+                if answer["text_answer"]:
+                    questions[question_id].append(answer["text_answer"])
+            elif answer["rating_value"]:
+                questions[question_id][answer["rating_value"]] += 1
+
+
+def survey_tallies(survey, schema=None):
+    """
+    Счетчики по вопросам упакованного опроса. Берутся из кэша и дополняются только ответами
+    с pk больше обработанного; при расхождении с числом ответов пересчитываются целиком.
+    """
+    schema = schema or SurveySchema.for_survey(survey)
+    key = f"packed-tallies:{survey.pk}:{schema.fingerprint}"
+    tallies = cache.get(key) or _empty_tallies(schema)
+    responses = SurveyResponse.objects.filter(survey=survey).order_by("pk")
+    new_rows = responses.filter(pk__gt=tallies["last_pk"]).values_list("pk", "packed_answers")
+    _accumulate(schema, tallies, new_rows.iterator(chunk_size=DECODE_CHUNK_SIZE))
+    if tallies["count"] != responses.count():
+        # Часть ответов удалена - инкрементальные счетчики неверны
+        tallies = _empty_tallies(schema)
+        _accumulate(schema, tallies, responses.values_list("pk", "packed_answers").iterator(chunk_size=DECODE_CHUNK_SIZE))
+    cache.set(key, tallies, TALLY_CACHE_TIMEOUT)
+    return tallies
+
+
+def packed_statistics(survey):
+    """Статистика упакованного опроса в формате build_statistics_payload."""
+    schema = SurveySchema.for_survey(survey)
+    tallies = survey_tallies(survey, schema)
+    data = []
+    for slot in schema.slots:
+        question = slot.question
+        question_data = {"id": question.id, "text": question.text, "type": question.question_type}
+        counts = tallies["questions"][slot.question_id]
+        if slot.has_choices:
+            # Как и при хранении строками, варианты с одинаковой подписью суммируются
+            by_label = {}
+            for choice, count in zip(question.choices.all(), counts):
+                if count:
+                    by_label[choice.label] = by_label.get(choice.label, 0) + count
+            total = sum(by_label.values()) or 1
+            question_data["options"] = [
+                {"label": label, "count": count, "percentage": round(count / total * 100, 2)}
+                for label, count in by_label.items()
+            ]
+        elif slot.question_type == Question.TYPE_TEXT:
+            question_data["responses"] = list(counts)
+        else:
+            rated = sum(counts)
+            question_data["average"] = round(sum(rating * count for rating, count in enumerate(counts)) / rated, 2) if rated else 0
+            question_data["distribution"] = [
+                {"rating": rating, "count": count} for rating, count in enumerate(counts) if count
+            ]
+        data.append(question_data)
+    return {"questions": data, "total_responses": tallies["count"]}
+
+
+def packed_export_rows(survey):
+    """
+    Пары (вопрос, значение ответа) для экспорта упакованного опроса: по вопросам, внутри - по ответам,
+    как при хранении строками. Для каждого вопроса blob'ы читаются отдельным проходом порциями
+    по DECODE_CHUNK_SIZE, поэтому в памяти нет всех декодированных ответов опроса.
+    """
+    schema = SurveySchema.for_survey(survey)
+    blobs = SurveyResponse.objects.filter(survey=survey, packed_answers__isnull=False).order_by("pk")
+    for slot in schema.slots:
+        labels = {choice.id: choice.label for choice in slot.question.choices.all()}
+        for blob in blobs.values_list("packed_answers", flat=True).iterator(chunk_size=DECODE_CHUNK_SIZE):
+            answer = decode_answers(schema, blob).get(slot.question_id)
+            if answer is None:
+                continue
+            if slot.has_choices:
+                yield slot.question, ", ".join(labels[choice_id] for choice_id in answer["choice_ids"])
+            elif slot.question_type == Question.TYPE_TEXT:
+                yield slot.question, answer["text_answer"]
+            else:
+                yield slot.question, answer["rating_value"]
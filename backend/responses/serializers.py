@@ -1,7 +1,39 @@
 from rest_framework import serializers
 
 from surveys.models import Question, Choice, Survey
+from surveys.schema import SurveySchema
 from .models import SurveyResponse, Answer
+from .packing import encode_answers
+
+
+def check_answer(question: Question, attrs, available_choice_ids):
+    """Проверяет ответ на вопрос в зависимости от его типа. available_choice_ids нужны только при выбранных вариантах."""
+    q_type = question.question_type
+    selected = attrs.get("selected_choices")
+    text_answer = attrs.get("text_answer", "")
+    rating_value = attrs.get("rating_value")
+
+    if question.is_required:
+        if q_type in {Question.TYPE_SINGLE, Question.TYPE_MULTIPLE} and not selected:
+            raise serializers.ValidationError("Нужно выбрать хотя бы один вариант")
+        if q_type == Question.TYPE_TEXT and not text_answer.strip():
+            raise serializers.ValidationError("Ответ обязателен")
+        if q_type == Question.TYPE_RATING and rating_value is None:
+            raise serializers.ValidationError("Не выбран рейтинг")
+
+    if q_type == Question.TYPE_TEXT and text_answer and len(text_answer) > question.max_text_length:
+        raise serializers.ValidationError("Ответ превышает допустимую длину")
+
+    if q_type == Question.TYPE_RATING and rating_value is not None:
+        if rating_value < 1 or rating_value > 5:
+            raise serializers.ValidationError("Рейтинг должен быть от 1 до 5")
+
+    if selected:
+        invalid = set(selected) - set(available_choice_ids)
+        if invalid:
+            raise serializers.ValidationError("Выбран недопустимый вариант")
+        if q_type == Question.TYPE_SINGLE and len(selected) != 1:
+            raise serializers.ValidationError("Нужно выбрать ровно один вариант")
 
 
 class AnswerSerializer(serializers.Serializer):
@@ -13,33 +45,8 @@ class AnswerSerializer(serializers.Serializer):
 
     def validate(self, attrs):
         question: Question = attrs["question"]
-        q_type = question.question_type
-        selected = attrs.get("selected_choices")
-        text_answer = attrs.get("text_answer", "")
-        rating_value = attrs.get("rating_value")
-
-        if question.is_required:
-            if q_type in {Question.TYPE_SINGLE, Question.TYPE_MULTIPLE} and not selected:
-                raise serializers.ValidationError("Нужно выбрать хотя бы один вариант")
-            if q_type == Question.TYPE_TEXT and not text_answer.strip():
-                raise serializers.ValidationError("Ответ обязателен")
-            if q_type == Question.TYPE_RATING and rating_value is None:
-                raise serializers.ValidationError("Не выбран рейтинг")
-
-        if q_type == Question.TYPE_TEXT and text_answer and len(text_answer) > question.max_text_length:
-            raise serializers.ValidationError("Ответ превышает допустимую длину")
-
-        if q_type == Question.TYPE_RATING and rating_value is not None:
-            if rating_value < 1 or rating_value > 5:
-                raise serializers.ValidationError("Рейтинг должен быть от 1 до 5")
-
-        if selected:
-            available_ids = question.choices.values_list("id", flat=True)
-            invalid = set(selected) - set(available_ids)
-            if invalid:
-                raise serializers.ValidationError("Выбран недопустимый вариант")
-            if q_type == Question.TYPE_SINGLE and len(selected) != 1:
-                raise serializers.ValidationError("Нужно выбрать ровно один вариант")
+        available = question.choices.values_list("id", flat=True) if attrs.get("selected_choices") else ()
+        check_answer(question, attrs, available)
         return attrs
 
 
@@ -64,6 +71,7 @@ class SurveyResponseSerializer(serializers.Serializer):
         request = self.context["request"]
         survey = self.context["survey"]
         answers_data = validated_data["answers"]
+        packed = survey.answer_storage == Survey.STORAGE_PACKED
         response = SurveyResponse.objects.create(
             survey=survey,
             user=request.user if request.user.is_authenticated else None,
@@ -71,7 +79,10 @@ class SurveyResponseSerializer(serializers.Serializer):
             ip_address=request.META.get("REMOTE_ADDR"),
             user_agent=request.META.get("HTTP_USER_AGENT", "")[:500],
             duration_seconds=validated_data.get("duration_seconds") or 0,
+            packed_answers=self._pack(survey, answers_data) if packed else None,
         )
+        if packed:
+            return response
         for answer in answers_data:
             selected_choice_ids = answer.pop("selected_choices", [])
             answer_obj = Answer.objects.create(response=response, **answer)
@@ -80,3 +91,49 @@ class SurveyResponseSerializer(serializers.Serializer):
                 answer_obj.selected_choices.set(choices)
         return response
 
+    def _pack(self, survey, answers_data):
+        """Кодирует ответы одним blob'ом для опросов с компактным хранением."""
+        return pack_answers(SurveySchema.for_survey(survey), answers_data)
+
+
+def pack_answers(schema, answers_data):
+    """Кодирует проверенные ответы (validated_data["answers"]) по схеме опроса."""
+    return encode_answers(
+        schema,
+        {
+            answer["question"].id: {
+                "choice_ids": answer.get("selected_choices") or [],
+                "text_answer": answer.get("text_answer", ""),
+                "rating_value": answer.get("rating_value"),
+            }
+            for answer in answers_data
+        },
+    )
+
+
+class BatchAnswerSerializer(serializers.Serializer):
+    """Ответ на вопрос в пакетной отправке: вопрос и варианты проверяются по схеме опроса без запросов к БД."""
+    question = serializers.IntegerField()
+    selected_choices = serializers.ListField(child=serializers.IntegerField(), required=False)
+    text_answer = serializers.CharField(required=False, allow_blank=True)
+    rating_value = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        slot = self.context["schema"].by_question.get(attrs["question"])
+        if slot is None:
+            raise serializers.ValidationError("Некорректный вопрос")
+        attrs["question"] = slot.question
+        check_answer(slot.question, attrs, slot.choice_ids)
+        return attrs
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    """Один ответ на опрос в пакетной отправке (context["schema"] - SurveySchema опроса)."""
+    answers = BatchAnswerSerializer(many=True)
+    duration_seconds = serializers.IntegerField(required=False, min_value=0)
+
+    def validate(self, attrs):
+        answered = {answer["question"].id for answer in attrs["answers"]}
+        if any(slot.question.is_required and slot.question_id not in answered for slot in self.context["schema"].slots):
+            raise serializers.ValidationError("Заполнены не все обязательные вопросы")
+        return attrs
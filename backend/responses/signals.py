@@ -1,12 +1,17 @@
 from datetime import timedelta
 
 from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.dispatch import Signal, receiver
 from django.core.mail import send_mail
+from django.db import transaction
 from django.utils import timezone
 
 from .models import SurveyResponse
 from notifications.models import Notification, NotificationRule
+from surveys import etags
+
+# Пакет ответов сохранен bulk_create без post_save (responses.batch): survey, responses
+responses_batch_created = Signal()
 
 
 @receiver(post_save, sender=SurveyResponse)
@@ -17,7 +22,19 @@ def on_response_created(sender, instance: SurveyResponse, created, **kwargs):
     """
     if not created:
         return
-    survey = instance.survey
+    etags.bump("responses", instance.survey_id)
+    notify_new_responses(instance.survey)
+
+
+@receiver(responses_batch_created)
+def on_responses_batch_created(sender, survey, responses, **kwargs):
+    """Сигнал: уведомления по пакету ответов проверяются один раз на пакет, после фиксации транзакции пакета."""
+    etags.bump("responses", survey.pk)
+    transaction.on_commit(lambda: notify_new_responses(survey))
+
+
+def notify_new_responses(survey):
+    """Отправляет уведомления при достижении порога ответов и предупреждает о скором окончании опроса."""
     total = survey.responses.count()
 
     for rule in survey.notification_rules.all():
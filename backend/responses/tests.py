@@ -1,12 +1,33 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from analytics.models import SurveyVoteTally
+from config import urls as config_urls
+from notifications.models import Notification, NotificationRule
 from surveys.models import Survey, Question, Choice
-from .models import SurveyResponse, Answer
-from .views import build_statistics_payload
+from .archive import archive_survey, restore_survey
+from .idempotency import purge_expired
+from .models import SurveyResponse, Answer, SurveyArchive, IdempotencyKey
+from .packing import PackingError, decode_answers, encode_answers
+from .throttling import take_tokens
+from surveys.schema import SurveySchema
+from .views import (
+    AsyncSubmitResponseAPIView,
+    AsyncSurveyStatisticsAPIView,
+    SubmitResponseAPIView,
+    build_statistics_payload,
+)
 
 User = get_user_model()
 
@@ -272,3 +293,672 @@ class SurveyResponseTest(TestCase):
         rating_stats = next(q for q in stats["questions"] if q["type"] == Question.TYPE_RATING)
         self.assertEqual(rating_stats["average"], 4.5)  # (5 + 4) / 2
         self.assertEqual(len(rating_stats["distribution"]), 2)
+
+    def test_json_export_uses_content_negotiation(self):
+        """Тест: JSON экспорт совпадает со статистикой и отдается выбранным renderer"""
+        self.client.force_authenticate(user=self.user)
+        url = f"/responses/api/{self.survey.slug}/export/json/"
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.json(), build_statistics_payload(self.survey))
+
+        response = self.client.get(url, HTTP_ACCEPT="text/html")
+        self.assertEqual(response["Content-Type"], "text/html; charset=utf-8")
+
+
+class SurveyArchiveTest(TestCase):
+    """Тесты для архивации закрытых опросов."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="archiver",
+            email="archiver@example.com",
+            password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.survey = Survey.objects.create(
+            author=self.user,
+            title="Archived Survey",
+            status=Survey.STATUS_CLOSED
+        )
+        self.multiple_question = Question.objects.create(
+            survey=self.survey, text="Multiple?", question_type=Question.TYPE_MULTIPLE, order=0
+        )
+        self.choice_b = Choice.objects.create(question=self.multiple_question, label="B", order=1)
+        self.choice_a = Choice.objects.create(question=self.multiple_question, label="A", order=0)
+        self.text_question = Question.objects.create(
+            survey=self.survey, text="Text?", question_type=Question.TYPE_TEXT, order=1
+        )
+        self.rating_question = Question.objects.create(
+            survey=self.survey, text="Rating?", question_type=Question.TYPE_RATING, order=2
+        )
+        for index in range(3):
+            survey_response = SurveyResponse.objects.create(survey=self.survey)
+            Answer.objects.create(
+                response=survey_response, question=self.multiple_question
+            ).selected_choices.add(self.choice_b, self.choice_a)
+            Answer.objects.create(response=survey_response, question=self.text_question, text_answer=f"Text, {index}")
+            Answer.objects.create(response=survey_response, question=self.rating_question, rating_value=index + 3)
+
+    def get_stats_and_csv(self):
+        stats = self.client.get(f"/responses/api/{self.survey.slug}/stats/").json()
+        csv_content = b"".join(self.client.get(f"/responses/api/{self.survey.slug}/export/csv/").streaming_content)
+        return stats, csv_content
+
+    def test_archive_moves_answers_and_serves_same_results(self):
+        """Тест: после архивации ответы уходят из горячих таблиц, статистика и CSV не меняются"""
+        stats_before, csv_before = self.get_stats_and_csv()
+
+        archive = archive_survey(self.survey)
+
+        self.assertEqual(archive.answer_count, 9)
+        self.assertEqual(Answer.objects.filter(response__survey=self.survey).count(), 0)
+        self.assertEqual(Answer.selected_choices.through.objects.count(), 0)
+        self.assertEqual(SurveyResponse.objects.filter(survey=self.survey).count(), 3)
+        self.assertEqual(self.get_stats_and_csv(), (stats_before, csv_before))
+        self.assertIn(b"A, B", csv_before)
+        self.assertFalse(self.survey.is_editable)
+
+    @override_settings(REPLICA_DATABASE_ALIAS="replica")
+    def test_archive_freezes_statistics_from_primary(self):
+        """Тест: при настроенной реплике статистика архива читается с основной БД (реплики в тесте нет)"""
+        archive = archive_survey(self.survey)
+
+        self.assertEqual(archive.total_responses, 3)
+        self.assertEqual(archive.statistics["questions"][2]["average"], 4.0)
+
+    def test_restore_returns_answers(self):
+        """Тест: восстановление возвращает ответы с исходными id и удаляет архив"""
+        answer_ids = sorted(Answer.objects.values_list("id", flat=True))
+        _, csv_before = self.get_stats_and_csv()
+        archive_survey(self.survey)
+
+        self.assertEqual(restore_survey(self.survey), 9)
+
+        self.assertFalse(SurveyArchive.objects.exists())
+        self.assertEqual(sorted(Answer.objects.values_list("id", flat=True)), answer_ids)
+        self.assertEqual(Answer.selected_choices.through.objects.count(), 6)
+        self.assertEqual(self.get_stats_and_csv()[1], csv_before)
+
+    def test_archived_survey_cannot_be_reopened_or_receive_votes(self):
+        """Тест: архивный опрос нельзя открыть заново, а голоса в него отклоняются до восстановления"""
+        archive_survey(self.survey)
+        url = f"/api/surveys/{self.survey.slug}/"
+
+        self.client.patch(url, {"status": Survey.STATUS_ACTIVE}, format="json")
+        self.survey.refresh_from_db()
+        self.assertEqual(self.survey.status, Survey.STATUS_CLOSED)
+
+        # Статус, измененный в обход API (админка, скрипт), не открывает прием голосов
+        Survey.objects.filter(pk=self.survey.pk).update(status=Survey.STATUS_ACTIVE)
+        answers = {
+            "answers": [
+                {"question": self.multiple_question.id, "selected_choices": [self.choice_a.id]},
+                {"question": self.text_question.id, "text_answer": "new"},
+                {"question": self.rating_question.id, "rating_value": 5},
+            ]
+        }
+        submit = APIClient().post(f"/responses/api/{self.survey.slug}/submit/", answers, format="json")
+        batch = self.client.post(f"/responses/api/{self.survey.slug}/submit-batch/", {"responses": [answers]}, format="json")
+        self.assertEqual((submit.status_code, batch.status_code), (status.HTTP_400_BAD_REQUEST, status.HTTP_400_BAD_REQUEST))
+        self.assertEqual(SurveyResponse.objects.filter(survey=self.survey).count(), 3)
+
+        restore_survey(self.survey)
+        submit = APIClient().post(f"/responses/api/{self.survey.slug}/submit/", answers, format="json")
+        self.assertEqual(submit.status_code, status.HTTP_201_CREATED)
+
+    def test_archive_check_adds_no_queries(self):
+        """Тест: флаг архива запоминается на опросе, голосование получает его в запросе опроса"""
+        with self.assertNumQueries(1):
+            self.assertFalse(self.survey.is_archived)
+            self.assertFalse(self.survey.is_archived)
+
+        Survey.objects.filter(pk=self.survey.pk).update(status=Survey.STATUS_ACTIVE)
+        answers = {"answers": [{"question": self.rating_question.id, "rating_value": 5}]}
+        with CaptureQueriesContext(connection) as queries:
+            APIClient().post(f"/responses/api/{self.survey.slug}/submit/", answers, format="json")
+        archive_queries = [query["sql"] for query in queries.captured_queries if "surveyarchive" in query["sql"]]
+        self.assertEqual(len(archive_queries), 1)
+        self.assertIn("EXISTS", archive_queries[0])
+
+    def test_only_closed_surveys_are_archived(self):
+        """Тест: активный опрос не архивируется, повторная архивация запрещена"""
+        active = Survey.objects.create(author=self.user, title="Active", status=Survey.STATUS_ACTIVE)
+        with self.assertRaises(ValueError):
+            archive_survey(active)
+
+        archive_survey(self.survey)
+        with self.assertRaises(ValueError):
+            archive_survey(self.survey)
+
+
+class PackedAnswerStorageTest(TestCase):
+    """Тесты для компактного хранения ответов."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username="packer",
+            email="packer@example.com",
+            password="testpass123"
+        )
+        self.client = APIClient()
+        self.rows_survey = self.create_survey(Survey.STORAGE_ROWS)
+        self.packed_survey = self.create_survey(Survey.STORAGE_PACKED)
+
+    def create_survey(self, storage):
+        survey = Survey.objects.create(
+            author=self.author, title="Packed", status=Survey.STATUS_ACTIVE, answer_storage=storage
+        )
+        multiple = Question.objects.create(survey=survey, text="Multiple?", question_type=Question.TYPE_MULTIPLE, order=0)
+        for index in range(10):
+            Choice.objects.create(question=multiple, label=f"Option {index}", order=index)
+        Question.objects.create(survey=survey, text="Text?", question_type=Question.TYPE_TEXT, order=1, is_required=False)
+        Question.objects.create(survey=survey, text="Rating?", question_type=Question.TYPE_RATING, order=2)
+        return survey
+
+    def vote(self, survey, choice_positions, text, rating):
+        multiple, text_question, rating_question = survey.questions.all()
+        choices = list(multiple.choices.all())
+        data = {
+            "answers": [
+                {"question": multiple.id, "selected_choices": [choices[position].id for position in choice_positions]},
+                {"question": text_question.id, "text_answer": text},
+                {"question": rating_question.id, "rating_value": rating},
+            ]
+        }
+        response = self.client.post(f"/responses/api/{survey.slug}/submit/", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def vote_both(self, *args):
+        self.vote(self.rows_survey, *args)
+        self.vote(self.packed_survey, *args)
+
+    def results(self, survey):
+        """Статистика (без id вопросов, с упорядоченными вариантами) и CSV экспорт опроса."""
+        self.client.force_authenticate(user=self.author)
+        stats = self.client.get(f"/responses/api/{survey.slug}/stats/").json()
+        csv_content = b"".join(self.client.get(f"/responses/api/{survey.slug}/export/csv/").streaming_content)
+        self.client.force_authenticate(user=None)
+        for question in stats["questions"]:
+            question.pop("id")
+            # При хранении строками порядок вариантов и оценок зависит от порядка ответов
+            question.get("options", []).sort(key=lambda option: option["label"])
+            question.get("distribution", []).sort(key=lambda item: item["rating"])
+        return stats, csv_content
+
+    def test_encode_decode_roundtrip(self):
+        """Тест: blob декодируется обратно без потерь, чужая схема отвергается"""
+        schema = SurveySchema.for_survey(self.packed_survey)
+        multiple, text_question, rating_question = self.packed_survey.questions.all()
+        choice_ids = [choice.id for choice in multiple.choices.all()]
+        answers = {
+            multiple.id: {"choice_ids": [choice_ids[0], choice_ids[9]], "text_answer": "", "rating_value": None},
+            text_question.id: {"choice_ids": [], "text_answer": "Привет, мир", "rating_value": None},
+        }
+        blob = encode_answers(schema, answers)
+
+        self.assertEqual(decode_answers(schema, blob), answers)
+        self.assertLess(len(blob), 30)
+        with self.assertRaises(PackingError):
+            decode_answers(SurveySchema.for_survey(self.rows_survey), blob)
+
+    def test_packed_survey_matches_row_storage(self):
+        """Тест: статистика и экспорт упакованного опроса совпадают с хранением строками"""
+        self.vote_both([0, 9], "First", 5)
+        self.vote_both([0], "", 3)
+        self.vote_both([1, 2, 9], "Третий", 4)
+
+        self.assertEqual(Answer.objects.filter(response__survey=self.packed_survey).count(), 0)
+        self.assertEqual(self.results(self.packed_survey), self.results(self.rows_survey))
+
+    def test_export_matches_row_storage_across_decode_chunks(self):
+        """Тест: ответов больше DECODE_CHUNK_SIZE - CSV упакованного опроса по-прежнему сгруппирован по вопросам"""
+        for index in range(5):
+            self.vote_both([index], f"Text {index}", index + 1)
+
+        with mock.patch("responses.packing.DECODE_CHUNK_SIZE", 2):
+            packed_csv = self.results(self.packed_survey)[1]
+        rows_csv = self.results(self.rows_survey)[1]
+
+        self.assertEqual(packed_csv, rows_csv)
+        questions = [line.split(",")[0] for line in packed_csv.decode().splitlines()[1:]]
+        self.assertEqual(questions, ["Multiple?"] * 5 + ["Text?"] * 5 + ["Rating?"] * 5)
+
+    def test_tallies_are_updated_incrementally(self):
+        """Тест: кэшированные счетчики учитывают новые и удаленные ответы"""
+        self.vote(self.packed_survey, [0], "One", 5)
+        self.assertEqual(self.results(self.packed_survey)[0]["total_responses"], 1)
+
+        self.vote(self.packed_survey, [0, 1], "Two", 1)
+        stats = self.results(self.packed_survey)[0]
+        self.assertEqual(stats["total_responses"], 2)
+        self.assertEqual(stats["questions"][0]["options"][0], {"label": "Option 0", "count": 2, "percentage": 66.67})
+        self.assertEqual(stats["questions"][1]["responses"], ["One", "Two"])
+
+        SurveyResponse.objects.filter(survey=self.packed_survey).first().delete()
+        self.assertEqual(self.results(self.packed_survey)[0]["total_responses"], 1)
+
+    def test_answer_adapter(self):
+        """Тест: answer_list отдает упакованные ответы с интерфейсом Answer"""
+        self.vote(self.packed_survey, [2, 3], "Adapter", 4)
+        survey_response = SurveyResponse.objects.get(survey=self.packed_survey)
+
+        answers = survey_response.answer_list()
+
+        self.assertEqual([answer.question.text for answer in answers], ["Multiple?", "Text?", "Rating?"])
+        self.assertEqual(list(answers[0].selected_choices.values_list("label", flat=True)), ["Option 2", "Option 3"])
+        self.assertEqual(answers[1].text_answer, "Adapter")
+        self.assertEqual(answers[2].rating_value, 4)
+
+
+@override_settings(
+    VOTE_THROTTLE_ENABLED=True,
+    VOTE_THROTTLE_BUCKETS={
+        "client": {"capacity": 2, "refill_seconds": 60},
+        "ip": {"capacity": 3, "refill_seconds": 60},
+        "survey": {"capacity": 100, "refill_seconds": 1},
+    },
+)
+class VoteThrottleTest(TestCase):
+    """Тесты для ограничения частоты анонимных голосов."""
+
+    def setUp(self):
+        caches["throttle"].clear()
+        self.user = User.objects.create_user(
+            username="throttled",
+            email="throttled@example.com",
+            password="testpass123"
+        )
+        self.client = APIClient()
+        self.survey = Survey.objects.create(author=self.user, title="Hot Survey", status=Survey.STATUS_ACTIVE)
+        self.question = Question.objects.create(
+            survey=self.survey, text="Rating?", question_type=Question.TYPE_RATING, is_required=True
+        )
+        self.url = f"/responses/api/{self.survey.slug}/submit/"
+
+    def submit(self, client=None, **extra):
+        data = {"answers": [{"question": self.question.id, "rating_value": 5}]}
+        return (client or self.client).post(self.url, data, format="json", **extra)
+
+    def test_anonymous_client_is_limited_before_validation(self):
+        """Тест: после исчерпания корзины клиента - 429 без создания ответа, даже с неверным телом"""
+        self.assertEqual(self.submit().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.submit().status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post(self.url, {"answers": "broken"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(SurveyResponse.objects.count(), 2)
+
+    def test_cookie_and_user_agent_split_clients_but_ip_bucket_applies(self):
+        """Тест: другой браузер с того же IP получает свою корзину, но общий лимит IP действует"""
+        self.submit()
+        self.submit()
+        other_browser = APIClient(HTTP_USER_AGENT="Other")
+        self.assertEqual(self.submit(other_browser).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.submit(other_browser).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_public_page_issues_voter_cookie(self):
+        """Тест: публичная страница опроса выдает cookie, разделяющую клиентов с одинаковым IP и User-Agent"""
+        self.submit()
+        self.submit()
+        browser = APIClient()
+        browser.get(f"/surveys/public/{self.survey.slug}/")
+        self.assertIn(settings.VOTE_THROTTLE_COOKIE, browser.cookies)
+        self.assertEqual(self.submit(browser).status_code, status.HTTP_201_CREATED)
+
+    def test_authenticated_users_are_not_throttled(self):
+        """Тест: авторизованные пользователи проверяются на дубликаты, а не ограничением частоты"""
+        self.client.force_authenticate(user=self.user)
+        for _ in range(4):
+            response = self.submit()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rejected_request_does_not_drain_other_buckets(self):
+        """Тест: отказ последней корзины не забирает токены у предыдущих"""
+        buckets = {"client": ("test:client", 2, 60), "survey": ("test:survey", 1, 60)}
+        self.assertEqual(take_tokens(buckets, now=0), (None, 0))
+
+        rejected, wait = take_tokens(buckets, now=1)
+        self.assertEqual(rejected, "survey")
+        self.assertAlmostEqual(wait, 59)
+
+        # Второй токен клиента остался: его можно забрать, третьего уже нет
+        self.assertEqual(take_tokens({"client": buckets["client"]}, now=1), (None, 0))
+        self.assertEqual(take_tokens({"client": buckets["client"]}, now=1)[0], "client")
+
+    def test_counters_are_exposed_to_staff(self):
+        """Тест: счетчики доступны только staff"""
+        for _ in range(3):
+            self.submit()
+        self.assertEqual(self.client.get("/responses/api/throttle-stats/").status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+        counters = self.client.get("/responses/api/throttle-stats/").json()["counters"]
+
+        self.assertEqual(counters["client"], {"allowed": 2, "throttled": 1})
+        self.assertEqual(counters["survey"]["allowed"], 2)
+
+
+class IdempotentSubmitTest(TestCase):
+    """Тесты для повторной отправки ответа с заголовком Idempotency-Key."""
+
+    def setUp(self):
+        caches["throttle"].clear()
+        self.user = User.objects.create_user(
+            username="retrier",
+            email="retrier@example.com",
+            password="testpass123"
+        )
+        self.client = APIClient()
+        self.survey = Survey.objects.create(author=self.user, title="Retry Survey", status=Survey.STATUS_ACTIVE)
+        self.question = Question.objects.create(
+            survey=self.survey, text="Rating?", question_type=Question.TYPE_RATING, is_required=True
+        )
+        self.url = f"/responses/api/{self.survey.slug}/submit/"
+
+    def submit(self, key, rating=5, client=None):
+        data = {"answers": [{"question": self.question.id, "rating_value": rating}]}
+        return (client or self.client).post(self.url, data, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_anonymous_retry_replays_response(self):
+        """Тест: повтор анонимного запроса с тем же ключом не создает второй ответ"""
+        first = self.submit("retry-1")
+        second = self.submit("retry-1")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(SurveyResponse.objects.count(), 1)
+        self.assertEqual(self.submit("retry-2").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SurveyResponse.objects.count(), 2)
+
+    def test_authenticated_retry_is_replayed_instead_of_duplicate_error(self):
+        """Тест: повтор авторизованного запроса получает исходный ответ, а не ошибку дубликата"""
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.submit("retry-1").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.submit("retry-1").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.submit("retry-2").status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_key_reused_with_other_body_is_rejected(self):
+        """Тест: тот же ключ с другим телом запроса - 422"""
+        self.submit("retry-1", rating=5)
+        response = self.submit("retry-1", rating=3)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(SurveyResponse.objects.count(), 1)
+
+    def test_keys_are_scoped_to_sender(self):
+        """Тест: одинаковый ключ разных пользователей не пересекается"""
+        other = User.objects.create_user(username="other", email="other@example.com", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+        self.submit("retry-1")
+        other_client = APIClient()
+        other_client.force_authenticate(user=other)
+        response = self.submit("retry-1", client=other_client)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(SurveyResponse.objects.count(), 2)
+
+    def test_concurrent_duplicate_vote_returns_400(self):
+        """Тест: IntegrityError от параллельного голоса того же пользователя превращается в 400, а не 500"""
+        self.client.force_authenticate(user=self.user)
+        self.submit("retry-1")
+        # Проверка дубликата уже пройдена параллельным запросом
+        with mock.patch.object(SubmitResponseAPIView, "_is_duplicate_vote", return_value=False):
+            response = self.submit("retry-2")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    @override_settings(IDEMPOTENCY_KEY_TTL=60)
+    def test_expired_keys_are_not_replayed_and_purged(self):
+        """Тест: просроченный ключ не повторяется и удаляется purge_expired"""
+        self.submit("retry-1")
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(seconds=120))
+
+        response = self.submit("retry-1")
+
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(SurveyResponse.objects.count(), 2)
+        IdempotencyKey.objects.create(key_hash="0" * 64, request_hash="", status_code=201, body={})
+        IdempotencyKey.objects.filter(key_hash="0" * 64).update(created_at=timezone.now() - timedelta(seconds=120))
+        self.assertEqual(purge_expired(batch_size=1), 1)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+
+class SubmitBatchTest(TestCase):
+    """Тесты для пакетной отправки ответов."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="kiosk",
+            email="kiosk@example.com",
+            password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.survey = Survey.objects.create(author=self.user, title="Kiosk Survey", status=Survey.STATUS_ACTIVE)
+        self.single = Question.objects.create(
+            survey=self.survey, text="Color?", question_type=Question.TYPE_SINGLE, is_required=True
+        )
+        self.red = Choice.objects.create(question=self.single, label="Red")
+        self.blue = Choice.objects.create(question=self.single, label="Blue")
+        self.rating = Question.objects.create(
+            survey=self.survey, text="Rating?", question_type=Question.TYPE_RATING, is_required=False
+        )
+        self.url = f"/responses/api/{self.survey.slug}/submit-batch/"
+
+    def item(self, choice=None, rating=4):
+        return {
+            "answers": [
+                {"question": self.single.id, "selected_choices": [(choice or self.red).id]},
+                {"question": self.rating.id, "rating_value": rating},
+            ]
+        }
+
+    def post(self, items, **extra):
+        return self.client.post(self.url, {"responses": items}, format="json", **extra)
+
+    def test_batch_is_saved_with_answers(self):
+        """Тест: пакет сохраняет ответы с вариантами, статистика совпадает с поштучной отправкой"""
+        response = self.post([self.item(), self.item(self.blue, 2), self.item()])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json(), {"created": 3, "errors": []})
+        self.assertEqual(SurveyResponse.objects.filter(survey=self.survey, user__isnull=True).count(), 3)
+        stats = build_statistics_payload(self.survey)
+        self.assertEqual({o["label"]: o["count"] for o in stats["questions"][0]["options"]}, {"Red": 2, "Blue": 1})
+        self.assertEqual(stats["questions"][1]["average"], 3.33)
+
+    def test_invalid_items_are_reported_by_index(self):
+        """Тест: некорректные элементы возвращаются с индексами, корректные сохраняются"""
+        missing_required = {"answers": [{"question": self.rating.id, "rating_value": 3}]}
+        foreign_choice = self.item(choice=Choice(id=999999))
+        response = self.post([self.item(), missing_required, foreign_choice, self.item(rating=9)])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        body = response.json()
+        self.assertEqual(body["created"], 1)
+        self.assertEqual([error["index"] for error in body["errors"]], [1, 2, 3])
+        self.assertEqual(SurveyResponse.objects.count(), 1)
+
+        response = self.post([missing_required])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        """Тест: число запросов не зависит от размера пакета"""
+        self.post([self.item()])  # строки агрегатов создаются первым голосом
+        with CaptureQueriesContext(connection) as small:
+            self.post([self.item()] * 2)
+        with CaptureQueriesContext(connection) as large:
+            self.post([self.item()] * 40)
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+        self.assertEqual(SurveyResponse.objects.count(), 43)
+
+    def test_rollups_and_notifications_run_once_per_batch(self):
+        """Тест: агрегаты учитывают весь пакет в его транзакции, уведомление о пороге - один раз после фиксации"""
+        NotificationRule.objects.create(survey=self.survey, threshold=3, email="author@example.com")
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.post([self.item()] * 5)
+        self.assertEqual(SurveyVoteTally.objects.get(survey=self.survey).votes, 5)
+        self.assertFalse(Notification.objects.exists())
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(Notification.objects.filter(rule__survey=self.survey).count(), 1)
+
+    def test_rollup_failure_rolls_back_batch(self):
+        """Тест: ошибка обновления агрегатов откатывает пакет, а не оставляет голоса без учета"""
+        with mock.patch("analytics.signals.record_activity", side_effect=RuntimeError("rollup")):
+            with self.assertRaises(RuntimeError):
+                self.post([self.item()] * 2)
+
+        self.assertFalse(SurveyResponse.objects.filter(survey=self.survey).exists())
+
+    def test_packed_survey_batch(self):
+        """Тест: пакет для опроса с компактным хранением сохраняется blob'ами"""
+        self.survey.answer_storage = Survey.STORAGE_PACKED
+        self.survey.save()
+        self.post([self.item(), self.item(self.blue, 5)])
+
+        self.assertFalse(Answer.objects.exists())
+        stats = build_statistics_payload(self.survey)
+        self.assertEqual(stats["total_responses"], 2)
+        self.assertEqual(stats["questions"][1]["average"], 4.5)
+
+    def test_only_author_or_staff_can_submit_batch(self):
+        """Тест: пакетная отправка доступна только автору опроса и staff"""
+        other = User.objects.create_user(username="stranger", email="stranger@example.com", password="testpass123")
+        client = APIClient()
+        client.force_authenticate(user=other)
+        response = client.post(self.url, {"responses": [self.item()]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.post([]).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_retry_with_idempotency_key_is_replayed(self):
+        """Тест: повтор пакета с тем же Idempotency-Key не создает ответы заново"""
+        self.post([self.item()] * 3, HTTP_IDEMPOTENCY_KEY="upload-1")
+        response = self.post([self.item()] * 3, HTTP_IDEMPOTENCY_KEY="upload-1")
+
+        self.assertEqual(response["Idempotent-Replayed"], "true")
+        self.assertEqual(SurveyResponse.objects.count(), 3)
+
+
+class StatisticsConditionalTest(TestCase):
+    """Тесты для ETag статистики опроса."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="dashboard",
+            email="dashboard@example.com",
+            password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.survey = Survey.objects.create(author=self.user, title="Stats Survey", status=Survey.STATUS_ACTIVE)
+        self.question = Question.objects.create(
+            survey=self.survey, text="Rating?", question_type=Question.TYPE_RATING, is_required=True
+        )
+        self.url = f"/responses/api/{self.survey.slug}/stats/"
+
+    def test_unchanged_stats_return_304_before_computation(self):
+        """Тест: статистика без новых ответов отдается как 304 без подсчета"""
+        etag = self.client.get(self.url)["ETag"]
+        with mock.patch("responses.views.build_statistics_payload") as build:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        build.assert_not_called()
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_vote_changes_etag_only_after_commit(self):
+        """Тест: версия статистики меняется после фиксации транзакции голоса, а не при сохранении строки"""
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            SurveyResponse.objects.create(survey=self.survey)
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertTrue(callbacks)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_new_vote_changes_stats_etag(self):
+        """Тест: новый голос (одиночный или пакетом) меняет ETag статистики"""
+        etag = self.client.get(self.url)["ETag"]
+        # Версия меняется после фиксации транзакции голоса
+        with self.captureOnCommitCallbacks(execute=True):
+            APIClient().post(
+                f"/responses/api/{self.survey.slug}/submit/",
+                {"answers": [{"question": self.question.id, "rating_value": 4}]},
+                format="json",
+            )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["total_responses"], 1)
+
+        etag = response["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f"/responses/api/{self.survey.slug}/submit-batch/",
+                {"responses": [{"answers": [{"question": self.question.id, "rating_value": 2}]}]},
+                format="json",
+            )
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class AsyncURLConf:
+    """URLconf как под config.asgi: голосование и статистика - async-представления."""
+    urlpatterns = [
+        path("responses/api/<slug:slug>/submit/", AsyncSubmitResponseAPIView.as_view()),
+        path("responses/api/<slug:slug>/stats/", AsyncSurveyStatisticsAPIView.as_view()),
+        *config_urls.urlpatterns,
+    ]
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncSurveyResponseTest(SurveyResponseTest):
+    """Тесты SurveyResponseTest для AsyncSubmitResponseAPIView."""
+
+    async def test_submit_through_async_middleware(self):
+        """Тест: голос через ASGI-цепочку middleware без синхронных звеньев"""
+        response = await self.async_client.post(
+            f"/responses/api/{self.survey.slug}/submit/",
+            {
+                "answers": [
+                    {"question": self.single_question.id, "selected_choices": [self.choice2.id]},
+                    {"question": self.text_question.id, "text_answer": "async"},
+                    {"question": self.rating_question.id, "rating_value": 5},
+                ]
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(await SurveyResponse.objects.filter(survey=self.survey).aexists())
+
+        response = await self.async_client.get(f"/responses/api/{self.survey.slug}/stats/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncSurveyArchiveTest(SurveyArchiveTest):
+    """Тесты SurveyArchiveTest для async-представлений голосования и статистики."""
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncVoteThrottleTest(VoteThrottleTest):
+    """Тесты VoteThrottleTest для AsyncSubmitResponseAPIView."""
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncStatisticsConditionalTest(StatisticsConditionalTest):
+    """Тесты StatisticsConditionalTest для AsyncSurveyStatisticsAPIView."""
+
+    def test_async_view_is_coroutine(self):
+        """Тест: представления размечены как async и не требуют потока у Django"""
+        self.assertTrue(AsyncSubmitResponseAPIView.view_is_async)
+        self.assertTrue(AsyncSurveyStatisticsAPIView.view_is_async)
+
@@ -0,0 +1,115 @@
+"""
+Ограничение частоты анонимных голосов (token bucket).
+
+Корзины хранятся в кэше "throttle" (см. CACHES и VOTE_THROTTLE_BUCKETS в settings): одно чтение
+всех корзин и по одной записи на корзину, без обращений к БД. Токены забираются, только если их дают
+все корзины: отказ одной корзины не расходует остальные. Проверка выполняется DRF до разбора тела
+запроса и сериализатора, поэтому отказ (429) стоит дешево. Счетчики пропущенных и отклоненных
+запросов по корзинам доступны через vote_throttle_counters().
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+CACHE_ALIAS = "throttle"
+KEY_PREFIX = "vote-throttle"
+
+# Чтение и запись корзины в локальном кэше должны быть атомарны относительно потоков процесса
+_lock = threading.Lock()
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def take_tokens(buckets, now=None):
+    """
+    Забирает по токену из каждой корзины buckets ({scope: (ключ, capacity, refill_seconds)}), если все
+    они разрешают запрос. Возвращает (None, 0) или (первая отказавшая корзина, секунд до ее токена).
+    """
+    now = time.time() if now is None else now
+    store = _cache()
+    with _lock:
+        stored = store.get_many([key for key, _, _ in buckets.values()])
+        levels = {}
+        for scope, (key, capacity, refill_seconds) in buckets.items():
+            tokens, stamp = stored.get(key) or (capacity, now)
+            tokens = min(capacity, tokens + (now - stamp) / refill_seconds)
+            if tokens < 1:
+                # Ничего не записывается: уровень корзины вычисляется заново при следующем запросе
+                return scope, (1 - tokens) * refill_seconds
+            levels[scope] = tokens
+        for scope, (key, capacity, refill_seconds) in buckets.items():
+            # Через capacity * refill_seconds корзина снова полна - запись можно забыть
+            store.set(key, (levels[scope] - 1, now), timeout=math.ceil(capacity * refill_seconds) + 1)
+    return None, 0
+
+
+def _count(scope, outcome):
+    store = _cache()
+    key = f"{KEY_PREFIX}:counter:{scope}:{outcome}"
+    if not store.add(key, 1, timeout=None):
+        try:
+            store.incr(key)
+        except ValueError:
+            store.set(key, 1, timeout=None)
+
+
+def vote_throttle_counters():
+    """Счетчики {корзина: {"allowed": n, "throttled": m}} для мониторинга."""
+    store = _cache()
+    keys = {
+        f"{KEY_PREFIX}:counter:{scope}:{outcome}": (scope, outcome)
+        for scope in settings.VOTE_THROTTLE_BUCKETS
+        for outcome in ("allowed", "throttled")
+    }
+    values = store.get_many(list(keys))
+    counters = {scope: {"allowed": 0, "throttled": 0} for scope in settings.VOTE_THROTTLE_BUCKETS}
+    for key, (scope, outcome) in keys.items():
+        counters[scope][outcome] = values.get(key, 0)
+    return counters
+
+
+class AnonymousVoteThrottle(BaseThrottle):
+    """Token bucket для анонимных голосов по клиенту в опросе, по IP и по опросу."""
+
+    def bucket_keys(self, request, view):
+        """Ключи корзин в порядке проверки: самые строгие - первыми."""
+        ident = self.get_ident(request)
+        slug = view.kwargs.get("slug", "")
+        client = "|".join(
+            [ident, request.META.get("HTTP_USER_AGENT", ""), request.COOKIES.get(settings.VOTE_THROTTLE_COOKIE, "")]
+        )
+        client_hash = hashlib.sha1(client.encode("utf-8")).hexdigest()[:20]
+        return {
+            "client": f"{KEY_PREFIX}:client:{slug}:{client_hash}",
+            "ip": f"{KEY_PREFIX}:ip:{ident}",
+            "survey": f"{KEY_PREFIX}:survey:{slug}",
+        }
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        if not settings.VOTE_THROTTLE_ENABLED or request.user.is_authenticated:
+            return True
+        keys = self.bucket_keys(request, view)
+        rejected, wait = take_tokens(
+            {
+                scope: (keys[scope], bucket["capacity"], bucket["refill_seconds"])
+                for scope, bucket in settings.VOTE_THROTTLE_BUCKETS.items()
+            }
+        )
+        if rejected is not None:
+            self.retry_after = wait
+            _count(rejected, "throttled")
+            return False
+        for scope in settings.VOTE_THROTTLE_BUCKETS:
+            _count(scope, "allowed")
+        return True
+
+    def wait(self):
+        return self.retry_after
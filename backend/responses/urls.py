@@ -1,13 +1,31 @@
+from django.conf import settings
 from django.urls import path
 
-from .views import SubmitResponseAPIView, SurveyStatisticsAPIView, SurveyExportView, ThankYouView
+from .views import (
+    AsyncSubmitResponseAPIView,
+    AsyncSurveyStatisticsAPIView,
+    SubmitBatchAPIView,
+    SubmitResponseAPIView,
+    SurveyStatisticsAPIView,
+    SurveyExportView,
+    ThankYouView,
+    VoteThrottleStatsAPIView,
+)
 
 app_name = "responses"
 
+# Под ASGI (config.asgi) голосование и статистика обслуживаются async-представлениями
+if settings.ASYNC_API_VIEWS:
+    SubmitView, StatisticsView = AsyncSubmitResponseAPIView, AsyncSurveyStatisticsAPIView
+else:
+    SubmitView, StatisticsView = SubmitResponseAPIView, SurveyStatisticsAPIView
+
 urlpatterns = [
     path("thank-you/", ThankYouView.as_view(), name="thank-you"),
-    path("api/<slug:slug>/submit/", SubmitResponseAPIView.as_view(), name="api-submit"),
-    path("api/<slug:slug>/stats/", SurveyStatisticsAPIView.as_view(), name="api-stats"),
+    path("api/throttle-stats/", VoteThrottleStatsAPIView.as_view(), name="api-throttle-stats"),
+    path("api/<slug:slug>/submit/", SubmitView.as_view(), name="api-submit"),
+    path("api/<slug:slug>/submit-batch/", SubmitBatchAPIView.as_view(), name="api-submit-batch"),
+    path("api/<slug:slug>/stats/", StatisticsView.as_view(), name="api-stats"),
     path("api/<slug:slug>/export/<str:fmt>/", SurveyExportView.as_view(), name="api-export"),
 ]
 
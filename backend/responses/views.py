@@ -2,23 +2,54 @@ import csv
 import io
 from collections import Counter
 
-from django.http import HttpResponse, JsonResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
 from django.views.generic import TemplateView
 from django.utils import timezone
 
 from rest_framework import permissions, status, views
 from rest_framework.response import Response
 
+from config.async_views import AsyncAPIView
+from config.routers import read_from_primary, read_from_replica
+from surveys import etags
 from surveys.models import Survey, Question
-from .models import SurveyResponse
+from . import idempotency
+from .archive import archived_answers, get_archive
+from .batch import create_batch, validate_batch
+from .packing import packed_export_rows, packed_statistics
+from .models import Answer, SurveyArchive, SurveyResponse
 from .serializers import SurveyResponseSerializer
+from .throttling import AnonymousVoteThrottle, vote_throttle_counters
 
 
+# Размер блока потокового CSV экспорта, символы
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Ответы вопросов с выбранными вариантами: три запроса на опрос вместо запроса на вопрос и на ответ
+ANSWERS_WITH_CHOICES = Prefetch("answer_set", queryset=Answer.objects.order_by("pk").prefetch_related("selected_choices"))
+
+
+def surveys_with_archive_flag():
+    """Опросы с аннотацией is_archived: проверка архива при голосовании входит в запрос опроса."""
+    return Survey.objects.annotate(is_archived=Exists(SurveyArchive.objects.filter(survey=OuterRef("pk"))))
+
+
+@read_from_replica()
 def build_statistics_payload(survey):
-    """Строит статистику по опросу: подсчет ответов по типам вопросов."""
+    """Строит статистику по опросу: подсчет ответов по типам вопросов. Читает с реплики, если она настроена."""
+    archive = get_archive(survey)
+    if archive is not None:
+        return archive.statistics
+    if survey.answer_storage == Survey.STORAGE_PACKED:
+        return packed_statistics(survey)
     data = []
-    for question in survey.questions.all():
+    for question in survey.questions.prefetch_related(ANSWERS_WITH_CHOICES):
         question_data = {"id": question.id, "text": question.text, "type": question.question_type}
         answers = question.answer_set.all()
         if question.question_type in {Question.TYPE_SINGLE, Question.TYPE_MULTIPLE}:
@@ -43,85 +74,283 @@ def build_statistics_payload(survey):
     return {"questions": data, "total_responses": survey.responses.count()}
 
 
+ARCHIVED_SURVEY = {"detail": "Опрос в архиве: ответы не принимаются"}
+
+
 class ThankYouView(TemplateView):
     """Страница благодарности после отправки ответа на опрос."""
     template_name = "responses/thank_you.html"
 
 
 class SubmitResponseAPIView(views.APIView):
-    """API endpoint для отправки ответа на опрос. Проверяет дубликаты."""
+    """
+    API endpoint для отправки ответа на опрос. Проверяет дубликаты, ограничивает частоту анонимных голосов
+    и повторяет сохраненный ответ для запросов с тем же Idempotency-Key.
+    """
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [AnonymousVoteThrottle]
+    DUPLICATE_VOTE = {"detail": "Вы уже голосовали в этом опросе"}
 
     def post(self, request, slug):
-        survey = get_object_or_404(Survey, slug=slug)
+        survey = get_object_or_404(surveys_with_archive_flag(), slug=slug)
         if not survey.is_active:
             return Response({"detail": "Опрос недоступен"}, status=status.HTTP_400_BAD_REQUEST)
+        if survey.is_archived:
+            # Статистика и экспорт архивного опроса берутся из архива - новые ответы в них не попали бы
+            return Response(ARCHIVED_SURVEY, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            key_hash = idempotency.request_key(request, survey)
+            fingerprint = idempotency.request_fingerprint(request) if key_hash else None
+            stored = idempotency.find_stored(key_hash, fingerprint) if key_hash else None
+        except idempotency.IdempotencyKeyError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if stored is not None:
+            # Повтор уже выполненного запроса: сохраненный ответ без сериализатора и сигналов
+            return Response(stored.body, status=stored.status_code, headers={"Idempotent-Replayed": "true"})
 
         if self._is_duplicate_vote(request, survey):
-            return Response({"detail": "Вы уже голосовали в этом опросе"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(self.DUPLICATE_VOTE, status=status.HTTP_400_BAD_REQUEST)
+        return self.save_vote(request, survey, key_hash, fingerprint)
 
+    def save_vote(self, request, survey, key_hash, fingerprint):
+        """Проверяет и сохраняет голос вместе с ключом идемпотентности в одной транзакции."""
         serializer = SurveyResponseSerializer(data=request.data, context={"survey": survey, "request": request})
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response({"message": "Спасибо за участие", "thank_you": survey.thank_you_message}, status=status.HTTP_201_CREATED)
+        body = {"message": "Спасибо за участие", "thank_you": survey.thank_you_message}
+        try:
+            with transaction.atomic():
+                serializer.save()
+                if key_hash:
+                    idempotency.store(key_hash, fingerprint, status.HTTP_201_CREATED, body)
+        except IntegrityError:
+            # Параллельный запрос успел раньше: тот же ключ или повторный голос пользователя
+            stored = idempotency.find_stored(key_hash, fingerprint) if key_hash else None
+            if stored is not None:
+                return Response(stored.body, status=stored.status_code, headers={"Idempotent-Replayed": "true"})
+            return Response(self.DUPLICATE_VOTE, status=status.HTTP_400_BAD_REQUEST)
+        return Response(body, status=status.HTTP_201_CREATED)
 
     def _is_duplicate_vote(self, request, survey):
         """Проверяет, отвечал ли авторизованный пользователь уже на этот опрос."""
         if request.user.is_authenticated:
-            return SurveyResponse.objects.filter(survey=survey, user=request.user).exists()
+            with read_from_primary():
+                return SurveyResponse.objects.filter(survey=survey, user=request.user).exists()
         return False
 
 
+class AsyncSubmitResponseAPIView(AsyncAPIView, SubmitResponseAPIView):
+    """
+    Async-версия SubmitResponseAPIView для ASGI: опрос, ключ идемпотентности и повторный голос
+    проверяются async ORM, в поток уходят только сериализатор и транзакция записи.
+    """
+
+    async def post(self, request, slug):
+        survey = await surveys_with_archive_flag().filter(slug=slug).afirst()
+        if survey is None:
+            raise Http404
+        if not survey.is_active:
+            return Response({"detail": "Опрос недоступен"}, status=status.HTTP_400_BAD_REQUEST)
+        if survey.is_archived:
+            return Response(ARCHIVED_SURVEY, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            key_hash = idempotency.request_key(request, survey)
+            fingerprint = idempotency.request_fingerprint(request) if key_hash else None
+            stored = await idempotency.afind_stored(key_hash, fingerprint) if key_hash else None
+        except idempotency.IdempotencyKeyError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if stored is not None:
+            return Response(stored.body, status=stored.status_code, headers={"Idempotent-Replayed": "true"})
+
+        if request.user.is_authenticated:
+            with read_from_primary():
+                voted = await SurveyResponse.objects.filter(survey=survey, user=request.user).aexists()
+            if voted:
+                return Response(self.DUPLICATE_VOTE, status=status.HTTP_400_BAD_REQUEST)
+        return await sync_to_async(self.save_vote)(request, survey, key_hash, fingerprint)
+
+
+class SubmitBatchAPIView(views.APIView):
+    """
+    API endpoint для пакетной отправки ответов (киоски, офлайн-сбор) автором опроса или staff.
+    Корректные ответы сохраняются одной транзакцией, ошибки возвращаются по индексам элементов.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, slug):
+        survey = get_object_or_404(surveys_with_archive_flag(), slug=slug)
+        if survey.author != request.user and not request.user.is_staff:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        if not survey.is_active:
+            return Response({"detail": "Опрос недоступен"}, status=status.HTTP_400_BAD_REQUEST)
+        if survey.is_archived:
+            return Response(ARCHIVED_SURVEY, status=status.HTTP_400_BAD_REQUEST)
+        items = request.data.get("responses") if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not 0 < len(items) <= settings.SUBMIT_BATCH_MAX_SIZE:
+            return Response(
+                {"detail": f"responses - список из 1-{settings.SUBMIT_BATCH_MAX_SIZE} ответов"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            key_hash = idempotency.request_key(request, survey)
+            fingerprint = idempotency.request_fingerprint(request) if key_hash else None
+            stored = idempotency.find_stored(key_hash, fingerprint) if key_hash else None
+        except idempotency.IdempotencyKeyError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if stored is not None:
+            return Response(stored.body, status=stored.status_code, headers={"Idempotent-Replayed": "true"})
+
+        schema, valid, errors = validate_batch(survey, items)
+        if not valid:
+            return Response({"created": 0, "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        body = {"created": len(valid), "errors": errors}
+        with transaction.atomic():
+            create_batch(
+                survey,
+                schema,
+                [item for _, item in valid],
+                ip_address=request.META.get("REMOTE_ADDR"),
+                user_agent=request.META.get("HTTP_USER_AGENT", ""),
+            )
+            if key_hash:
+                idempotency.store(key_hash, fingerprint, status.HTTP_201_CREATED, body)
+        return Response(body, status=status.HTTP_201_CREATED)
+
+
+class VoteThrottleStatsAPIView(views.APIView):
+    """API endpoint для мониторинга ограничения частоты голосов (только для staff)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {
+                "enabled": settings.VOTE_THROTTLE_ENABLED,
+                "buckets": settings.VOTE_THROTTLE_BUCKETS,
+                "counters": vote_throttle_counters(),
+            }
+        )
+
+
 class SurveyStatisticsAPIView(views.APIView):
     """API endpoint для получения статистики опроса. Доступ только после участия."""
     permission_classes = [permissions.AllowAny]
+    use_replica = True
 
     def get(self, request, slug):
         survey = get_object_or_404(Survey, slug=slug)
         if survey.author != request.user:
             has_participated = False
             if request.user.is_authenticated:
-                has_participated = SurveyResponse.objects.filter(survey=survey, user=request.user).exists()
+                # Только что проголосовавший пользователь может еще отсутствовать на реплике
+                with read_from_primary():
+                    has_participated = SurveyResponse.objects.filter(survey=survey, user=request.user).exists()
             if not has_participated and survey.survey_type != Survey.TYPE_PUBLIC:
                 return Response(status=status.HTTP_403_FORBIDDEN)
             if not has_participated and survey.survey_type == Survey.TYPE_PUBLIC:
                 return Response(status=status.HTTP_403_FORBIDDEN)
 
-        payload = build_statistics_payload(survey)
-        return Response(payload)
+        etag = etags.survey_etag(request, survey, "content", "responses")
+        response = etags.not_modified(request, etag) or etags.with_etag(Response(build_statistics_payload(survey)), etag)
+        patch_cache_control(response, private=True)
+        return response
+
+
+class AsyncSurveyStatisticsAPIView(AsyncAPIView, SurveyStatisticsAPIView):
+    """
+    Async-версия SurveyStatisticsAPIView для ASGI: доступ проверяется async ORM, ETag - async API кэша,
+    поэтому 304 обходится без потока; подсчет статистики выполняется через sync_to_async.
+    """
+
+    async def get(self, request, slug):
+        survey = await Survey.objects.filter(slug=slug).afirst()
+        if survey is None:
+            raise Http404
+        if survey.author_id != request.user.pk:
+            has_participated = False
+            if request.user.is_authenticated:
+                with read_from_primary():
+                    has_participated = await SurveyResponse.objects.filter(survey=survey, user=request.user).aexists()
+            if not has_participated:
+                return Response(status=status.HTTP_403_FORBIDDEN)
+
+        etag = await etags.asurvey_etag(request, survey, "content", "responses")
+        response = etags.not_modified(request, etag)
+        if response is None:
+            response = etags.with_etag(Response(await sync_to_async(build_statistics_payload)(survey)), etag)
+        patch_cache_control(response, private=True)
+        return response
 
 
 class SurveyExportView(views.APIView):
     """API endpoint для экспорта результатов опроса в JSON или CSV."""
     permission_classes = [permissions.IsAuthenticated]
+    use_replica = True
 
     def get(self, request, slug, fmt):
         survey = get_object_or_404(Survey, slug=slug)
         if survey.author != request.user:
             return Response(status=status.HTTP_403_FORBIDDEN)
         if fmt == "json":
-            payload = build_statistics_payload(survey)
-            return Response(payload)
+            # Обычный Response: renderer выбирается согласованием (FastJSONRenderer, Browsable API)
+            return Response(build_statistics_payload(survey))
         elif fmt == "csv":
             return self._export_csv(survey)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
     def _export_csv(self, survey):
-        """Экспортирует результаты опроса в CSV формат."""
+        """Экспортирует результаты опроса в CSV формат. Строки формируются и отдаются по мере чтения ответов."""
+        archive = get_archive(survey, with_answers=True)
+        if archive is not None:
+            rows = self._archived_rows(survey, archive)
+        elif survey.answer_storage == Survey.STORAGE_PACKED:
+            rows = packed_export_rows(survey)
+        else:
+            rows = self._rows(survey)
+        response = StreamingHttpResponse(self._csv_lines(rows), content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="{survey.slug}.csv"'
+        return response
+
+    def _csv_lines(self, rows):
+        """Строки CSV для пар (вопрос, значение): csv.writer пишет в буфер, который очищается после каждой строки."""
         buffer = io.StringIO()
         writer = csv.writer(buffer)
         writer.writerow(["Вопрос", "Тип", "Ответ"])
-        for question in survey.questions.all():
-            answers = question.answer_set.all()
-            for answer in answers:
+        for question, value in rows:
+            writer.writerow([question.text, question.get_question_type_display(), value])
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def _rows(self, survey):
+        """Пары (вопрос, значение ответа) из горячих таблиц."""
+        for question in survey.questions.prefetch_related(ANSWERS_WITH_CHOICES):
+            for answer in question.answer_set.all():
                 value = ""
                 if question.question_type in {Question.TYPE_SINGLE, Question.TYPE_MULTIPLE}:
-                    value = ", ".join(answer.selected_choices.values_list("label", flat=True))
+                    value = ", ".join(choice.label for choice in answer.selected_choices.all())
                 elif question.question_type == Question.TYPE_TEXT:
                     value = answer.text_answer
                 else:
                     value = answer.rating_value
-                writer.writerow([question.text, question.get_question_type_display(), value])
-        response = HttpResponse(buffer.getvalue(), content_type="text/csv")
-        response["Content-Disposition"] = f'attachment; filename="{survey.slug}.csv"'
-        return response
+                yield question, value
+
+    def _archived_rows(self, survey, archive):
+        """Пары (вопрос, значение ответа) из архива, в том же порядке, что и _rows."""
+        by_question = {}
+        for answer in archived_answers(archive):
+            by_question.setdefault(answer["question_id"], []).append(answer)
+        for question in survey.questions.prefetch_related("choices"):
+            # Порядок вариантов как в values_list по связи: по Choice.order
+            positions = {choice.id: (position, choice.label) for position, choice in enumerate(question.choices.all())}
+            for answer in by_question.get(question.id, []):
+                if question.question_type in {Question.TYPE_SINGLE, Question.TYPE_MULTIPLE}:
+                    value = ", ".join(label for _, label in sorted(positions[choice_id] for choice_id in answer["choice_ids"]))
+                elif question.question_type == Question.TYPE_TEXT:
+                    value = answer["text_answer"]
+                else:
+                    value = answer["rating_value"]
+                yield question, value
@@ -0,0 +1,73 @@
+"""
+Архивация закрытых опросов (responses.archive).
+
+Переносит ответы на вопросы закрытых опросов, не изменявшихся --days дней, в сжатый архив
+и замораживает итоговую статистику. Статистика и экспорт продолжают работать из архива.
+
+Примеры:
+    python scripts/archive_surveys.py --days 30 --dry-run
+    python scripts/archive_surveys.py --slug 3f0c...
+    python scripts/archive_surveys.py --restore 3f0c...
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+import django
+
+# Настройка Django
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.utils import timezone
+
+from responses.archive import archivable_surveys, archive_survey, restore_survey
+from surveys.models import Survey
+
+
+def main():
+    """Основная функция: архивирует подходящие опросы или восстанавливает один."""
+    parser = argparse.ArgumentParser(description="Архивация закрытых опросов QuickVote")
+    parser.add_argument("--days", type=int, default=30, help="Сколько дней опрос должен быть закрыт")
+    parser.add_argument("--slug", help="Архивировать только этот опрос")
+    parser.add_argument("--restore", metavar="SLUG", help="Вернуть ответы опроса из архива")
+    parser.add_argument("--dry-run", action="store_true", help="Только показать, что будет заархивировано")
+    args = parser.parse_args()
+
+    if args.restore:
+        survey = Survey.objects.get(slug=args.restore)
+        restored = restore_survey(survey)
+        print(f"✓ {survey.title}: восстановлено ответов на вопросы: {restored}")
+        return
+
+    if args.slug:
+        surveys = Survey.objects.filter(slug=args.slug)
+    else:
+        surveys = archivable_surveys(timezone.now() - timedelta(days=args.days))
+
+    archived = 0
+    for survey in surveys.iterator():
+        if args.dry_run:
+            print(f"  - {survey.title} ({survey.slug})")
+            continue
+        started = time.perf_counter()
+        try:
+            archive = archive_survey(survey)
+        except ValueError as error:
+            print(f"  ⚠ {survey.title}: {error}")
+            continue
+        archived += 1
+        print(
+            f"  ✓ {survey.title}: {archive.answer_count} ответов на вопросы, "
+            f"{len(archive.answers) / 1024:.1f} КБ, {time.perf_counter() - started:.2f} с"
+        )
+
+    if not args.dry_run:
+        print(f"\n✓ Заархивировано опросов: {archived}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Нагрузочный бенчмарк горячих endpoints.
+
+Для каждого масштаба (количество ответов на "горячий" опрос) создает отдельную тестовую БД,
+заполняет ее данными из generate_fixtures.py (через пакетный загрузчик load_fixtures.py) и гоняет запросы через Django test client
+в несколько потоков. Выводит p50/p95/p99, пропускную способность и число SQL-запросов
+на запрос, сохраняет результаты в JSON и может сравнить их с предыдущим прогоном.
+
+Пример:
+    python scripts/benchmark.py --scales 1000,10000,100000 --requests 200 --workers 8
+    python scripts/benchmark.py --compare benchmark_results_old.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import django
+
+# Настройка Django
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Бенчмарк сам генерирует поток анонимных голосов с одного клиента - ограничение частоты мешало бы замерам
+os.environ.setdefault("QUICKVOTE_VOTE_THROTTLE", "0")
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+
+from analytics.rollups import rebuild_rollups
+from config.profiling import QueryProfile
+from surveys.models import Survey, Question
+from generate_fixtures import generate_question, generate_single_survey, iter_survey_responses
+from load_fixtures import BulkLoader
+
+QUESTION_TYPES = ["single", "multiple", "text", "rating"]
+ENDPOINTS = ["submit", "stats", "export", "public", "dashboard"]
+BENCH_PASSWORD = "BenchPass123!"
+
+
+def seed(scale, batch_size, answer_storage=Survey.STORAGE_ROWS):
+    """Создает автора и активный горячий опрос с scale ответами через пакетный загрузчик фикстур."""
+    loader = BulkLoader(batch_size=batch_size, hash_workers=0, verbose=False)
+    loader.add("user", {"username": "bench_author", "email": "bench_author@example.com", "password": BENCH_PASSWORD})
+    survey_data = generate_single_survey(1, {"username": "bench_author"}, 0)
+    # Анонимный опрос: все ответы генерируются без пользователей, как у неавторизованных голосующих
+    survey_data.update(status="active", ends_at=None, survey_type="anonymous", answer_storage=answer_storage)
+    survey_data["questions"] = [generate_question(order, q_type) for order, q_type in enumerate(QUESTION_TYPES)]
+    for question in survey_data["questions"]:
+        question["is_required"] = True
+    loader.add("survey", survey_data)
+    for response_data in iter_survey_responses(survey_data, scale):
+        loader.add("response", response_data)
+    loader.finish()
+    rebuild_rollups()
+    survey = Survey.objects.select_related("author").get(pk=loader.surveys[survey_data["id"]]["survey"].pk)
+    return survey.author, survey
+
+
+def build_requests(survey):
+    """Описания запросов для каждого endpoint: (метод, url, тело, нужна ли авторизация автора)."""
+    answers = []
+    for question in survey.questions.prefetch_related("choices"):
+        if question.question_type in {Question.TYPE_SINGLE, Question.TYPE_MULTIPLE}:
+            answers.append({"question": question.id, "selected_choices": [question.choices.all()[0].id]})
+        elif question.question_type == Question.TYPE_TEXT:
+            answers.append({"question": question.id, "text_answer": "Ответ из бенчмарка"})
+        else:
+            answers.append({"question": question.id, "rating_value": 4})
+    return {
+        "submit": ("post", f"/responses/api/{survey.slug}/submit/", {"answers": answers}, False),
+        "stats": ("get", f"/responses/api/{survey.slug}/stats/", None, True),
+        "export": ("get", f"/responses/api/{survey.slug}/export/csv/", None, True),
+        "public": ("get", f"/api/surveys/{survey.slug}/public/", None, False),
+        "dashboard": ("get", "/dashboard/", None, True),
+    }
+
+
+def percentile(sorted_values, pct):
+    """Перцентиль по методу ближайшего ранга."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_endpoint(spec, author, total_requests, workers, warmup):
+    """Выполняет total_requests запросов к endpoint в workers потоков и собирает метрики."""
+    method, url, body, needs_auth = spec
+    lock = threading.Lock()
+    latencies = []
+    query_counts = []
+    errors = Counter()
+
+    def worker(count):
+        # Ошибки сервера (например, блокировки SQLite) считаются по статусу, а не прерывают прогон
+        client = Client(raise_request_exception=False)
+        if needs_auth:
+            client.force_login(author)
+        call = getattr(client, method)
+        kwargs = {"data": json.dumps(body), "content_type": "application/json"} if body is not None else {}
+        for _ in range(warmup):
+            call(url, **kwargs)
+        local_latencies, local_queries = [], []
+        for _ in range(count):
+            profile = QueryProfile(track_call_sites=False)
+            with connection.execute_wrapper(profile):
+                started = time.perf_counter()
+                response = call(url, **kwargs)
+                elapsed = time.perf_counter() - started
+            local_latencies.append(elapsed * 1000)
+            local_queries.append(profile.count)
+            if response.status_code >= 400:
+                with lock:
+                    errors[response.status_code] += 1
+        connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            query_counts.extend(local_queries)
+
+    shares = [total_requests // workers + (1 if i < total_requests % workers else 0) for i in range(workers)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(worker, shares))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": dict(errors),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "queries_per_request": round(sum(query_counts) / len(query_counts), 2) if query_counts else 0,
+    }
+
+
+def run_scale(scale, args, db_path):
+    """Создает тестовую БД для масштаба, заполняет ее и прогоняет endpoints."""
+    if connection.vendor == "sqlite":
+        # Файловая БД вместо in-memory, чтобы потоки работали с общей базой
+        connection.settings_dict.setdefault("TEST", {})["NAME"] = db_path
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        seed_started = time.perf_counter()
+        author, survey = seed(scale, args.batch_size, args.answer_storage)
+        print(f"  ✓ Данные: {scale} ответов за {time.perf_counter() - seed_started:.1f} с")
+        specs = build_requests(survey)
+        results = []
+        for endpoint in args.endpoints:
+            metrics = run_endpoint(specs[endpoint], author, args.requests, args.workers, args.warmup)
+            results.append({"scale": scale, "endpoint": endpoint, **metrics})
+            print(
+                f"  {endpoint:<10} p50 {metrics['p50_ms']:>9.2f} мс  p95 {metrics['p95_ms']:>9.2f} мс  "
+                f"p99 {metrics['p99_ms']:>9.2f} мс  {metrics['throughput_rps']:>8.2f} rps  "
+                f"SQL {metrics['queries_per_request']:>6.1f}  ошибки {metrics['errors'] or '-'}"
+            )
+        return results
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def compare(results, baseline_path, threshold):
+    """Сравнивает результаты с предыдущим прогоном. Возвращает список регрессий."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["scale"], r["endpoint"]): r for r in json.load(f)["results"]}
+    regressions = []
+    print(f"\nСравнение с {baseline_path}:")
+    for result in results:
+        previous = baseline.get((result["scale"], result["endpoint"]))
+        if not previous or not previous["p95_ms"]:
+            continue
+        change = (result["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+        marker = "  ⚠ регрессия" if change > threshold else ""
+        print(f"  {result['scale']:>8} {result['endpoint']:<10} p95 {previous['p95_ms']:.2f} → {result['p95_ms']:.2f} мс ({change:+.1f}%){marker}")
+        if change > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк горячих endpoints QuickVote")
+    parser.add_argument("--scales", default="1000,10000", help="Количества ответов через запятую (до 1000000)")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Endpoints через запятую: " + ", ".join(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=100, help="Запросов на endpoint")
+    parser.add_argument("--workers", type=int, default=4, help="Параллельных потоков")
+    parser.add_argument("--warmup", type=int, default=2, help="Прогревочных запросов на поток")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Размер пачки при заполнении БД")
+    parser.add_argument(
+        "--answer-storage",
+        choices=[Survey.STORAGE_ROWS, Survey.STORAGE_PACKED],
+        default=Survey.STORAGE_ROWS,
+        help="Способ хранения ответов горячего опроса",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Seed генератора данных")
+    parser.add_argument("--output", default="benchmark_results.json", help="Файл для результатов")
+    parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Порог регрессии p95, %%")
+    args = parser.parse_args()
+    args.scales = [int(value) for value in args.scales.split(",") if value]
+    args.endpoints = [value for value in args.endpoints.split(",") if value]
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Неизвестные endpoints: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main():
+    """Основная функция: прогоняет бенчмарк по всем масштабам и сохраняет JSON."""
+    args = parse_args()
+    random.seed(args.seed)
+    setup_test_environment()
+    logging.getLogger("django.request").setLevel(logging.CRITICAL)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            print(f"\nМасштаб: {scale} ответов")
+            results.extend(run_scale(scale, args, os.path.join(tmp, f"bench_{scale}.sqlite3")))
+
+    output = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "db_profile": settings.DB_PROFILE,
+            "workers": args.workers,
+            "requests": args.requests,
+            "seed": args.seed,
+            "answer_storage": args.answer_storage,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ Результаты сохранены в {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Сравнение профилей БД (QUICKVOTE_DB_PROFILE) под конкурентной записью.
+
+Для каждого профиля запускает scripts/benchmark.py в отдельном процессе (настройки читаются
+при старте Django) на endpoint отправки ответов и сводит пропускную способность, задержки
+и ошибки в одну таблицу. Профили PostgreSQL требуют запущенного сервера и psycopg;
+недоступные профили пропускаются с предупреждением.
+
+Пример:
+    python scripts/benchmark_databases.py --profiles sqlite-basic,sqlite --workers 8 --requests 400
+    QUICKVOTE_DB_HOST=db python scripts/benchmark_databases.py --profiles sqlite,postgres,postgres-pooled
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROFILES = "sqlite-basic,sqlite,postgres,postgres-pooled"
+
+
+def run_profile(profile, args, output_path):
+    """Запускает бенчмарк с профилем БД. Возвращает результаты или None при ошибке."""
+    command = [
+        sys.executable,
+        os.path.join(SCRIPTS_DIR, "benchmark.py"),
+        "--scales", str(args.scale),
+        "--endpoints", args.endpoints,
+        "--requests", str(args.requests),
+        "--workers", str(args.workers),
+        "--output", output_path,
+    ]
+    env = {**os.environ, "QUICKVOTE_DB_PROFILE": profile}
+    completed = subprocess.run(command, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        reason = (completed.stderr.strip().splitlines() or ["неизвестная ошибка"])[-1]
+        print(f"  ⚠ {profile}: пропущен ({reason})")
+        return None
+    with open(output_path, "r", encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def main():
+    """Основная функция: прогоняет бенчмарк по профилям и печатает сводную таблицу."""
+    parser = argparse.ArgumentParser(description="Сравнение профилей БД QuickVote")
+    parser.add_argument("--profiles", default=DEFAULT_PROFILES, help="Профили через запятую")
+    parser.add_argument("--endpoints", default="submit", help="Endpoints через запятую (см. benchmark.py)")
+    parser.add_argument("--scale", type=int, default=1000, help="Количество ответов в горячем опросе")
+    parser.add_argument("--requests", type=int, default=200, help="Запросов на endpoint")
+    parser.add_argument("--workers", type=int, default=8, help="Параллельных потоков")
+    parser.add_argument("--output", default="benchmark_results_databases.json", help="Файл для сводных результатов")
+    args = parser.parse_args()
+
+    summary = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in [value for value in args.profiles.split(",") if value]:
+            print(f"Профиль {profile}...")
+            results = run_profile(profile, args, os.path.join(tmp, f"{profile}.json"))
+            if results is not None:
+                summary[profile] = results
+
+    if not summary:
+        print("❌ Ни один профиль не удалось прогнать")
+        sys.exit(1)
+
+    print(f"\n{'профиль':<16} {'endpoint':<10} {'rps':>9} {'p50, мс':>10} {'p95, мс':>10} {'p99, мс':>10}  ошибки")
+    for profile, results in summary.items():
+        for result in results:
+            print(
+                f"{profile:<16} {result['endpoint']:<10} {result['throughput_rps']:>9.2f} {result['p50_ms']:>10.2f} "
+                f"{result['p95_ms']:>10.2f} {result['p99_ms']:>10.2f}  {result['errors'] or '-'}"
+            )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Микробенчмарк JSON renderer и parser REST API (config.renderers).
+
+Сравнивает стандартные JSONRenderer/JSONParser DRF с FastJSONRenderer/FastJSONParser
+на типичных ответах: статистика опроса с текстовыми ответами и страница списка опросов
+с вложенными вопросами. Данные синтетические, БД не нужна.
+
+Пример:
+    python scripts/benchmark_json.py --text-responses 20000 --repeat 30
+"""
+import argparse
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+import django
+
+# Настройка Django
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from config import renderers
+from config.renderers import FastJSONParser, FastJSONRenderer
+
+WORDS = ["опрос", "ответ", "сервис", "удобно", "быстро", "цена", "качество", "поддержка", "survey", "great"]
+
+
+def statistics_payload(questions, text_responses):
+    """Статистика опроса в формате build_statistics_payload."""
+    data = []
+    for index in range(questions):
+        kind = ("single", "multiple", "text", "rating")[index % 4]
+        question = {"id": index + 1, "text": f"Вопрос {index + 1}: {' '.join(random.choices(WORDS, k=6))}", "type": kind}
+        if kind in {"single", "multiple"}:
+            counts = [random.randint(0, 5000) for _ in range(6)]
+            total = sum(counts) or 1
+            question["options"] = [
+                {"label": f"Вариант {position}", "count": count, "percentage": round(count / total * 100, 2)}
+                for position, count in enumerate(counts)
+            ]
+        elif kind == "text":
+            question["responses"] = [" ".join(random.choices(WORDS, k=random.randint(3, 20))) for _ in range(text_responses)]
+        else:
+            question["average"] = round(random.uniform(1, 5), 2)
+            question["distribution"] = [{"rating": rating, "count": random.randint(0, 3000)} for rating in range(1, 6)]
+        data.append(question)
+    return {"questions": data, "total_responses": text_responses}
+
+
+def survey_page_payload(surveys, questions, choices):
+    """Страница списка опросов SurveySerializer (PAGE_SIZE опросов с вопросами и вариантами)."""
+    results = []
+    for index in range(surveys):
+        results.append(
+            {
+                "id": index + 1,
+                "slug": f"{random.getrandbits(128):032x}",
+                "title": f"Опрос {index + 1}",
+                "description": " ".join(random.choices(WORDS, k=40)),
+                "survey_type": "anonymous",
+                "status": "active",
+                "created_at": "2026-03-01T12:30:15.123000Z",
+                "updated_at": "2026-03-02T08:00:00.000000Z",
+                "ends_at": None,
+                "theme": "light",
+                "welcome_message": "Добро пожаловать",
+                "thank_you_message": "Спасибо за участие",
+                "answer_storage": "rows",
+                "questions": [
+                    {
+                        "id": index * questions + position,
+                        "text": f"Вопрос {position + 1}",
+                        "question_type": "single",
+                        "is_required": True,
+                        "order": position,
+                        "max_text_length": 1000,
+                        "choices": [{"id": choice, "label": f"Вариант {choice}", "order": choice} for choice in range(choices)],
+                    }
+                    for position in range(questions)
+                ],
+            }
+        )
+    return {"count": surveys * 10, "next": "http://testserver/api/surveys/?page=2", "previous": None, "results": results}
+
+
+def measure(function, repeat):
+    """Медиана времени вызова в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def compare(name, payload, repeat):
+    """Замеряет кодирование и разбор payload стандартными и быстрыми классами."""
+    body = JSONRenderer().render(payload)
+    fast_body = FastJSONRenderer().render(payload)
+    if fast_body != body:
+        print(f"  ❌ {name}: вывод FastJSONRenderer отличается от JSONRenderer")
+        return
+    results = {
+        "render": (
+            measure(lambda: JSONRenderer().render(payload), repeat),
+            measure(lambda: FastJSONRenderer().render(payload), repeat),
+        ),
+        "parse": (
+            measure(lambda: JSONParser().parse(io.BytesIO(body)), repeat),
+            measure(lambda: FastJSONParser().parse(io.BytesIO(body)), repeat),
+        ),
+    }
+    print(f"\n{name} ({len(body) / 1024:.0f} КБ):")
+    for operation, (standard, fast) in results.items():
+        print(f"  {operation:<7} DRF {standard:8.2f} мс   fast {fast:8.2f} мс   x{standard / fast:.1f}")
+
+
+def main():
+    """Основная функция: строит payload'ы и сравнивает кодирование и разбор."""
+    parser = argparse.ArgumentParser(description="Микробенчмарк JSON renderer/parser QuickVote")
+    parser.add_argument("--questions", type=int, default=20, help="Вопросов в статистике")
+    parser.add_argument("--text-responses", type=int, default=5000, help="Текстовых ответов на текстовый вопрос")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов каждого замера")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if renderers.orjson is None:
+        print("⚠ orjson не установлен: быстрые классы используют стандартный json")
+    else:
+        print(f"✓ orjson {renderers.orjson.__version__}")
+
+    compare("Статистика опроса", statistics_payload(args.questions, args.text_responses), args.repeat)
+    compare("Страница списка опросов", survey_page_payload(20, 10, 5), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Микробенчмарк публичной схемы опроса: SurveyPublicSerializer против surveys.payloads.
+
+Создает временную БД с опросом из --questions вопросов по --choices вариантов и сравнивает
+построение данных ответа: сериализатор DRF по объектам с prefetch и словари из values().
+Проверяет, что JSON обоих вариантов совпадает побайтно.
+
+Пример:
+    python scripts/benchmark_serializers.py --questions 30 --choices 8 --repeat 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import django
+
+# Настройка Django
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.db import connection
+from django.db.models import prefetch_related_objects
+from django.test.utils import setup_test_environment
+from rest_framework.renderers import JSONRenderer
+
+from surveys.api import QUESTIONS_PREFETCH
+from surveys.models import Choice, Question, Survey
+from surveys.payloads import public_survey_data
+from surveys.serializers import SurveyPublicSerializer
+from users.models import User
+
+
+def seed(questions, choices):
+    """Создает автора и опрос с вопросами выбора."""
+    author = User.objects.create_user(username="bench_author", email="bench_author@example.com", password=None)
+    survey = Survey.objects.create(author=author, title="Бенчмарк схемы", description="Описание опроса")
+    created = Question.objects.bulk_create(
+        [
+            Question(survey=survey, text=f"Вопрос {index}", question_type=Question.TYPE_SINGLE, order=index)
+            for index in range(questions)
+        ]
+    )
+    Choice.objects.bulk_create(
+        [Choice(question=question, label=f"Вариант {index}", order=index) for question in created for index in range(choices)]
+    )
+    return survey
+
+
+def serializer_data(slug):
+    survey = Survey.objects.get(slug=slug)
+    prefetch_related_objects([survey], QUESTIONS_PREFETCH)
+    return SurveyPublicSerializer(survey).data
+
+
+def fast_data(slug):
+    return public_survey_data(Survey.objects.get(slug=slug))
+
+
+def measure(function, repeat):
+    """Медиана времени вызова в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    """Основная функция: создает опрос и сравнивает два способа построения схемы."""
+    parser = argparse.ArgumentParser(description="Микробенчмарк публичной схемы опроса QuickVote")
+    parser.add_argument("--questions", type=int, default=20, help="Вопросов в опросе")
+    parser.add_argument("--choices", type=int, default=6, help="Вариантов в вопросе")
+    parser.add_argument("--repeat", type=int, default=100, help="Повторов каждого замера")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        slug = seed(args.questions, args.choices).slug
+        renderer = JSONRenderer()
+        if renderer.render(serializer_data(slug)) != renderer.render(fast_data(slug)):
+            print("❌ JSON сериализатора и быстрого пути различаются")
+            sys.exit(1)
+        print(f"✓ JSON совпадает ({args.questions} вопросов x {args.choices} вариантов)")
+        standard = measure(lambda: serializer_data(slug), args.repeat)
+        fast = measure(lambda: fast_data(slug), args.repeat)
+        print(f"  SurveyPublicSerializer  {standard:8.2f} мс")
+        print(f"  surveys.payloads        {fast:8.2f} мс   x{standard / fast:.1f}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
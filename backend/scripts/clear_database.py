@@ -2,9 +2,22 @@
 Скрипт для полной очистки базы данных от всех данных.
 Удаляет опросы, ответы, пользователей (кроме суперпользователей и staff).
 Выполняется без подтверждения.
+
+По умолчанию работает в быстром режиме: таблицы приложений очищаются прямыми DELETE
+(без загрузки строк в память и без сигналов) в порядке зависимостей внутри одной транзакции,
+а на PostgreSQL - одним TRUNCATE. Количество удаленных строк берется из результата DELETE.
+Режим --orm удаляет через ORM с каскадами и сигналами (медленно на больших базах).
+
+Примеры:
+    python scripts/clear_database.py
+    python scripts/clear_database.py --no-truncate
+    python scripts/clear_database.py --orm
 """
+import argparse
 import os
 import sys
+import time
+
 import django
 
 # Настройка Django
@@ -12,59 +25,148 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 django.setup()
 
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+
+from analytics.rollups import rebuild_rollups
 from surveys.models import Survey, Question, Choice, SurveyTemplate
 from responses.models import SurveyResponse, Answer
 from users.models import User, EmailChangeRequest
 from notifications.models import Notification, NotificationRule
 
-print("Очистка базы данных...\n")
+# Приложения, таблицы которых очищаются целиком (кроме самих пользователей)
+PURGED_APPS = ["users", "surveys", "responses", "analytics", "notifications"]
+
+
+def removable_users():
+    """Пользователи, которых удаляем: все, кроме суперпользователей и staff."""
+    return User.objects.filter(is_superuser=False, is_staff=False)
+
+
+def purged_models():
+    """Модели приложений для полной очистки, включая автоматические таблицы ManyToMany."""
+    user_through = {field.remote_field.through for field in User._meta.many_to_many}
+    result = []
+    for label in PURGED_APPS:
+        for model in apps.get_app_config(label).get_models(include_auto_created=True):
+            if model is not User and model not in user_through and not model._meta.proxy:
+                result.append(model)
+    return result
+
+
+def deletion_order(model_list):
+    """Сортирует модели так, чтобы ссылающиеся таблицы шли раньше таблиц, на которые они ссылаются."""
+    referrers = {model: [] for model in model_list}
+    for model in model_list:
+        for field in model._meta.concrete_fields:
+            target = field.related_model if field.is_relation else None
+            if target in referrers and target is not model:
+                referrers[target].append(model)
+
+    ordered, seen = [], set()
+
+    def visit(model):
+        if model in seen:
+            return
+        seen.add(model)
+        for referrer in referrers[model]:
+            visit(referrer)
+        ordered.append(model)
+
+    for model in model_list:
+        visit(model)
+    return ordered
+
+
+def user_dependents():
+    """Внешние ключи на пользователя вне очищаемых приложений (токены, журнал админки, группы, права)."""
+    purged = set(purged_models())
+    result = []
+    for model in apps.get_models(include_auto_created=True):
+        if model in purged or model is User or model._meta.proxy:
+            continue
+        for field in model._meta.concrete_fields:
+            if field.is_relation and field.related_model is User:
+                result.append((model, field))
+    return result
 
-# Удаление в правильном порядке: сначала зависимые объекты
-print("Удаление ответов...")
-Answer.objects.all().delete()
-print(f"  ✓ Удалено ответов на вопросы: {Answer.objects.count()}")
 
-print("Удаление ответов на опросы...")
-SurveyResponse.objects.all().delete()
-print(f"  ✓ Удалено ответов на опросы: {SurveyResponse.objects.count()}")
+def purge_users():
+    """Удаляет обычных пользователей и зависящие от них строки прямыми запросами."""
+    users = removable_users().values("pk")
+    for model, field in user_dependents():
+        rows = model._base_manager.filter(**{f"{field.name}__in": users})
+        if field.remote_field.on_delete is models.SET_NULL:
+            count = rows.update(**{field.name: None})
+            print(f"  ✓ {model._meta.label}.{field.name}: обнулено {count}")
+        else:
+            count = rows._raw_delete(rows.db)
+            print(f"  ✓ {model._meta.label}: удалено {count}")
+    count = removable_users()._raw_delete(User.objects.db)
+    print(f"  ✓ Пользователей удалено: {count}")
+    print("  ⚠ Суперпользователи и staff сохранены")
 
-print("Удаление вариантов ответов...")
-Choice.objects.all().delete()
-print(f"  ✓ Удалено вариантов ответов: {Choice.objects.count()}")
 
-print("Удаление вопросов...")
-Question.objects.all().delete()
-print(f"  ✓ Удалено вопросов: {Question.objects.count()}")
+@transaction.atomic
+def purge_fast(truncate):
+    """Быстрая очистка: TRUNCATE или DELETE по таблицам в порядке зависимостей, затем пользователи."""
+    ordered = deletion_order(purged_models())
+    if truncate:
+        tables = [model._meta.db_table for model in ordered]
+        connection.ops.execute_sql_flush(connection.ops.sql_flush(no_style(), tables))
+        print(f"  ✓ TRUNCATE: {len(tables)} таблиц")
+    else:
+        for model in ordered:
+            queryset = model._base_manager.all()
+            count = queryset._raw_delete(queryset.db)
+            print(f"  ✓ {model._meta.label}: удалено {count}")
+    purge_users()
 
-print("Удаление опросов...")
-Survey.objects.all().delete()
-print(f"  ✓ Удалено опросов: {Survey.objects.count()}")
 
-print("Удаление шаблонов опросов...")
-SurveyTemplate.objects.all().delete()
-print(f"  ✓ Удалено шаблонов: {SurveyTemplate.objects.count()}")
+def purge_orm():
+    """Очистка через ORM: каскады и сигналы срабатывают, строки загружаются в память."""
+    steps = [
+        ("ответов на вопросы", Answer),
+        ("ответов на опросы", SurveyResponse),
+        ("вариантов ответов", Choice),
+        ("вопросов", Question),
+        ("опросов", Survey),
+        ("шаблонов", SurveyTemplate),
+        ("уведомлений", Notification),
+        ("правил уведомлений", NotificationRule),
+        ("запросов на смену email", EmailChangeRequest),
+    ]
+    for label, model in steps:
+        count, _ = model.objects.all().delete()
+        print(f"  ✓ Удалено {label} (с каскадом): {count}")
+    count, _ = removable_users().delete()
+    print(f"  ✓ Удалено обычных пользователей (с каскадом): {count}")
+    print("  ⚠ Суперпользователи и staff сохранены")
 
-print("Удаление уведомлений...")
-Notification.objects.all().delete()
-print(f"  ✓ Удалено уведомлений: {Notification.objects.count()}")
 
-print("Удаление правил уведомлений...")
-NotificationRule.objects.all().delete()
-print(f"  ✓ Удалено правил уведомлений: {NotificationRule.objects.count()}")
+def main():
+    """Основная функция: очищает базу выбранным способом и пересчитывает агрегаты активности."""
+    parser = argparse.ArgumentParser(description="Очистка базы данных QuickVote")
+    parser.add_argument("--orm", action="store_true", help="Удалять через ORM с каскадами и сигналами")
+    parser.add_argument("--no-truncate", action="store_true", help="Не использовать TRUNCATE даже на PostgreSQL")
+    args = parser.parse_args()
 
-print("Удаление запросов на смену email...")
-EmailChangeRequest.objects.all().delete()
-print(f"  ✓ Удалено запросов на смену email: {EmailChangeRequest.objects.count()}")
+    print("Очистка базы данных...\n")
+    started = time.perf_counter()
+    if args.orm:
+        purge_orm()
+    else:
+        purge_fast(truncate=connection.vendor == "postgresql" and not args.no_truncate)
+    # Агрегаты пересобираются по оставшимся данным (сохраненные staff-пользователи)
+    rebuild_rollups()
 
-# Пользователей удаляем в последнюю очередь (сохраняем суперпользователей и staff)
-print("Удаление пользователей...")
-User.objects.filter(is_superuser=False, is_staff=False).delete()
-print(f"  ✓ Удалено обычных пользователей")
-print(f"  ⚠ Суперпользователи и staff сохранены")
+    print(f"\n✓ База данных очищена за {time.perf_counter() - started:.1f} с!")
+    print("\nОсталось:")
+    print(f"  - Пользователей: {User.objects.count()}")
+    print(f"  - Опросов: {Survey.objects.count()}")
+    print(f"  - Ответов: {SurveyResponse.objects.count()}")
 
-print("\n✓ База данных очищена!")
-print(f"\nОсталось:")
-print(f"  - Пользователей: {User.objects.count()}")
-print(f"  - Опросов: {Survey.objects.count()}")
-print(f"  - Ответов: {SurveyResponse.objects.count()}")
 
+if __name__ == "__main__":
+    main()
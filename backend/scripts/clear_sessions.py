@@ -0,0 +1,31 @@
+"""
+Скрипт для удаления просроченных сессий из БД.
+Запускается периодически (cron) вместо manage.py clearsessions: удаляет пачками,
+не блокируя таблицу сессий одним большим DELETE.
+"""
+import argparse
+import os
+import sys
+import django
+
+# Настройка Django
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from config.sessions import clear_expired_sessions
+
+
+def main():
+    """Основная функция: удаляет просроченные сессии и выводит итог."""
+    parser = argparse.ArgumentParser(description="Удаление просроченных сессий QuickVote")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Сколько сессий удалять за один запрос")
+    args = parser.parse_args()
+
+    print("Удаление просроченных сессий...")
+    deleted = clear_expired_sessions(batch_size=args.batch_size)
+    print(f"  ✓ Удалено сессий: {deleted}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,26 @@
 """
-Скрипт для генерации тестовых данных (фикстур) в JSON формате.
+Скрипт для генерации тестовых данных (фикстур) в JSON или NDJSON формате.
 Создает пользователей, опросы с вопросами и ответы на опросы.
+
+Данные генерируются потоково и сразу пишутся на диск, поэтому потребление памяти не зависит
+от количества ответов. При заданном --seed (и --anchor) результат полностью воспроизводим:
+каждый опрос и его ответы строятся от собственного генератора случайных чисел.
+
+Распределения приближены к реальным: популярность вариантов ответа убывает по закону Ципфа,
+число ответов на опрос имеет тяжелый хвост (вирусные опросы), голоса приходят всплесками
+после рассылок, длина текстовых ответов распределена логнормально.
+
+Примеры:
+    python scripts/generate_fixtures.py
+    python scripts/generate_fixtures.py --seed 7 --users 20000 --surveys 500 --responses 2000000 \\
+        --format ndjson --output fixtures/big.ndjson --chunk-size 500000
 """
+import argparse
 import json
+import math
+import os
 import random
 from datetime import datetime, timedelta
-from uuid import uuid4
 
 # Данные для генерации
 SURVEY_TITLES = [
@@ -90,262 +105,461 @@ USERNAMES = [
     "marketing_guru", "feedback_collector", "poll_creator", "user_researcher",
 ]
 
-def generate_users():
-    """Генерирует список тестовых пользователей с базовыми данными."""
-    users = []
-    for i, username in enumerate(USERNAMES):
-        user = {
-            "username": username,
-            "email": f"{username}@example.com",
-            "password": "TestPass123!",  # Общий пароль для всех тестовых пользователей
-            "display_name": username.replace("_", " ").title(),
-            "bio": f"Тестовый пользователь {i+1}",
-            "organization": random.choice(["Компания А", "Компания Б", "Организация В", "Компания Г", ""]),
-            "email_confirmed": True,
-        }
-        users.append(user)
-    return users
+
+TEXT_RESPONSES = [
+    "Отличный сервис, все понравилось!",
+    "Хорошо, но есть что улучшить",
+    "Нормально, без особых замечаний",
+    "Не очень доволен",
+    "Все отлично, рекомендую!",
+    "Хорошее качество",
+    "Удовлетворительно",
+]
+
+TEXT_FRAGMENTS = [
+    "В целом впечатления положительные.",
+    "Хотелось бы, чтобы ответы приходили быстрее.",
+    "Интерфейс понятный, но некоторые кнопки трудно найти.",
+    "Пользуюсь сервисом уже несколько месяцев.",
+    "Цены кажутся немного завышенными.",
+    "Сотрудники поддержки были вежливы и помогли разобраться.",
+    "Было бы удобно получать уведомления на почту.",
+    "Мобильная версия работает заметно медленнее.",
+    "Порекомендую коллегам и друзьям.",
+    "Несколько раз сталкивался с ошибками при оплате.",
+]
+
+DEFAULT_FIXTURES_PATH = "fixtures/test_data.json"
+SURVEYS_OF_MAIN_USER = 10
+STATUSES = ["active", "active", "active", "draft", "closed"]
+RESPONSE_WINDOW_DAYS = 30
+
+
+def survey_rng(seed, kind, survey_id):
+    """Отдельный генератор случайных чисел для опроса: опрос можно пересоздать независимо от остальных."""
+    return random.Random(f"{seed}-{kind}-{survey_id}")
 
 
-def generate_surveys(users):
+def username_for(index):
+    """Имя пользователя по номеру: сначала демо-имена, затем user_0000014 и т.д."""
+    if index < len(USERNAMES):
+        return USERNAMES[index]
+    return f"user_{index:07d}"
+
+
+def generate_user(index, rng=random):
+    """Генерирует тестового пользователя с базовыми данными."""
+    username = username_for(index)
+    return {
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": "TestPass123!",  # Общий пароль для всех тестовых пользователей
+        "display_name": username.replace("_", " ").title(),
+        "bio": f"Тестовый пользователь {index + 1}",
+        "organization": rng.choice(["Компания А", "Компания Б", "Организация В", "Компания Г", ""]),
+        "email_confirmed": True,
+    }
+
+
+def iter_users(count, seed):
+    """Лениво генерирует count пользователей."""
+    rng = random.Random(f"{seed}-users")
+    for index in range(count):
+        yield generate_user(index, rng)
+
+
+def iter_surveys(seed, num_surveys, num_users, anchor):
     """
-    Генерирует опросы для пользователей.
-    Первый пользователь (demo_user) получает 10 опросов, остальные - по 1-3.
+    Лениво генерирует опросы.
+    Первый пользователь (demo_user) получает первые 10 опросов, остальные распределяются между прочими.
     """
-    surveys = []
-    survey_id = 1
-    
-    # Первый пользователь (demo_user) получает 10 опросов
-    main_user = users[0]
-    for i in range(10):
-        survey = generate_single_survey(survey_id, main_user, i)
-        surveys.append(survey)
-        survey_id += 1
-    
-    # Остальные пользователи получают по 1-3 опроса
-    for user in users[1:]:
-        num_surveys = random.randint(1, 3)
-        for i in range(num_surveys):
-            survey = generate_single_survey(survey_id, user, i)
-            surveys.append(survey)
-            survey_id += 1
-    
-    return surveys
-
-
-def generate_single_survey(survey_id, user, index):
+    for survey_id in range(1, num_surveys + 1):
+        rng = survey_rng(seed, "survey", survey_id)
+        if survey_id <= SURVEYS_OF_MAIN_USER or num_users == 1:
+            author_index = 0
+        else:
+            author_index = rng.randrange(1, num_users)
+        yield generate_single_survey(survey_id, {"username": username_for(author_index)}, survey_id - 1, rng, anchor)
+
+
+def generate_single_survey(survey_id, user, index, rng=random, anchor=None):
     """Генерирует один опрос со случайными параметрами и вопросами."""
-    status = random.choice(["active", "active", "active", "draft", "closed"])
-    survey_type = random.choice(["anonymous", "public"])
-    
+    anchor = anchor or datetime.now()
+    status = rng.choice(STATUSES)
+    survey_type = rng.choice(["anonymous", "public"])
+
     # Для некоторых опросов добавляем дату окончания
     ends_at = None
-    if random.random() > 0.5:
-        days_ahead = random.randint(1, 30)
-        ends_at = (datetime.now() + timedelta(days=days_ahead)).isoformat()
-    
+    if rng.random() > 0.5:
+        days_ahead = rng.randint(1, 30)
+        ends_at = (anchor + timedelta(days=days_ahead)).isoformat()
+
     survey = {
         "id": survey_id,
         "author_username": user["username"],
-        "title": random.choice(SURVEY_TITLES) + (f" #{index+1}" if index > 0 else ""),
-        "description": random.choice(SURVEY_DESCRIPTIONS),
+        "title": rng.choice(SURVEY_TITLES) + (f" #{index+1}" if index > 0 else ""),
+        "description": rng.choice(SURVEY_DESCRIPTIONS),
         "survey_type": survey_type,
         "status": status,
         "ends_at": ends_at,
-        "welcome_message": random.choice(["Добро пожаловать!", "Спасибо за участие!", ""]),
-        "thank_you_message": random.choice(["Спасибо за ваш ответ!", "Ваше мнение важно для нас!", ""]),
+        "welcome_message": rng.choice(["Добро пожаловать!", "Спасибо за участие!", ""]),
+        "thank_you_message": rng.choice(["Спасибо за ваш ответ!", "Ваше мнение важно для нас!", ""]),
         "questions": [],
     }
-    
+
     # Генерируем вопросы
-    num_questions = random.randint(3, 6)
+    num_questions = rng.randint(3, 6)
     question_types = ["single", "multiple", "text", "rating"]
-    
+
     for q_order in range(num_questions):
-        question_type = random.choice(question_types)
-        question = generate_question(q_order, question_type)
+        question_type = rng.choice(question_types)
+        question = generate_question(q_order, question_type, rng)
         survey["questions"].append(question)
-    
+
     return survey
 
 
-def generate_question(order, question_type):
+def generate_question(order, question_type, rng=random):
     """Генерирует один вопрос указанного типа с вариантами ответов (если требуется)."""
     question = {
         "order": order,
-        "text": random.choice(QUESTION_TEXTS[question_type]),
+        "text": rng.choice(QUESTION_TEXTS[question_type]),
         "question_type": question_type,
-        "is_required": random.choice([True, True, True, False]),  # Чаще обязательные
+        "is_required": rng.choice([True, True, True, False]),  # Чаще обязательные
         "max_text_length": 1000,
         "choices": [],
     }
-    
+
     # Добавляем варианты ответов для single и multiple
     if question_type in ["single", "multiple"]:
-        choice_set = random.choice(CHOICE_LABELS[question_type])
+        choice_set = rng.choice(CHOICE_LABELS[question_type])
         for c_order, label in enumerate(choice_set):
             question["choices"].append({
                 "order": c_order,
                 "label": label,
             })
-    
+
     return question
 
 
-def generate_responses(surveys, users):
+def plan_response_counts(seed, surveys, num_users, total=None):
     """
-    Генерирует ответы на опросы.
-    Гарантирует, что каждый авторизованный пользователь отвечает на опрос только один раз.
-    Для анонимных опросов допускается несколько анонимных ответов.
+    Определяет число ответов для каждого опроса (черновики не получают ответов).
+    Без total - по 5-20 ответов на опрос. С total - ответы распределяются по закону Парето:
+    небольшая доля опросов собирает большую часть голосов. Публичные опросы принимают
+    не больше num_users ответов (один на пользователя), излишек уходит анонимным опросам;
+    если открытых анонимных опросов нет, сумма будет меньше total (main сообщает о недостаче).
+    Возвращает список чисел по порядку опросов (память - O(число опросов)).
     """
-    responses = []
-    response_id = 1
-    
+    rng = random.Random(f"{seed}-plan")
+    weights = []
+    public = []
     for survey in surveys:
-        # Пропускаем черновики
-        if survey["status"] == "draft":
-            continue
-        
-        answered_users = set()  # Отслеживание авторизованных пользователей, уже ответивших
-        anonymous_count = 0
-        
-        num_responses = random.randint(5, 20)
-        
-        # Для публичных опросов - только авторизованные пользователи
-        # Для анонимных - авторизованные + ограниченное количество анонимных
-        if survey["survey_type"] == "public":
-            available_users = users
-            max_anonymous = 0
+        weights.append(0.0 if survey["status"] == "draft" else rng.paretovariate(1.16))
+        public.append(survey["survey_type"] == "public")
+    if total is None:
+        return [min(rng.randint(5, 20), num_users) if public[i] else rng.randint(5, 20) if weight else 0
+                for i, weight in enumerate(weights)]
+
+    counts = [0] * len(weights)
+    remaining = total
+    open_slots = [i for i, weight in enumerate(weights) if weight]
+    while remaining and open_slots:
+        weight_sum = sum(weights[i] for i in open_slots)
+        shares = {i: int(remaining * weights[i] / weight_sum) for i in open_slots}
+        # Остаток от округления отдаем самому популярному опросу
+        shares[max(open_slots, key=lambda i: weights[i])] += remaining - sum(shares.values())
+        remaining = 0
+        for i, share in shares.items():
+            capacity = num_users - counts[i] if public[i] else share
+            counts[i] += min(share, capacity)
+            remaining += share - min(share, capacity)
+        open_slots = [i for i in open_slots if not public[i] or counts[i] < num_users]
+    return counts
+
+
+def question_profile(question, rng):
+    """
+    Параметры распределения ответов на вопрос:
+    веса вариантов по закону Ципфа (в случайном порядке) и "центр" оценок для рейтинга.
+    """
+    if question["choices"]:
+        ranks = list(range(1, len(question["choices"]) + 1))
+        rng.shuffle(ranks)
+        return {"weights": [1 / rank ** 1.2 for rank in ranks]}
+    if question["question_type"] == "rating":
+        center = rng.uniform(2.5, 4.6)
+        return {"weights": [math.exp(-((value - center) ** 2) / 1.5) for value in range(1, 6)]}
+    return {}
+
+
+def make_time_sampler(rng, anchor):
+    """
+    Возвращает функцию, выдающую время отправки ответа.
+    Большая часть голосов приходит в первые часы после одной из 1-4 "рассылок", остальные - равномерно.
+    """
+    window = RESPONSE_WINDOW_DAYS * 24 * 3600
+    start = anchor - timedelta(seconds=window)
+    bursts = [rng.uniform(0, window) for _ in range(rng.randint(1, 4))]
+
+    def sample():
+        if rng.random() < 0.75:
+            offset = rng.choice(bursts) + rng.expovariate(1 / 3600)
         else:
-            available_users = users
-            max_anonymous = random.randint(3, 8)
-        
-        attempts = 0
-        max_attempts = num_responses * 5  # Ограничение попыток
-        
-        survey_responses = [r for r in responses if r["survey_id"] == survey["id"]]
-        
-        while len(survey_responses) < num_responses and attempts < max_attempts:
-            attempts += 1
-            
-            # Решение: создать анонимный ответ или от пользователя
-            use_anonymous = (
-                survey["survey_type"] == "anonymous" and 
-                anonymous_count < max_anonymous and
-                random.random() < 0.3
-            )
-            
-            if use_anonymous:
-                user = None
-                user_username = None
-                anonymous_count += 1
-            else:
-                # Выбираем случайного пользователя из доступных
-                if not available_users:
-                    break
-                
-                # Выбираем только из пользователей, которые еще не ответили
-                available = [u for u in available_users if u["username"] not in answered_users]
-                if not available:
-                    # Если все пользователи ответили, добавляем анонимные (если возможно)
-                    if anonymous_count < max_anonymous:
-                        user = None
-                        user_username = None
-                        anonymous_count += 1
-                    else:
-                        break
-                else:
-                    user = random.choice(available)
-                    user_username = user["username"]
-                    answered_users.add(user_username)
-            
-            response = {
-                "id": response_id,
-                "survey_id": survey["id"],
-                "user_username": user_username,
-                "is_anonymous": survey["survey_type"] == "anonymous" or user is None,
-                "submitted_at": (datetime.now() - timedelta(days=random.randint(0, 30))).isoformat(),
-                "duration_seconds": random.randint(30, 300),
-                "answers": [],
-            }
-            
-            # Генерируем ответы на вопросы
-            for question in survey["questions"]:
-                answer = generate_answer(question)
-                response["answers"].append(answer)
-            
-            responses.append(response)
-            survey_responses.append(response)
-            response_id += 1
-    
-    return responses
+            offset = rng.uniform(0, window)
+        return start + timedelta(seconds=min(offset, window))
+
+    return sample
 
 
-def generate_answer(question):
+def iter_survey_responses(survey, count, start_id=1, rng=random, num_users=0, anchor=None):
+    """
+    Лениво генерирует count ответов на один опрос.
+    Авторизованные ответы получают разных пользователей (один ответ на пользователя),
+    публичные опросы принимают только авторизованные ответы, поэтому их число ограничено num_users.
+    """
+    anchor = anchor or datetime.now()
+    if survey["survey_type"] == "public":
+        count = min(count, num_users)
+        authenticated = count
+    else:
+        authenticated = min(int(count * rng.uniform(0.1, 0.7)), num_users)
+    voters = iter(rng.sample(range(num_users), authenticated)) if authenticated else iter(())
+    profiles = [question_profile(question, rng) for question in survey["questions"]]
+    submitted_at = make_time_sampler(rng, anchor)
+
+    remaining_authenticated = authenticated
+    for offset in range(count):
+        # Авторизованные и анонимные ответы перемешаны равномерно без хранения списка
+        use_user = remaining_authenticated and rng.random() < remaining_authenticated / (count - offset)
+        user_username = None
+        if use_user:
+            user_username = username_for(next(voters))
+            remaining_authenticated -= 1
+        yield {
+            "id": start_id + offset,
+            "survey_id": survey["id"],
+            "user_username": user_username,
+            "is_anonymous": survey["survey_type"] == "anonymous" or user_username is None,
+            "submitted_at": submitted_at().isoformat(),
+            "duration_seconds": int(min(rng.lognormvariate(4.5, 0.6), 3600)),
+            "answers": [
+                generate_answer(question, rng, profile)
+                for question, profile in zip(survey["questions"], profiles)
+            ],
+        }
+
+
+def _weighted_sample(rng, weights, k):
+    """Выбор k различных индексов с вероятностями, пропорциональными весам."""
+    indexes = list(range(len(weights)))
+    weights = list(weights)
+    picked = []
+    for _ in range(k):
+        index = rng.choices(range(len(indexes)), weights=weights)[0]
+        picked.append(indexes.pop(index))
+        weights.pop(index)
+    return picked
+
+
+def generate_long_text(rng, max_length):
+    """Текстовый ответ логнормальной длины: чаще короткий, иногда развернутый."""
+    target = min(max_length, int(rng.lognormvariate(3.8, 1.1)))
+    if target < 40:
+        return rng.choice(TEXT_RESPONSES)[:max_length]
+    parts = []
+    length = 0
+    while length < target:
+        fragment = rng.choice(TEXT_FRAGMENTS)
+        parts.append(fragment)
+        length += len(fragment) + 1
+    return " ".join(parts)[:max_length]
+
+
+def generate_answer(question, rng=random, profile=None):
     """Генерирует ответ на вопрос в зависимости от типа вопроса."""
+    profile = profile or {}
+    weights = profile.get("weights")
     answer = {
         "question_order": question["order"],
         "question_type": question["question_type"],
     }
-    
+
     if question["question_type"] == "single":
         # Выбираем один вариант
         if question["choices"]:
-            answer["selected_choice_order"] = random.randint(0, len(question["choices"]) - 1)
-    
+            answer["selected_choice_order"] = _weighted_sample(rng, weights or [1] * len(question["choices"]), 1)[0]
+
     elif question["question_type"] == "multiple":
         # Выбираем 1-3 варианта
         if question["choices"]:
-            num_choices = random.randint(1, min(3, len(question["choices"])))
-            selected = random.sample(range(len(question["choices"])), num_choices)
-            answer["selected_choice_orders"] = selected
-    
+            num_choices = rng.randint(1, min(3, len(question["choices"])))
+            answer["selected_choice_orders"] = _weighted_sample(
+                rng, weights or [1] * len(question["choices"]), num_choices
+            )
+
     elif question["question_type"] == "text":
-        # Генерируем текстовый ответ
-        text_responses = [
-            "Отличный сервис, все понравилось!",
-            "Хорошо, но есть что улучшить",
-            "Нормально, без особых замечаний",
-            "Не очень доволен",
-            "Все отлично, рекомендую!",
-            "Хорошее качество",
-            "Удовлетворительно",
-        ]
-        answer["text_answer"] = random.choice(text_responses)
-    
+        answer["text_answer"] = generate_long_text(rng, question["max_text_length"])
+
     elif question["question_type"] == "rating":
-        # Генерируем оценку от 1 до 5
-        answer["rating_value"] = random.randint(1, 5)
-    
+        # Оценка от 1 до 5
+        answer["rating_value"] = rng.choices(range(1, 6), weights=weights)[0] if weights else rng.randint(1, 5)
+
     return answer
 
 
+def iter_dataset(seed, num_users, num_surveys, response_counts, anchor):
+    """
+    Поток записей в порядке, пригодном для загрузки: пользователи, затем каждый опрос вместе с его ответами.
+    Каждая запись - (тип, данные).
+    """
+    for user in iter_users(num_users, seed):
+        yield "user", user
+    response_id = 1
+    surveys = iter_surveys(seed, num_surveys, num_users, anchor)
+    for survey, count in zip(surveys, response_counts):
+        yield "survey", survey
+        rng = survey_rng(seed, "responses", survey["id"])
+        for response in iter_survey_responses(survey, count, response_id, rng, num_users, anchor):
+            yield "response", response
+            response_id += 1
+
+
+class ChunkedWriter:
+    """Пишет строки в файл, переходя к новому файлу (name-00001.ext, ...) каждые chunk_size записей."""
+
+    def __init__(self, path, chunk_size=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.paths = []
+        self._file = None
+        self._written = 0
+
+    def _open_next(self):
+        if self._file:
+            self._file.close()
+        path = self.path
+        if self.chunk_size:
+            stem, dot, ext = self.path.rpartition(".")
+            path = f"{stem or ext}-{len(self.paths) + 1:05d}{dot}{ext if stem else ''}"
+        self.paths.append(path)
+        self._file = open(path, "w", encoding="utf-8")
+        self._written = 0
+
+    def write(self, line):
+        if self._file is None or (self.chunk_size and self._written >= self.chunk_size):
+            self._open_next()
+        self._file.write(line)
+        self._file.write("\n")
+        self._written += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+def write_ndjson(records, path, chunk_size=None):
+    """Пишет записи построчно: {"type": "...", ...данные}. Возвращает счетчики и список файлов."""
+    counts = {"user": 0, "survey": 0, "response": 0}
+    writer = ChunkedWriter(path, chunk_size)
+    try:
+        for kind, data in records:
+            writer.write(json.dumps({"type": kind, **data}, ensure_ascii=False))
+            counts[kind] += 1
+    finally:
+        writer.close()
+    return counts, writer.paths
+
+
+def write_json(records, path):
+    """
+    Пишет один JSON-документ {"users": [...], "surveys": [...], "responses": [...]} потоково.
+    Опросы и ответы чередуются в потоке, поэтому ответы сначала пишутся во временный файл.
+    """
+    counts = {"user": 0, "survey": 0, "response": 0}
+    responses_path = f"{path}.responses.tmp"
+    with open(path, "w", encoding="utf-8") as out, open(responses_path, "w+", encoding="utf-8") as responses:
+        out.write('{\n  "users": [')
+        section = "user"
+        for kind, data in records:
+            line = json.dumps(data, ensure_ascii=False)
+            if kind == "response":
+                responses.write(("," if counts[kind] else "") + "\n    " + line)
+            else:
+                if kind != section:
+                    out.write('\n  ],\n  "surveys": [')
+                    section = kind
+                out.write(("," if counts[kind] else "") + "\n    " + line)
+            counts[kind] += 1
+        if section == "user":
+            out.write('\n  ],\n  "surveys": [')
+        out.write('\n  ],\n  "responses": [')
+        responses.seek(0)
+        for chunk in iter(lambda: responses.read(1 << 20), ""):
+            out.write(chunk)
+        out.write("\n  ]\n}\n")
+    os.remove(responses_path)
+    return counts, [path]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Генерация тестовых данных QuickVote")
+    parser.add_argument("--seed", type=int, help="Seed для воспроизводимой генерации (по умолчанию случайный)")
+    parser.add_argument("--anchor", help='"Текущая" дата в ISO формате (по умолчанию - сегодня 00:00)')
+    parser.add_argument("--users", type=int, default=len(USERNAMES), help="Количество пользователей")
+    parser.add_argument("--surveys", type=int, help="Количество опросов (по умолчанию 10 + 2 на пользователя)")
+    parser.add_argument(
+        "--responses",
+        type=int,
+        help="Общее количество ответов (по умолчанию 5-20 на опрос). Публичный опрос получает не больше "
+        "--users ответов, излишек уходит анонимным; без них ответов будет меньше запрошенного",
+    )
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json", help="Формат вывода")
+    parser.add_argument("--output", help=f"Файл вывода (по умолчанию {DEFAULT_FIXTURES_PATH} или .ndjson)")
+    parser.add_argument("--chunk-size", type=int, help="Для ndjson: записей в одном файле")
+    args = parser.parse_args()
+    if args.users < 1:
+        parser.error("--users должно быть не меньше 1")
+    if args.chunk_size and args.format != "ndjson":
+        parser.error("--chunk-size поддерживается только для --format ndjson")
+    return args
+
+
 def main():
-    """Основная функция: генерирует все данные и сохраняет в JSON файл."""
-    print("Генерация тестовых данных...")
-    
-    # Генерируем данные
-    users = generate_users()
-    surveys = generate_surveys(users)
-    responses = generate_responses(surveys, users)
-    
-    # Сохраняем в JSON файлы
-    output = {
-        "users": users,
-        "surveys": surveys,
-        "responses": responses,
-    }
-    
-    with open("fixtures/test_data.json", "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
-    
+    """Основная функция: генерирует данные и потоково сохраняет их в файл."""
+    args = parse_args()
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    if args.anchor:
+        anchor = datetime.fromisoformat(args.anchor)
+    else:
+        anchor = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    num_surveys = args.surveys if args.surveys is not None else SURVEYS_OF_MAIN_USER + 2 * (args.users - 1)
+    output = args.output or (DEFAULT_FIXTURES_PATH if args.format == "json" else "fixtures/test_data.ndjson")
+
+    print(f"Генерация тестовых данных (seed={seed}, anchor={anchor.isoformat()})...")
+
+    response_counts = plan_response_counts(
+        seed, iter_surveys(seed, num_surveys, args.users, anchor), args.users, args.responses
+    )
+    planned = sum(response_counts)
+    if args.responses is not None and planned < args.responses:
+        print(
+            f"⚠ Запрошено ответов: {args.responses}, будет создано: {planned}. Публичные опросы принимают "
+            f"не больше {args.users} ответов (по одному на пользователя), а открытых анонимных опросов нет - "
+            "увеличьте --users или --surveys"
+        )
+    records = iter_dataset(seed, args.users, num_surveys, response_counts, anchor)
+    if args.format == "ndjson":
+        counts, paths = write_ndjson(records, output, args.chunk_size)
+    else:
+        counts, paths = write_json(records, output)
+
     print(f"✓ Сгенерировано:")
-    print(f"  - Пользователей: {len(users)}")
-    print(f"  - Опросов: {len(surveys)}")
-    print(f"  - Ответов: {len(responses)}")
-    print(f"✓ Данные сохранены в fixtures/test_data.json")
+    print(f"  - Пользователей: {counts['user']}")
+    print(f"  - Опросов: {counts['survey']}")
+    print(f"  - Ответов: {counts['response']}")
+    print(f"✓ Данные сохранены в {', '.join(paths)}")
 
 
 if __name__ == "__main__":
     main()
-
@@ -1,216 +1,387 @@
 """
-Скрипт для загрузки тестовых данных из JSON фикстур в базу данных.
+Скрипт для загрузки тестовых данных из JSON/NDJSON фикстур в базу данных.
 Создает пользователей, опросы с вопросами и ответы на опросы.
 Пропускает уже существующих пользователей и дубликаты ответов.
+
+Данные вставляются пачками через bulk_create внутри транзакций, существующие пользователи
+и дубликаты проверяются множествами, а не запросом на каждую строку. Пароли хешируются
+в пуле процессов. NDJSON (см. generate_fixtures.py --format ndjson) читается потоково,
+поэтому память не зависит от объема файла.
+
+Сигналы post_save при bulk_create не срабатывают: уведомления не отправляются,
+а агрегаты активности пересчитываются один раз в конце загрузки.
+
+Примеры:
+    python scripts/load_fixtures.py
+    python scripts/load_fixtures.py fixtures/big-00001.ndjson fixtures/big-00002.ndjson --batch-size 5000
 """
+
+import argparse
+import json
 import os
 import sys
-import json
-import django
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+import django
+
 # Настройка Django
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 django.setup()
 
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
 from django.utils import timezone
+
+from analytics.rollups import rebuild_rollups
 from surveys.models import Survey, Question, Choice
 from responses.models import SurveyResponse, Answer
+from responses.packing import encode_answers
+from surveys.schema import SurveySchema
 
 User = get_user_model()
 
+DEFAULT_FIXTURES_PATH = "fixtures/test_data.json"
+DEFAULT_BATCH_SIZE = 2000
+
+
+def iter_records(paths):
+    """
+    Поток записей (тип, данные) из файлов фикстур.
+    .json - прежний формат {"users", "surveys", "responses"} (читается целиком),
+    остальные файлы - NDJSON с полем "type", читаются построчно.
+    """
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                data = json.load(f)
+                for kind, key in (("user", "users"), ("survey", "surveys"), ("response", "responses")):
+                    for item in data.get(key, []):
+                        yield kind, item
+                continue
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.pop("type"), record
+
+
+def _aware(value):
+    """Преобразует ISO-строку из фикстуры в aware datetime."""
+    moment = datetime.fromisoformat(value)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+class BulkLoader:
+    """
+    Накопитель записей фикстур с пакетной вставкой.
+    Хранит только отображения id фикстуры -> первичный ключ (пользователи, опросы, вопросы, варианты).
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, hash_workers=None, reuse_hashes=False, verbose=True):
+        self.batch_size = batch_size
+        self.hash_workers = hash_workers
+        self.reuse_hashes = reuse_hashes
+        self.verbose = verbose
+        self.user_ids = {}
+        self.surveys = {}
+        self.seen_voters = set()
+        self.pending_users = []
+        self.pending_surveys = []
+        self.pending_responses = []
+        self.stats = {
+            "users": 0,
+            "users_skipped": 0,
+            "surveys": 0,
+            "surveys_skipped": 0,
+            "responses": 0,
+            "responses_skipped": 0,
+        }
 
-def load_users(users_data):
-    """Загружает пользователей в базу данных. Пропускает уже существующих."""
-    print("Загрузка пользователей...")
-    user_map = {}
-    
-    for user_data in users_data:
-        username = user_data["username"]
-        
-        # Проверяем, существует ли пользователь
-        if User.objects.filter(username=username).exists():
-            print(f"  ⚠ Пользователь {username} уже существует, пропускаем")
-            user = User.objects.get(username=username)
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    def add(self, kind, data):
+        """Добавляет запись; пачки сбрасываются в БД по мере заполнения и в порядке зависимостей."""
+        if kind == "user":
+            self.pending_users.append(data)
+            if len(self.pending_users) >= self.batch_size:
+                self.flush_users()
+        elif kind == "survey":
+            self.flush_users()
+            self.pending_surveys.append(data)
+            if len(self.pending_surveys) >= self.batch_size:
+                self.flush_surveys()
+        elif kind == "response":
+            self.flush_users()
+            self.flush_surveys()
+            self.pending_responses.append(data)
+            if len(self.pending_responses) >= self.batch_size:
+                self.flush_responses()
+
+    def finish(self):
+        """Сбрасывает оставшиеся пачки."""
+        self.flush_users()
+        self.flush_surveys()
+        self.flush_responses()
+        return self.stats
+
+    def _hash_passwords(self, passwords):
+        """Хеширует пароли в пуле процессов. При reuse_hashes одинаковые пароли хешируются один раз (общая соль)."""
+        unique = list(dict.fromkeys(passwords)) if self.reuse_hashes else passwords
+        if self.hash_workers == 0 or len(unique) < 2:
+            hashes = [make_password(password) for password in unique]
         else:
-            user = User.objects.create_user(
-                username=username,
-                email=user_data["email"],
-                password=user_data["password"],
-                display_name=user_data.get("display_name", ""),
-                bio=user_data.get("bio", ""),
-                organization=user_data.get("organization", ""),
-                email_confirmed=user_data.get("email_confirmed", False),
+            with ProcessPoolExecutor(max_workers=self.hash_workers) as pool:
+                hashes = list(pool.map(make_password, unique, chunksize=max(1, len(unique) // 32)))
+        if self.reuse_hashes:
+            by_password = dict(zip(unique, hashes))
+            return [by_password[password] for password in passwords]
+        return hashes
+
+    def flush_users(self):
+        """Создает пользователей пачкой, пропуская существующих (одна выборка на пачку)."""
+        if not self.pending_users:
+            return
+        batch, self.pending_users = self.pending_users, []
+        usernames = [data["username"] for data in batch]
+        existing = dict(User.objects.filter(username__in=usernames).values_list("username", "id"))
+        self.user_ids.update(existing)
+        new_users = [data for data in batch if data["username"] not in existing]
+        self.stats["users_skipped"] += len(batch) - len(new_users)
+
+        hashes = self._hash_passwords([data["password"] for data in new_users])
+        with transaction.atomic():
+            created = User.objects.bulk_create(
+                [
+                    User(
+                        username=data["username"],
+                        email=data["email"],
+                        password=password_hash,
+                        display_name=data.get("display_name", ""),
+                        bio=data.get("bio", ""),
+                        organization=data.get("organization", ""),
+                        email_confirmed=data.get("email_confirmed", False),
+                    )
+                    for data, password_hash in zip(new_users, hashes)
+                ],
+                batch_size=self.batch_size,
             )
-            print(f"  ✓ Создан пользователь: {username}")
-        
-        user_map[username] = user
-    
-    return user_map
-
-
-def load_surveys(surveys_data, user_map):
-    """Загружает опросы с вопросами и вариантами ответов в базу данных."""
-    print("\nЗагрузка опросов...")
-    survey_map = {}
-    
-    for survey_data in surveys_data:
-        author_username = survey_data["author_username"]
-        author = user_map.get(author_username)
-        
-        if not author:
-            print(f"  ⚠ Автор {author_username} не найден, пропускаем опрос")
-            continue
-        
-        # Создаем опрос
-        ends_at = None
-        if survey_data.get("ends_at"):
-            ends_at = timezone.make_aware(datetime.fromisoformat(survey_data["ends_at"]))
-        
-        survey = Survey.objects.create(
-            author=author,
-            title=survey_data["title"],
-            description=survey_data.get("description", ""),
-            survey_type=survey_data["survey_type"],
-            status=survey_data["status"],
-            ends_at=ends_at,
-            welcome_message=survey_data.get("welcome_message", ""),
-            thank_you_message=survey_data.get("thank_you_message", ""),
+        self.user_ids.update((user.username, user.id) for user in created)
+        self.stats["users"] += len(created)
+        self.log(f"  ✓ Пользователей: создано {len(created)}, уже существовало {len(existing)}")
+
+    @transaction.atomic
+    def flush_surveys(self):
+        """Создает опросы, вопросы и варианты ответов тремя bulk_create на пачку."""
+        if not self.pending_surveys:
+            return
+        batch, self.pending_surveys = self.pending_surveys, []
+        surveys_data = []
+        for data in batch:
+            author_id = self.user_ids.get(data["author_username"])
+            if author_id is None:
+                self.stats["surveys_skipped"] += 1
+                continue
+            surveys_data.append((data, author_id))
+
+        surveys = Survey.objects.bulk_create(
+            [
+                Survey(
+                    author_id=author_id,
+                    title=data["title"],
+                    description=data.get("description", ""),
+                    survey_type=data["survey_type"],
+                    status=data["status"],
+                    ends_at=_aware(data["ends_at"]) if data.get("ends_at") else None,
+                    welcome_message=data.get("welcome_message", ""),
+                    thank_you_message=data.get("thank_you_message", ""),
+                    answer_storage=data.get("answer_storage", Survey.STORAGE_ROWS),
+                )
+                for data, author_id in surveys_data
+            ],
+            batch_size=self.batch_size,
         )
-        
-        survey_map[survey_data["id"]] = survey
-        
-        # Создаем вопросы
-        for question_data in survey_data.get("questions", []):
-            question = Question.objects.create(
-                survey=survey,
-                text=question_data["text"],
-                question_type=question_data["question_type"],
-                is_required=question_data.get("is_required", True),
-                order=question_data.get("order", 0),
-                max_text_length=question_data.get("max_text_length", 1000),
-            )
-            
-            # Создаем варианты ответов
-            for choice_data in question_data.get("choices", []):
-                Choice.objects.create(
-                    question=question,
-                    label=choice_data["label"],
-                    order=choice_data.get("order", 0),
+
+        questions = []
+        for survey, (data, _) in zip(surveys, surveys_data):
+            for question_data in data.get("questions", []):
+                questions.append(
+                    Question(
+                        survey=survey,
+                        text=question_data["text"],
+                        question_type=question_data["question_type"],
+                        is_required=question_data.get("is_required", True),
+                        order=question_data.get("order", 0),
+                        max_text_length=question_data.get("max_text_length", 1000),
+                    )
                 )
-        
-        num_questions = len(survey_data.get("questions", []))
-        print(f"  ✓ Создан опрос: {survey.title} (вопросов: {num_questions})")
-    
-    return survey_map
-
-
-def load_responses(responses_data, survey_map, user_map):
-    """Загружает ответы на опросы. Пропускает дубликаты от одного пользователя."""
-    print("\nЗагрузка ответов...")
-    
-    for response_data in responses_data:
-        survey_id = response_data["survey_id"]
-        survey = survey_map.get(survey_id)
-        
-        if not survey:
-            print(f"  ⚠ Опрос с ID {survey_id} не найден, пропускаем ответ")
-            continue
-        
-        # Получаем пользователя
-        user = None
-        if response_data.get("user_username"):
-            user = user_map.get(response_data["user_username"])
-        
-        # Пропускаем дубликаты: один пользователь может ответить на опрос только один раз
-        if user and SurveyResponse.objects.filter(survey=survey, user=user).exists():
-            print(f"  ⚠ Ответ от пользователя {user.username} на опрос {survey.title} уже существует, пропускаем")
-            continue
-        
-        # Создаем ответ
-        submitted_at = timezone.now()
-        if response_data.get("submitted_at"):
-            submitted_at = timezone.make_aware(datetime.fromisoformat(response_data["submitted_at"]))
-        
-        response = SurveyResponse.objects.create(
-            survey=survey,
-            user=user,
-            is_anonymous=response_data.get("is_anonymous", True),
-            submitted_at=submitted_at,
-            duration_seconds=response_data.get("duration_seconds", 0),
+        Question.objects.bulk_create(questions, batch_size=self.batch_size)
+
+        choices = []
+        question_iter = iter(questions)
+        for survey, (data, _) in zip(surveys, surveys_data):
+            entry = {"survey": survey, "questions": {}, "choices": {}}
+            for question_data in data.get("questions", []):
+                question = next(question_iter)
+                entry["questions"][question.order] = question.id
+                for choice_data in question_data.get("choices", []):
+                    choice = Choice(question=question, label=choice_data["label"], order=choice_data.get("order", 0))
+                    choices.append((entry, question.order, choice))
+            self.surveys[data["id"]] = entry
+        Choice.objects.bulk_create([choice for _, _, choice in choices], batch_size=self.batch_size)
+        for entry, question_order, choice in choices:
+            entry["choices"][(question_order, choice.order)] = choice.id
+        for survey, (data, _) in zip(surveys, surveys_data):
+            if survey.answer_storage == Survey.STORAGE_PACKED:
+                self.surveys[data["id"]]["schema"] = self._schema(self.surveys[data["id"]])
+
+        self.stats["surveys"] += len(surveys)
+        self.log(f"  ✓ Опросов: {len(surveys)} (вопросов {len(questions)}, вариантов {len(choices)})")
+
+    @staticmethod
+    def _schema(entry):
+        """Схема упакованного опроса из загруженных id (тот же порядок, что в SurveySchema.for_survey)."""
+        choices = {}
+        for (question_order, choice_order), choice_id in sorted(entry["choices"].items()):
+            choices.setdefault(question_order, []).append(choice_id)
+        questions = Question.objects.filter(id__in=entry["questions"].values()).order_by("order", "id")
+        return SurveySchema(
+            (question.id, question.question_type, choices.get(question.order, [])) for question in questions
         )
-        
-        # Создаем ответы на вопросы
-        answers_created = 0
-        for answer_data in response_data.get("answers", []):
-            question_order = answer_data["question_order"]
-            
-            # Находим вопрос
-            question = Question.objects.filter(
-                survey=survey,
-                order=question_order
-            ).first()
-            
-            if not question:
+
+    def _packed_answers(self, data, entry):
+        """Кодирует ответы фикстуры одним blob'ом по схеме опроса."""
+        answers = {}
+        for answer_data in data.get("answers", []):
+            order = answer_data["question_order"]
+            question_id = entry["questions"].get(order)
+            if question_id is None:
                 continue
-            
-            # Создаем ответ
-            answer = Answer.objects.create(
-                response=response,
-                question=question,
-                text_answer=answer_data.get("text_answer", ""),
-                rating_value=answer_data.get("rating_value"),
-            )
-            
-            # Добавляем выбранные варианты
+            choice_orders = answer_data.get("selected_choice_orders") or []
             if answer_data.get("selected_choice_order") is not None:
-                choice_order = answer_data["selected_choice_order"]
-                choice = question.choices.filter(order=choice_order).first()
-                if choice:
-                    answer.selected_choices.add(choice)
-            
-            elif answer_data.get("selected_choice_orders"):
-                for choice_order in answer_data["selected_choice_orders"]:
-                    choice = question.choices.filter(order=choice_order).first()
-                    if choice:
-                        answer.selected_choices.add(choice)
-            
-            answers_created += 1
-        
-        if answers_created > 0:
-            print(f"  ✓ Создан ответ на опрос: {survey.title} ({answers_created} ответов на вопросы)")
-    
-    print(f"\n✓ Всего загружено ответов: {SurveyResponse.objects.count()}")
+                choice_orders = [answer_data["selected_choice_order"]]
+            answers[question_id] = {
+                "choice_ids": [entry["choices"][(order, c)] for c in choice_orders if (order, c) in entry["choices"]],
+                "text_answer": answer_data.get("text_answer", ""),
+                "rating_value": answer_data.get("rating_value"),
+            }
+        return encode_answers(entry["schema"], answers)
+
+    @transaction.atomic
+    def flush_responses(self):
+        """Создает ответы, ответы на вопросы и выбранные варианты пачкой."""
+        if not self.pending_responses:
+            return
+        batch, self.pending_responses = self.pending_responses, []
+        rows = []
+        for data in batch:
+            entry = self.surveys.get(data["survey_id"])
+            user_id = self.user_ids.get(data["user_username"]) if data.get("user_username") else None
+            if entry is None:
+                self.stats["responses_skipped"] += 1
+                continue
+            # Один пользователь может ответить на опрос только один раз
+            if user_id is not None:
+                voter = (entry["survey"].id, user_id)
+                if voter in self.seen_voters:
+                    self.stats["responses_skipped"] += 1
+                    continue
+                self.seen_voters.add(voter)
+            response = SurveyResponse(
+                survey=entry["survey"],
+                user_id=user_id,
+                is_anonymous=data.get("is_anonymous", True),
+                duration_seconds=data.get("duration_seconds", 0),
+                packed_answers=self._packed_answers(data, entry) if "schema" in entry else None,
+            )
+            rows.append((response, data, entry))
+
+        responses = SurveyResponse.objects.bulk_create([row[0] for row in rows], batch_size=self.batch_size)
+        # auto_now_add перезаписывает время при вставке, поэтому исходное время восстанавливается отдельно
+        for response, data, _ in rows:
+            response.submitted_at = _aware(data["submitted_at"]) if data.get("submitted_at") else timezone.now()
+        SurveyResponse.objects.bulk_update(responses, ["submitted_at"], batch_size=500)
+
+        answers = []
+        selected = []
+        for response, data, entry in rows:
+            if "schema" in entry:
+                continue
+            for answer_data in data.get("answers", []):
+                order = answer_data["question_order"]
+                question_id = entry["questions"].get(order)
+                if question_id is None:
+                    continue
+                answers.append(
+                    Answer(
+                        response=response,
+                        question_id=question_id,
+                        text_answer=answer_data.get("text_answer", ""),
+                        rating_value=answer_data.get("rating_value"),
+                    )
+                )
+                choice_orders = answer_data.get("selected_choice_orders") or []
+                if answer_data.get("selected_choice_order") is not None:
+                    choice_orders = [answer_data["selected_choice_order"]]
+                selected.append([entry["choices"][(order, c)] for c in choice_orders if (order, c) in entry["choices"]])
+        Answer.objects.bulk_create(answers, batch_size=self.batch_size)
+        Through = Answer.selected_choices.through
+        Through.objects.bulk_create(
+            [
+                Through(answer_id=answer.id, choice_id=choice_id)
+                for answer, choice_ids in zip(answers, selected)
+                for choice_id in choice_ids
+            ],
+            batch_size=self.batch_size,
+        )
+        self.stats["responses"] += len(responses)
+        self.log(f"  ✓ Ответов: {self.stats['responses']} (ответов на вопросы в пачке: {len(answers)})")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Загрузка тестовых данных QuickVote")
+    parser.add_argument("paths", nargs="*", default=[DEFAULT_FIXTURES_PATH], help="Файлы фикстур (.json или .ndjson)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Размер пачки для bulk_create")
+    parser.add_argument("--hash-workers", type=int, help="Процессов для хеширования паролей (0 - без пула)")
+    parser.add_argument(
+        "--reuse-password-hashes",
+        action="store_true",
+        help="Хешировать одинаковые пароли один раз (только для тестовых данных)",
+    )
+    parser.add_argument("--skip-rollups", action="store_true", help="Не пересчитывать агрегаты активности")
+    return parser.parse_args()
 
 
 def main():
-    """Основная функция: загружает все данные из JSON файла в базу данных."""
-    fixtures_file = "fixtures/test_data.json"
-    
-    if not os.path.exists(fixtures_file):
-        print(f"❌ Файл {fixtures_file} не найден!")
+    """Основная функция: потоково загружает все данные из фикстур в базу данных."""
+    args = parse_args()
+    missing = [path for path in args.paths if not os.path.exists(path)]
+    if missing:
+        print(f"❌ Файл {', '.join(missing)} не найден!")
         print("Сначала запустите: python scripts/generate_fixtures.py")
         return
-    
+
     print("Загрузка тестовых данных из фикстур...\n")
-    
-    with open(fixtures_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
-    # Загружаем данные
-    user_map = load_users(data["users"])
-    survey_map = load_surveys(data["surveys"], user_map)
-    load_responses(data["responses"], survey_map, user_map)
-    
-    print("\n✓ Загрузка завершена успешно!")
+    started = time.perf_counter()
+    loader = BulkLoader(
+        batch_size=args.batch_size, hash_workers=args.hash_workers, reuse_hashes=args.reuse_password_hashes
+    )
+    for kind, data in iter_records(args.paths):
+        loader.add(kind, data)
+    stats = loader.finish()
+    if not args.skip_rollups:
+        rebuild_rollups()
+
+    print(f"\n✓ Загрузка завершена успешно за {time.perf_counter() - started:.1f} с!")
     print(f"\nСтатистика:")
-    print(f"  - Пользователей: {User.objects.count()}")
-    print(f"  - Опросов: {Survey.objects.count()}")
-    print(f"  - Ответов: {SurveyResponse.objects.count()}")
+    print(f"  - Пользователей: создано {stats['users']}, пропущено {stats['users_skipped']}")
+    print(f"  - Опросов: создано {stats['surveys']}, пропущено {stats['surveys_skipped']}")
+    print(f"  - Ответов: создано {stats['responses']}, пропущено {stats['responses_skipped']}")
 
 
 if __name__ == "__main__":
     main()
-
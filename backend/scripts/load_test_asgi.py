@@ -0,0 +1,235 @@
+"""
+Нагрузочное сравнение ASGI (async-представления голосования и статистики) и WSGI.
+
+Запускает сервер для каждого режима с одинаковым числом процессов, открывает N одновременных
+keep-alive соединений и в течение --duration секунд шлет запросы к статистике или голосованию.
+Для каждого уровня N выводит пропускную способность, задержки и ошибки (отказы соединения,
+таймауты, 5xx): уровень, на котором растут ошибки или p95, - предел одновременных соединений.
+
+По умолчанию ASGI - uvicorn (config.asgi, QUICKVOTE_ASYNC_VIEWS=1), WSGI - gunicorn с потоками
+(config.wsgi). Команды можно заменить через --asgi-cmd / --wsgi-cmd; сервер без установленной
+команды пропускается. Ограничение частоты голосов на время теста отключается.
+
+Примеры:
+    python scripts/load_test_asgi.py --endpoint stats --concurrency 50,200,500 --duration 10
+    python scripts/load_test_asgi.py --endpoint submit --slug 3f0c... --wsgi-threads 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import django
+
+# Настройка Django
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from rest_framework.authtoken.models import Token
+
+from surveys.models import Question, Survey
+
+HOST = "127.0.0.1"
+REQUEST_TIMEOUT = 10
+
+
+def pick_survey(slug):
+    """Опрос для теста: по slug или первый активный опрос с вопросами."""
+    surveys = Survey.objects.filter(slug=slug) if slug else Survey.objects.filter(status=Survey.STATUS_ACTIVE, questions__isnull=False)
+    return surveys.select_related("author").distinct().first()
+
+
+def vote_payload(survey):
+    """Ответ на все вопросы опроса: первый вариант, максимальный рейтинг или короткий текст."""
+    answers = []
+    for question in survey.questions.prefetch_related("choices"):
+        answer = {"question": question.id}
+        if question.question_type in {Question.TYPE_SINGLE, Question.TYPE_MULTIPLE}:
+            answer["selected_choices"] = [choice.id for choice in question.choices.all()[:1]]
+        elif question.question_type == Question.TYPE_TEXT:
+            answer["text_answer"] = "load test"
+        else:
+            answer["rating_value"] = 5
+        answers.append(answer)
+    return {"answers": answers}
+
+
+def build_request(args, survey):
+    """Сырой HTTP/1.1-запрос, который повторяет каждое соединение."""
+    if args.endpoint == "stats":
+        # Статистику видит автор опроса - запросы с его API-токеном
+        token, _ = Token.objects.get_or_create(user=survey.author)
+        head = f"GET /responses/api/{survey.slug}/stats/ HTTP/1.1\r\nAuthorization: Token {token.key}\r\n"
+        body = b""
+    else:
+        body = json.dumps(vote_payload(survey)).encode("utf-8")
+        head = (
+            f"POST /responses/api/{survey.slug}/submit/ HTTP/1.1\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        )
+    return (head + f"Host: {HOST}\r\nAccept: application/json\r\nConnection: keep-alive\r\n\r\n").encode("ascii") + body
+
+
+def start_server(command, env):
+    """Запускает сервер, если команда установлена; иначе None."""
+    argv = shlex.split(command)
+    if shutil.which(argv[0]) is None:
+        return None
+    return subprocess.Popen(argv, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_for_port(port, timeout=20):
+    """Ждет, пока сервер начнет принимать соединения."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((HOST, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+async def read_response(reader):
+    """Читает ответ с Content-Length. Возвращает (код, keep-alive)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("соединение закрыто сервером")
+    code = int(status_line.split()[1])
+    length, keep_alive = 0, True
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "connection" and value == "close":
+            keep_alive = False
+    await reader.readexactly(length)
+    return code, keep_alive
+
+
+async def connection_worker(port, request, deadline, result):
+    """Одно клиентское соединение: запросы подряд до deadline, переподключение после закрытия."""
+    writer = None
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(HOST, port), REQUEST_TIMEOUT)
+            writer.write(request)
+            await writer.drain()
+            code, keep_alive = await asyncio.wait_for(read_response(reader), REQUEST_TIMEOUT)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError, IndexError):
+            result["errors"] += 1
+            if writer is not None:
+                writer.close()
+                writer = None
+            await asyncio.sleep(0.05)
+            continue
+        if code >= 500:
+            result["errors"] += 1
+        else:
+            result["latencies"].append(time.perf_counter() - started)
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_level(port, request, concurrency, duration):
+    """Нагрузка concurrency соединениями в течение duration секунд."""
+    result = {"latencies": [], "errors": 0}
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(connection_worker(port, request, deadline, result) for _ in range(concurrency)))
+    return result
+
+
+def report(name, concurrency, duration, result):
+    latencies = sorted(result["latencies"])
+    if latencies:
+        p50 = statistics.median(latencies) * 1000
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    else:
+        p50 = p95 = 0
+    print(
+        f"  {name:<5} {concurrency:>6} {len(latencies) / duration:>10.1f} "
+        f"{p50:>9.1f} {p95:>9.1f} {result['errors']:>8}"
+    )
+
+
+def main():
+    """Основная функция: запускает серверы по очереди и нагружает их одинаковыми уровнями."""
+    parser = argparse.ArgumentParser(description="Сравнение ASGI и WSGI под нагрузкой QuickVote")
+    parser.add_argument("--endpoint", choices=["stats", "submit"], default="stats", help="Нагружаемый API")
+    parser.add_argument("--slug", help="Опрос (по умолчанию - первый активный)")
+    parser.add_argument("--concurrency", default="50,100,200,500", help="Уровни одновременных соединений через запятую")
+    parser.add_argument("--duration", type=float, default=10, help="Длительность каждого уровня, секунды")
+    parser.add_argument("--workers", type=int, default=1, help="Число процессов каждого сервера")
+    parser.add_argument("--wsgi-threads", type=int, default=8, help="Потоков на процесс WSGI-сервера")
+    parser.add_argument("--asgi-port", type=int, default=8801)
+    parser.add_argument("--wsgi-port", type=int, default=8802)
+    parser.add_argument("--asgi-cmd", help="Команда ASGI-сервера (по умолчанию uvicorn)")
+    parser.add_argument("--wsgi-cmd", help="Команда WSGI-сервера (по умолчанию gunicorn)")
+    args = parser.parse_args()
+
+    survey = pick_survey(args.slug)
+    if survey is None:
+        print("❌ Нет активного опроса с вопросами: создайте данные (scripts/generate_fixtures.py) или укажите --slug")
+        sys.exit(1)
+    request = build_request(args, survey)
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    servers = [
+        (
+            "ASGI",
+            args.asgi_port,
+            args.asgi_cmd
+            or f"uvicorn config.asgi:application --host {HOST} --port {args.asgi_port} --workers {args.workers} --no-access-log",
+            "1",
+        ),
+        (
+            "WSGI",
+            args.wsgi_port,
+            args.wsgi_cmd
+            or f"gunicorn config.wsgi:application --bind {HOST}:{args.wsgi_port} --workers {args.workers} "
+            f"--worker-class gthread --threads {args.wsgi_threads}",
+            "0",
+        ),
+    ]
+
+    print(f"Опрос: {survey.title} ({survey.slug}), endpoint: {args.endpoint}, {args.duration:.0f} с на уровень\n")
+    print(f"  {'режим':<5} {'соедин.':>6} {'запр./с':>10} {'p50, мс':>9} {'p95, мс':>9} {'ошибки':>8}")
+    for name, port, command, async_views in servers:
+        env = dict(os.environ, QUICKVOTE_ASYNC_VIEWS=async_views, QUICKVOTE_VOTE_THROTTLE="0")
+        process = start_server(command, env)
+        if process is None:
+            print(f"  ⚠ {name}: команда {shlex.split(command)[0]} не найдена - пропущено")
+            continue
+        try:
+            if not wait_for_port(port):
+                print(f"  ❌ {name}: сервер не начал принимать соединения на порту {port}")
+                continue
+            for concurrency in levels:
+                report(name, concurrency, args.duration, asyncio.run(run_level(port, request, concurrency, args.duration)))
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    print("\n✓ Готово")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Скрипт для удаления просроченных ключей идемпотентности (IDEMPOTENCY_KEY_TTL).
+Запускается периодически (cron); удаляет пачками, не блокируя таблицу надолго.
+"""
+import argparse
+import os
+import sys
+import django
+
+# Настройка Django
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from responses.idempotency import purge_expired
+
+
+def main():
+    """Основная функция: удаляет просроченные ключи и выводит итог."""
+    parser = argparse.ArgumentParser(description="Удаление просроченных ключей идемпотентности QuickVote")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Сколько ключей удалять за один запрос")
+    args = parser.parse_args()
+
+    print("Удаление просроченных ключей идемпотентности...")
+    deleted = purge_expired(batch_size=args.batch_size)
+    print(f"  ✓ Удалено ключей: {deleted}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Скрипт для сводки отчета профилировщика SQL-запросов (QUERY_PROFILER_REPORT).
+Группирует записи по view и выводит число запросов и время SQL (медиана и максимум),
+а также самые частые повторяющиеся запросы. Используется для отслеживания трендов.
+"""
+import argparse
+import json
+from collections import Counter, defaultdict
+from statistics import median
+
+
+def load_report(path):
+    """Читает NDJSON-отчет и группирует записи по имени view."""
+    by_view = defaultdict(list)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                by_view[record["view"]].append(record)
+    return by_view
+
+
+def summarize(by_view):
+    """Строит сводку по каждому view."""
+    summary = {}
+    for view, records in by_view.items():
+        queries = [r["queries"] for r in records]
+        sql_time = [r["sql_time_ms"] for r in records]
+        duplicates = Counter()
+        for record in records:
+            for item in record["duplicates"]:
+                duplicates[item["fingerprint"]] += item["count"]
+        summary[view] = {
+            "requests": len(records),
+            "queries_median": median(queries),
+            "queries_max": max(queries),
+            "sql_time_ms_median": round(median(sql_time), 3),
+            "sql_time_ms_max": max(sql_time),
+            "top_duplicates": [sql for sql, _ in duplicates.most_common(3)],
+        }
+    return summary
+
+
+def main():
+    """Основная функция: печатает сводку или сохраняет ее в JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("report", help="Путь к NDJSON-отчету профилировщика")
+    parser.add_argument("--json", dest="json_path", help="Сохранить сводку в JSON файл")
+    args = parser.parse_args()
+
+    summary = summarize(load_report(args.report))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"✓ Сводка сохранена в {args.json_path}")
+        return
+
+    for view, data in sorted(summary.items(), key=lambda item: -item[1]["queries_max"]):
+        print(f"{view}: запросов {data['requests']}, SQL-запросов медиана {data['queries_median']} / макс {data['queries_max']}, "
+              f"время SQL медиана {data['sql_time_ms_median']} мс / макс {data['sql_time_ms_max']} мс")
+        for sql in data["top_duplicates"]:
+            print(f"    повтор: {sql[:120]}")
+
+
+if __name__ == "__main__":
+    main()
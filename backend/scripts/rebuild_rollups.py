@@ -0,0 +1,26 @@
+"""
+Скрипт для пересчета агрегатов активности и таблицы лидеров по истории.
+Нужен после загрузки фикстур, массового удаления или первого развертывания агрегатов.
+"""
+import os
+import sys
+import django
+
+# Настройка Django
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from analytics.rollups import rebuild_rollups
+
+
+def main():
+    """Основная функция: пересчитывает агрегаты и выводит итог."""
+    print("Пересчет агрегатов активности...")
+    result = rebuild_rollups()
+    print(f"  ✓ Агрегатов (час/сутки): {result['rollups']}")
+    print(f"  ✓ Опросов в таблице лидеров: {result['tallies']}")
+
+
+if __name__ == "__main__":
+    main()
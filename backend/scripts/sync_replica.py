@@ -0,0 +1,60 @@
+"""
+Обновление SQLite-реплики: копирует основную БД в файл снимка через backup API SQLite
+(согласованная копия без остановки записи). Для локальной проверки маршрутизации чтений
+(config.routers) вместо настоящей репликации.
+
+Пример:
+    QUICKVOTE_DB_REPLICA_NAME=replica.sqlite3 python scripts/sync_replica.py --interval 10
+    QUICKVOTE_DB_REPLICA_NAME=replica.sqlite3 python manage.py runserver
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import django
+
+# Настройка Django
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.conf import settings
+
+
+def sync_once(source_path, replica_path, pages_per_step=1024):
+    """Копирует основную БД в реплику порциями страниц, не блокируя запись надолго."""
+    source = sqlite3.connect(source_path)
+    replica = sqlite3.connect(replica_path)
+    try:
+        source.backup(replica, pages=pages_per_step)
+    finally:
+        replica.close()
+        source.close()
+
+
+def main():
+    """Основная функция: однократно или периодически обновляет снимок."""
+    parser = argparse.ArgumentParser(description="Обновление SQLite-реплики QuickVote")
+    parser.add_argument("--interval", type=float, default=0, help="Период обновления в секундах (0 - один раз)")
+    args = parser.parse_args()
+
+    alias = settings.REPLICA_DATABASE_ALIAS
+    if not alias or settings.DATABASES["default"]["ENGINE"] != "django.db.backends.sqlite3":
+        print("❌ Реплика не настроена: задайте QUICKVOTE_DB_REPLICA_NAME для SQLite-профиля")
+        sys.exit(1)
+    source_path = str(settings.DATABASES["default"]["NAME"])
+    replica_path = str(settings.DATABASES[alias]["NAME"])
+
+    while True:
+        started = time.perf_counter()
+        sync_once(source_path, replica_path)
+        print(f"✓ Снимок {replica_path} обновлен за {time.perf_counter() - started:.2f} с")
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,46 @@
 from rest_framework import viewsets, permissions, decorators, response, status
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery, prefetch_related_objects
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 
+from responses.models import SurveyResponse
 from responses.views import build_statistics_payload
-from .models import Survey, SurveyTemplate
-from .serializers import SurveySerializer, SurveyPublicSerializer, SurveyTemplateSerializer
+from . import catalog, etags
+from .cloning import clone_surveys
+from .models import Choice, Question, Survey, SurveyTemplate
+from .payloads import public_survey_data
+from .serializers import (
+    SurveyCloneManySerializer,
+    SurveyCloneSerializer,
+    SurveySerializer,
+    SurveySummarySerializer,
+    SurveyTemplateSerializer,
+    SurveyTemplateSummarySerializer,
+)
+
+# Вопросы с вариантами для вложенных сериализаторов: два запроса на страницу вместо 1 + N + N x M
+QUESTIONS_PREFETCH = Prefetch(
+    "questions",
+    queryset=Question.objects.order_by("order", "id").prefetch_related(
+        Prefetch("choices", queryset=Choice.objects.order_by("order", "id"))
+    ),
+)
+
+
+def _count_subquery(queryset):
+    """Количество строк queryset, связанных с опросом через survey=OuterRef("pk"), как подзапрос."""
+    counted = queryset.filter(survey=OuterRef("pk")).order_by().values("survey").annotate(total=Count("pk"))
+    return Coalesce(Subquery(counted.values("total"), output_field=IntegerField()), 0)
+
+
+def with_counts(queryset):
+    """Аннотирует опросы числом ответов и вопросов (подзапросы по индексам, без JOIN всех ответов)."""
+    return queryset.annotate(
+        response_count=_count_subquery(SurveyResponse.objects.all()),
+        question_count=_count_subquery(Question.objects.all()),
+    )
 
 
 class IsAuthorOrAdmin(permissions.BasePermission):
@@ -16,28 +52,58 @@ class IsAuthorOrAdmin(permissions.BasePermission):
 
 
 class SurveyViewSet(viewsets.ModelViewSet):
-    """ViewSet для управления опросами через API."""
+    """
+    ViewSet для управления опросами через API. Список с ?view=summary отдает опросы
+    без вложенных вопросов, с числом вопросов и ответов.
+    """
     serializer_class = SurveySerializer
     lookup_field = "slug"
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrAdmin]
 
     def get_queryset(self):
         if self.action == "retrieve" and self.request.method == "GET":
-            return Survey.objects.all()
-        if self.request.user.is_staff:
-            return Survey.objects.all()
-        if not self.request.user.is_authenticated:
-            return Survey.objects.filter(status=Survey.STATUS_ACTIVE)
-        return Survey.objects.filter(author=self.request.user)
+            queryset = Survey.objects.all()
+        elif self.request.user.is_staff:
+            queryset = Survey.objects.all()
+        elif not self.request.user.is_authenticated:
+            queryset = Survey.objects.filter(status=Survey.STATUS_ACTIVE)
+        else:
+            queryset = Survey.objects.filter(author=self.request.user)
+        if self.action == "list":
+            return with_counts(queryset) if self.is_summary else queryset.prefetch_related(QUESTIONS_PREFETCH)
+        # retrieve и public подгружают вопросы после проверки ETag (prefetch_questions)
+        return queryset
+
+    @property
+    def is_summary(self):
+        return self.action == "list" and self.request.query_params.get("view") == "summary"
+
+    def get_serializer_class(self):
+        if self.is_summary:
+            return SurveySummarySerializer
+        return super().get_serializer_class()
+
+    def prefetch_questions(self, survey):
+        """Загружает вопросы и варианты опроса двумя запросами."""
+        prefetch_related_objects([survey], QUESTIONS_PREFETCH)
+        return survey
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def retrieve(self, request, *args, **kwargs):
+        survey = self.get_object()
+        etag = etags.survey_etag(request, survey, "content")
+        return etags.not_modified(request, etag) or etags.with_etag(
+            response.Response(self.get_serializer(self.prefetch_questions(survey)).data), etag
+        )
+
     @decorators.action(detail=True, methods=["get"], permission_classes=[permissions.AllowAny], url_path="public")
     def public(self, request, slug=None):
         survey = self.get_object()
-        serializer = SurveyPublicSerializer(survey)
-        return response.Response(serializer.data)
+        etag = etags.survey_etag(request, survey, "content", "responses")
+        # Схема для голосующих - самый частый запрос: словари из values() вместо SurveyPublicSerializer
+        return etags.not_modified(request, etag) or etags.with_etag(response.Response(public_survey_data(survey)), etag)
 
     @decorators.action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
     def close(self, request, slug=None):
@@ -46,46 +112,101 @@ class SurveyViewSet(viewsets.ModelViewSet):
         if survey.author != request.user and not request.user.is_staff:
             return response.Response(status=status.HTTP_403_FORBIDDEN)
         survey.status = Survey.STATUS_CLOSED
-        survey.save(update_fields=["status"])
+        survey.save(update_fields=["status", "updated_at"])
         return response.Response({"status": "closed"})
 
+    @decorators.action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
+    def clone(self, request, slug=None):
+        """Копирует опрос с вопросами и вариантами (доступно только автору или администратору)."""
+        survey = self.get_object()
+        if survey.author_id != request.user.pk and not request.user.is_staff:
+            return response.Response(status=status.HTTP_403_FORBIDDEN)
+        params = SurveyCloneSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        (clone,) = clone_surveys([survey], request.user, **params.validated_data)
+        return response.Response(
+            SurveySerializer(self.prefetch_questions(clone)).data, status=status.HTTP_201_CREATED
+        )
+
+    @decorators.action(detail=False, methods=["post"], permission_classes=[permissions.IsAuthenticated], url_path="clone-many")
+    def clone_many(self, request):
+        """Копирует несколько опросов пользователя одним запросом: {"slugs": [...], "ends_at": ...}."""
+        params = SurveyCloneManySerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        slugs = params.validated_data.pop("slugs")
+        # get_queryset для обычного пользователя - только его опросы
+        sources = {survey.slug: survey for survey in self.get_queryset().filter(slug__in=slugs)}
+        missing = [slug for slug in slugs if slug not in sources]
+        if missing:
+            return response.Response({"slugs": missing, "detail": "Опросы не найдены"}, status=status.HTTP_404_NOT_FOUND)
+        clones = clone_surveys([sources[slug] for slug in slugs], request.user, **params.validated_data)
+        return response.Response(
+            [{"source": slug, "slug": clone.slug, "title": clone.title} for slug, clone in zip(slugs, clones)],
+            status=status.HTTP_201_CREATED,
+        )
+
     @decorators.action(detail=True, methods=["get"], permission_classes=[permissions.IsAuthenticated], url_path="statistics")
     def statistics(self, request, slug=None):
         """Возвращает статистику опроса (доступно только автору или администратору)."""
         survey = self.get_object()
         if survey.author != request.user and not request.user.is_staff:
             return response.Response(status=status.HTTP_403_FORBIDDEN)
-        payload = build_statistics_payload(survey)
-        return response.Response(payload)
+        etag = etags.survey_etag(request, survey, "content", "responses")
+        return etags.not_modified(request, etag) or etags.with_etag(
+            response.Response(build_statistics_payload(survey)), etag
+        )
 
 
 class SurveyTemplateViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet для просмотра шаблонов опросов."""
+    """ViewSet для просмотра шаблонов опросов. Список и карточка отдаются из каталога в памяти (surveys.catalog)."""
     queryset = SurveyTemplate.objects.all()
     serializer_class = SurveyTemplateSerializer
     permission_classes = [permissions.AllowAny]
 
+    @property
+    def is_summary(self):
+        return self.action == "list" and self.request.query_params.get("view") == "summary"
+
+    def get_serializer_class(self):
+        # ?view=summary - без payload, для выбора шаблона; payload отдает карточка шаблона
+        if self.is_summary:
+            return SurveyTemplateSummarySerializer
+        return super().get_serializer_class()
+
+    def get_object(self):
+        template = catalog.get_catalog().get(self.kwargs["pk"])
+        if template is None:
+            raise Http404
+        self.check_object_permissions(self.request, template)
+        return template
+
+    def list(self, request, *args, **kwargs):
+        # Каталог меняется только через сигналы шаблонов - 304 без обращений к БД
+        etag = etags.make_etag(
+            request.build_absolute_uri(), request.accepted_media_type, etags.version("templates")
+        )
+        cached = etags.not_modified(request, etag)
+        if cached:
+            return cached
+        if "ordering" in request.query_params:
+            # Сортировка по параметру - через фильтры DRF из БД
+            return etags.with_etag(super().list(request, *args, **kwargs), etag)
+        templates = catalog.get_catalog().templates
+        page = self.paginate_queryset(templates)
+        if page is not None:
+            result = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            result = response.Response(self.get_serializer(templates, many=True).data)
+        return etags.with_etag(result, etag)
+
     @decorators.action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated], url_path="instantiate")
     def instantiate(self, request, pk=None):
-        """Создает новый опрос на основе шаблона."""
+        """Создает новый опрос на основе шаблона из скомпилированного дерева вопросов."""
         template = self.get_object()
-        payload = template.payload
-        serializer = SurveySerializer(
-            data={
-                "title": payload.get("title", template.title),
-                "description": payload.get("description", template.description),
-                "survey_type": payload.get("survey_type", Survey.TYPE_ANONYMOUS),
-                "ends_at": payload.get("ends_at"),
-                "questions": payload.get("questions", []),
-                "welcome_message": payload.get("welcome_message", ""),
-                "thank_you_message": payload.get("thank_you_message", ""),
-                "theme": payload.get("theme", "light"),
-            },
-            context={"request": request},
-        )
-        serializer.is_valid(raise_exception=True)
-        survey = serializer.save()
-        survey.is_template_based = True
-        survey.save(update_fields=["is_template_based"])
+        compiled = catalog.get_catalog().compiled(template)
+        errors = compiled.validation_errors()
+        if errors:
+            return response.Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        survey = compiled.instantiate(request.user)
+        prefetch_related_objects([survey], QUESTIONS_PREFETCH)
         return response.Response(SurveySerializer(survey).data, status=status.HTTP_201_CREATED)
-
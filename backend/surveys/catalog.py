@@ -0,0 +1,134 @@
+"""
+Каталог шаблонов опросов в памяти процесса.
+
+Снимок каталога привязан к счетчику версии "templates" (surveys.etags), который сигналы шаблонов
+увеличивают при каждом изменении, и пересобирается одним запросом, когда счетчик изменился или снимку
+больше TEMPLATE_CATALOG_TTL секунд (локальный кэш не виден другим процессам). Payload шаблона
+проверяется SurveySerializer один раз на снимок; создание опроса из шаблона вставляет вопросы
+и варианты двумя bulk_create вместо запроса на каждый объект.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import etags
+from .models import Choice, Question, Survey, SurveyTemplate
+
+_lock = threading.Lock()
+_catalog = None
+
+
+class CompiledTemplate:
+    """Проверенное дерево опроса из payload шаблона: поля опроса и вопросы с вариантами."""
+
+    __slots__ = ("template", "survey_fields", "questions", "errors")
+
+    def __init__(self, template):
+        from .serializers import SurveySerializer
+
+        self.template = template
+        payload = template.payload
+        serializer = SurveySerializer(
+            data={
+                "title": payload.get("title", template.title),
+                "description": payload.get("description", template.description),
+                "survey_type": payload.get("survey_type", Survey.TYPE_ANONYMOUS),
+                "ends_at": payload.get("ends_at"),
+                "questions": payload.get("questions", []),
+                "welcome_message": payload.get("welcome_message", ""),
+                "thank_you_message": payload.get("thank_you_message", ""),
+                "theme": payload.get("theme", "light"),
+            }
+        )
+        self.errors = None if serializer.is_valid() else serializer.errors
+        self.survey_fields = {}
+        self.questions = ()
+        if self.errors is None:
+            data = dict(serializer.validated_data)
+            questions = data.pop("questions")
+            self.survey_fields = data
+            # Порядок задается позицией в шаблоне, как в SurveySerializer._save_questions
+            self.questions = tuple(
+                (
+                    {key: value for key, value in question.items() if key not in {"choices", "order"}},
+                    tuple({key: value for key, value in choice.items() if key != "order"} for choice in question.get("choices", [])),
+                )
+                for question in questions
+            )
+
+    def validation_errors(self):
+        """Ошибки payload или None; дата окончания перепроверяется на момент вызова."""
+        if self.errors is not None:
+            return self.errors
+        ends_at = self.survey_fields.get("ends_at")
+        if ends_at and ends_at <= timezone.now():
+            return {"ends_at": ["Дата окончания должна быть в будущем"]}
+        return None
+
+    @transaction.atomic
+    def instantiate(self, author):
+        """Создает опрос автора по шаблону: три INSERT независимо от числа вопросов."""
+        survey = Survey.objects.create(author=author, is_template_based=True, **self.survey_fields)
+        questions = Question.objects.bulk_create(
+            [Question(survey=survey, order=index, **fields) for index, (fields, _) in enumerate(self.questions)]
+        )
+        Choice.objects.bulk_create(
+            [
+                Choice(question=question, order=position, **fields)
+                for question, (_, choices) in zip(questions, self.questions)
+                for position, fields in enumerate(choices)
+            ]
+        )
+        return survey
+
+
+class TemplateCatalog:
+    """Снимок каталога: шаблоны в порядке модели и лениво скомпилированные деревья."""
+
+    def __init__(self, version, templates):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.templates = templates
+        self.by_id = {template.pk: template for template in templates}
+        self._compiled = {}
+
+    def is_current(self, version):
+        return self.version == version and time.monotonic() - self.built_at < settings.TEMPLATE_CATALOG_TTL
+
+    def get(self, template_id):
+        """Шаблон по id (строка из URL допускается) или None."""
+        try:
+            return self.by_id.get(int(template_id))
+        except (TypeError, ValueError):
+            return None
+
+    def compiled(self, template):
+        """Скомпилированное дерево шаблона; компилируется один раз на снимок."""
+        compiled = self._compiled.get(template.pk)
+        if compiled is None:
+            compiled = self._compiled.setdefault(template.pk, CompiledTemplate(template))
+        return compiled
+
+
+def get_catalog():
+    """Актуальный снимок каталога (при совпадении версии - без обращений к БД)."""
+    global _catalog
+    current = etags.version("templates")
+    catalog = _catalog
+    if catalog is not None and catalog.is_current(current):
+        return catalog
+    with _lock:
+        if _catalog is None or not _catalog.is_current(current):
+            # Версия читается до запроса: изменение во время сборки даст пересборку при следующем вызове
+            _catalog = TemplateCatalog(current, list(SurveyTemplate.objects.all()))
+        return _catalog
+
+
+def clear():
+    """Сбрасывает снимок процесса (тесты, ручная перезагрузка шаблонов)."""
+    global _catalog
+    with _lock:
+        _catalog = None
@@ -0,0 +1,68 @@
+"""
+Копирование опросов на сервере (повторный запуск того же опроса).
+
+Вопросы и варианты всех исходных опросов читаются двумя запросами values() и вставляются
+bulk_create в одной транзакции: число обращений к БД не зависит ни от числа вопросов, ни от числа
+копируемых опросов. Копия получает нового автора, новый slug, статус "активный" и не переносит ответы.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Choice, Question, Survey
+from .signals import surveys_cloned
+
+# Поля опроса, которые переносятся в копию как есть
+SURVEY_FIELDS = (
+    "title",
+    "description",
+    "survey_type",
+    "theme",
+    "logo",
+    "welcome_message",
+    "thank_you_message",
+    "answer_storage",
+    "is_template_based",
+)
+QUESTION_FIELDS = ("text", "question_type", "is_required", "order", "max_text_length")
+CHOICE_FIELDS = ("label", "order")
+
+
+@transaction.atomic
+def clone_surveys(sources, author, title=None, ends_at=None):
+    """
+    Копирует опросы sources (загруженные Survey) от имени author. Возвращает копии в порядке sources.
+    title заменяет название копий; без ends_at копия наследует дату окончания, если она еще не прошла.
+    """
+    now = timezone.now()
+    clones = []
+    for source in sources:
+        fields = {field: getattr(source, field) for field in SURVEY_FIELDS}
+        if title:
+            fields["title"] = title
+        fields["ends_at"] = ends_at or (source.ends_at if source.ends_at and source.ends_at > now else None)
+        clones.append(Survey(author=author, status=Survey.STATUS_ACTIVE, **fields))
+    clones = Survey.objects.bulk_create(clones)
+    clone_ids = {source.pk: clone.pk for source, clone in zip(sources, clones)}
+
+    question_rows = list(
+        Question.objects.filter(survey_id__in=clone_ids).order_by("survey_id", "order", "id").values("id", "survey_id", *QUESTION_FIELDS)
+    )
+    questions = Question.objects.bulk_create(
+        [
+            Question(survey_id=clone_ids[row["survey_id"]], **{field: row[field] for field in QUESTION_FIELDS})
+            for row in question_rows
+        ]
+    )
+    question_ids = {row["id"]: question.pk for row, question in zip(question_rows, questions)}
+
+    Choice.objects.bulk_create(
+        [
+            Choice(question_id=question_ids[row["question_id"]], **{field: row[field] for field in CHOICE_FIELDS})
+            for row in Choice.objects.filter(question__survey_id__in=clone_ids)
+            .order_by("question_id", "order", "id")
+            .values("question_id", *CHOICE_FIELDS)
+        ]
+    )
+    # bulk_create не отправляет post_save - подписчики (агрегаты активности) получают пакет целиком
+    surveys_cloned.send(sender=Survey, surveys=clones)
+    return clones
@@ -0,0 +1,93 @@
+"""
+Строгие ETag для API опросов.
+
+ETag - хэш от Survey.updated_at и счетчиков версий в кэше: "content" (вопросы и варианты),
+"responses" (ответы: статистика) и "templates" (каталог шаблонов). Счетчики увеличиваются
+сигналами; отсутствующий счетчик создается со значением от текущего времени, поэтому
+после очистки кэша ETag не совпадет ни с одним выданным ранее. Совпавший If-None-Match
+получает 304 до сериализаторов и подсчета статистики.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+KEY_PREFIX = "etag-version"
+VERSION_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def _key(scope, obj_id):
+    return f"{KEY_PREFIX}:{scope}:{obj_id}"
+
+
+def version(scope, obj_id=""):
+    """Текущее значение счетчика версии."""
+    return cache.get_or_set(_key(scope, obj_id), time.time_ns, VERSION_TIMEOUT)
+
+
+async def aversion(scope, obj_id=""):
+    """Async-версия version (async API кэша)."""
+    return await cache.aget_or_set(_key(scope, obj_id), time.time_ns, VERSION_TIMEOUT)
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Без счетчика в кэше ETag и так изменится
+        pass
+
+
+def bump(scope, obj_id=""):
+    """
+    Увеличивает счетчик версии после фиксации транзакции (вне транзакции - сразу). Раньше фиксации
+    параллельный запрос мог бы посчитать старые данные и пометить их новой версией - такой ETag
+    получал бы 304 с устаревшими данными до следующего изменения.
+    """
+    key = _key(scope, obj_id)
+    transaction.on_commit(lambda: _incr(key))
+
+
+def make_etag(*parts):
+    """Строгий ETag из составных частей."""
+    digest = hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def survey_etag(request, survey, *scopes):
+    """ETag представления опроса: URL, формат ответа, updated_at и счетчики версий опроса."""
+    return make_etag(
+        request.build_absolute_uri(),
+        getattr(request, "accepted_media_type", ""),
+        survey.pk,
+        survey.updated_at.isoformat(),
+        *(version(scope, survey.pk) for scope in scopes),
+    )
+
+
+async def asurvey_etag(request, survey, *scopes):
+    """Async-версия survey_etag: счетчики версий читаются async API кэша."""
+    return make_etag(
+        request.build_absolute_uri(),
+        getattr(request, "accepted_media_type", ""),
+        survey.pk,
+        survey.updated_at.isoformat(),
+        *[await aversion(scope, survey.pk) for scope in scopes],
+    )
+
+
+def not_modified(request, etag):
+    """Ответ 304, если If-None-Match совпадает с etag, иначе None."""
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        with_etag(response, etag)
+    return response
+
+
+def with_etag(response, etag):
+    """Добавляет ETag и требование перепроверки перед использованием копии."""
+    response["ETag"] = etag
+    patch_cache_control(response, no_cache=True)
+    return response
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0005_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="survey",
+            name="answer_storage",
+            field=models.CharField(
+                choices=[
+                    ("rows", "Строки Answer"),
+                    ("packed", "Компактно (responses.packing)"),
+                ],
+                default="rows",
+                max_length=10,
+            ),
+        ),
+    ]
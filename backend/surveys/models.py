@@ -2,6 +2,7 @@ import uuid
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
+from django.utils.functional import cached_property
 
 
 class Survey(models.Model):
@@ -20,8 +21,14 @@ class Survey(models.Model):
         (STATUS_ACTIVE, "Активный"),
         (STATUS_CLOSED, "Закрыт"),
     ]
+    STORAGE_ROWS = "rows"
+    STORAGE_PACKED = "packed"
+    STORAGE_CHOICES = [
+        (STORAGE_ROWS, "Строки Answer"),
+        (STORAGE_PACKED, "Компактно (responses.packing)"),
+    ]
 
-    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="surveys")
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="surveys", db_index=False)
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True, max_length=1000)
     survey_type = models.CharField(max_length=20, choices=TYPE_CHOICES, default=TYPE_ANONYMOUS)
@@ -35,19 +42,37 @@ class Survey(models.Model):
     logo = models.ImageField(upload_to="survey_logos/", null=True, blank=True)
     welcome_message = models.CharField(max_length=255, blank=True)
     thank_you_message = models.CharField(max_length=255, blank=True)
+    answer_storage = models.CharField(max_length=10, choices=STORAGE_CHOICES, default=STORAGE_ROWS)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Опросы автора по статусу (дашборд) и по дате создания (списки, история)
+            models.Index(fields=["author", "status"], name="survey_author_status_idx"),
+            models.Index(fields=["author", "created_at"], name="survey_author_created_idx"),
+            # Активные опросы и поиск истекших
+            models.Index(fields=["status", "ends_at"], name="survey_status_ends_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
     @property
     def is_editable(self):
-        """Проверяет, можно ли редактировать опрос (не должно быть ответов)."""
+        """Проверяет, можно ли редактировать опрос (не должно быть ответов и архива)."""
         from responses.models import SurveyResponse
 
-        return not SurveyResponse.objects.filter(survey=self).exists()
+        return not SurveyResponse.objects.filter(survey=self).exists() and not self.is_archived
+
+    @cached_property
+    def is_archived(self):
+        """
+        Проверяет, перенесены ли ответы опроса в архив (responses.archive). Результат запоминается
+        на экземпляре; представления голосования получают его аннотацией при загрузке опроса.
+        """
+        from responses.models import SurveyArchive
+
+        return SurveyArchive.objects.filter(survey=self).exists()
 
     @property
     def is_active(self):
@@ -0,0 +1,57 @@
+"""
+Кэш публичной страницы опроса.
+
+Для каждого slug в кэше хранится версия страницы и момент ее создания. Версия задает ETag
+и Last-Modified страницы и входит в ключ кэшированных фрагментов шаблона с вопросами,
+поэтому условный запрос с актуальным ETag получает 304 без обращений к БД, а обычный -
+страницу без запросов вопросов и вариантов. Изменение или удаление опроса, вопроса
+или варианта удаляет версию (surveys.signals); следующий запрос получает новую версию.
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+KEY_PREFIX = "survey-page"
+
+
+@dataclass(frozen=True)
+class PageVersion:
+    """Версия публичной страницы опроса."""
+    version: str
+    last_modified: datetime
+
+    @property
+    def etag(self):
+        return f'"{self.version}"'
+
+
+def _key(slug):
+    return f"{KEY_PREFIX}:{slug}"
+
+
+def cached_version(slug):
+    """Версия страницы из кэша или None."""
+    return cache.get(_key(slug))
+
+
+def page_version(survey):
+    """Версия страницы опроса: из кэша или новая."""
+    page = cached_version(survey.slug)
+    if page is not None:
+        return page
+    page = PageVersion(uuid.uuid4().hex[:16], timezone.now().replace(microsecond=0))
+    timeout = settings.SURVEY_PAGE_CACHE_TIMEOUT
+    if survey.is_active and survey.ends_at:
+        # Страница сменится на "Опрос завершен" без сохранения опроса - версия не должна его пережить
+        timeout = max(1, min(timeout, int((survey.ends_at - timezone.now()).total_seconds()) + 1))
+    cache.set(_key(survey.slug), page, timeout)
+    return page
+
+
+def invalidate(slug):
+    """Сбрасывает версию страницы опроса."""
+    cache.delete(_key(slug))
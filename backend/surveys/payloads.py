@@ -0,0 +1,45 @@
+"""
+Быстрое построение ответов API только для чтения.
+
+Словари собираются напрямую из строк values() без создания объектов моделей и полей
+сериализаторов DRF. Результат совпадает с соответствующим сериализатором побайтно
+после JSON-кодирования (проверяется тестами), поэтому при изменении полей сериализатора
+нужно изменить и функцию здесь.
+"""
+from rest_framework import serializers
+
+from .models import Choice, Question
+
+QUESTION_FIELDS = ("id", "text", "question_type", "is_required", "order", "max_text_length")
+CHOICE_FIELDS = ("id", "label", "order")
+
+_datetime_field = serializers.DateTimeField()
+
+
+def question_rows(survey):
+    """Вопросы опроса со вложенными вариантами как в QuestionSerializer: два запроса."""
+    questions = list(Question.objects.filter(survey=survey).order_by("order", "id").values(*QUESTION_FIELDS))
+    by_question = {}
+    for question in questions:
+        question["choices"] = by_question[question["id"]] = []
+    choices = Choice.objects.filter(question__survey=survey).order_by("order", "id").values("question_id", *CHOICE_FIELDS)
+    for choice in choices:
+        by_question[choice.pop("question_id")].append(choice)
+    return questions
+
+
+def public_survey_data(survey):
+    """Данные SurveyPublicSerializer(survey).data без сериализатора."""
+    return {
+        "slug": str(survey.slug),
+        "title": survey.title,
+        "description": survey.description,
+        "survey_type": survey.survey_type,
+        "ends_at": _datetime_field.to_representation(survey.ends_at) if survey.ends_at else None,
+        "participants_count": survey.responses.count(),
+        "welcome_message": survey.welcome_message,
+        "thank_you_message": survey.thank_you_message,
+        "theme": survey.theme,
+        "logo": survey.logo.url if survey.logo else None,
+        "questions": question_rows(survey),
+    }
@@ -0,0 +1,54 @@
+"""
+Скомпилированная схема опроса: фиксированный порядок вопросов и вариантов ответов.
+
+Используется компактным хранением ответов (responses.packing): позиция вопроса задает бит
+в маске ответов, позиция варианта - бит в наборе выбранных вариантов. Отпечаток схемы
+записывается в каждый упакованный ответ, чтобы не декодировать его по чужой схеме.
+"""
+import zlib
+
+from django.db.models import Prefetch
+
+from .models import Choice, Question
+
+
+class QuestionSlot:
+    """Вопрос в скомпилированной схеме."""
+
+    __slots__ = ("position", "question_id", "question_type", "choice_ids", "choice_positions", "question")
+
+    def __init__(self, position, question_id, question_type, choice_ids, question=None):
+        self.position = position
+        self.question_id = question_id
+        self.question_type = question_type
+        self.choice_ids = tuple(choice_ids)
+        self.choice_positions = {choice_id: index for index, choice_id in enumerate(self.choice_ids)}
+        self.question = question
+
+    @property
+    def has_choices(self):
+        return self.question_type in {Question.TYPE_SINGLE, Question.TYPE_MULTIPLE}
+
+
+class SurveySchema:
+    """Схема опроса: слоты вопросов по порядку и отпечаток для проверки совместимости."""
+
+    def __init__(self, questions):
+        """questions - последовательность (question_id, question_type, choice_ids[, question])."""
+        self.slots = [QuestionSlot(position, *question) for position, question in enumerate(questions)]
+        self.by_question = {slot.question_id: slot for slot in self.slots}
+        descriptor = ";".join(
+            f"{slot.question_id}:{slot.question_type}:{','.join(map(str, slot.choice_ids))}" for slot in self.slots
+        )
+        self.fingerprint = zlib.crc32(descriptor.encode("ascii"))
+
+    @classmethod
+    def for_survey(cls, survey):
+        """Компилирует схему опроса из БД (два запроса); объекты вопросов и вариантов сохраняются в слотах."""
+        questions = survey.questions.order_by("order", "id").prefetch_related(
+            Prefetch("choices", queryset=Choice.objects.order_by("order", "id"))
+        )
+        return cls(
+            (question.id, question.question_type, [choice.id for choice in question.choices.all()], question)
+            for question in questions
+        )
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.utils import timezone
 
 from .models import Survey, Question, Choice, SurveyTemplate
@@ -46,6 +47,7 @@ class SurveySerializer(serializers.ModelSerializer):
             "theme",
             "welcome_message",
             "thank_you_message",
+            "answer_storage",
             "questions",
         )
         read_only_fields = ("id", "slug", "status", "created_at", "updated_at")
@@ -85,7 +87,8 @@ class SurveySerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         questions_data = validated_data.pop("questions", None)
-        editable_fields = {"description", "ends_at", "status"}
+        # status только для чтения: опрос закрывается действием close, архивный опрос не открывается заново
+        editable_fields = {"description", "ends_at"}
         if not instance.is_editable:
             # only limited fields allowed
             for field in list(validated_data.keys()):
@@ -112,6 +115,29 @@ class SurveySerializer(serializers.ModelSerializer):
                 Choice.objects.create(question=q, order=position, **choice)
 
 
+class SurveyCloneSerializer(serializers.Serializer):
+    """Параметры копирования опроса: новое название и дата окончания (необязательны)."""
+    title = serializers.CharField(max_length=200, required=False)
+    ends_at = serializers.DateTimeField(required=False, allow_null=True)
+
+    def validate_ends_at(self, value):
+        if value and value <= timezone.now():
+            raise serializers.ValidationError("Дата окончания должна быть в будущем")
+        return value
+
+
+class SurveyCloneManySerializer(SurveyCloneSerializer):
+    """Параметры пакетного копирования: slug исходных опросов и общая дата окончания."""
+    title = None
+    slugs = serializers.ListField(child=serializers.SlugField(), min_length=1)
+
+    def validate_slugs(self, value):
+        if len(value) > settings.SURVEY_CLONE_MAX_SIZE:
+            raise serializers.ValidationError(f"Не больше {settings.SURVEY_CLONE_MAX_SIZE} опросов за запрос")
+        # Порядок первого вхождения, без повторов
+        return list(dict.fromkeys(value))
+
+
 class SurveyPublicSerializer(serializers.ModelSerializer):
     """Сериализатор для публичного отображения опроса (без служебных полей)."""
     questions = QuestionSerializer(many=True)
@@ -134,9 +160,39 @@ class SurveyPublicSerializer(serializers.ModelSerializer):
         )
 
 
+class SurveySummarySerializer(serializers.ModelSerializer):
+    """Краткое представление опроса для списков: без вложенных вопросов, с числом вопросов и ответов."""
+    question_count = serializers.IntegerField(read_only=True)
+    response_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Survey
+        fields = (
+            "id",
+            "slug",
+            "title",
+            "survey_type",
+            "status",
+            "created_at",
+            "updated_at",
+            "ends_at",
+            "answer_storage",
+            "question_count",
+            "response_count",
+        )
+        read_only_fields = fields
+
+
 class SurveyTemplateSerializer(serializers.ModelSerializer):
     """Сериализатор шаблона опроса."""
     class Meta:
         model = SurveyTemplate
         fields = ("id", "title", "category", "description", "payload")
 
+
+class SurveyTemplateSummarySerializer(serializers.ModelSerializer):
+    """Краткое представление шаблона для каталога (без payload)."""
+    class Meta:
+        model = SurveyTemplate
+        fields = ("id", "title", "category", "description")
+        read_only_fields = fields
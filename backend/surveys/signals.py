@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import etags, page_cache
+from .models import Choice, Question, Survey, SurveyTemplate
+
+# Копии опросов сохранены bulk_create без post_save (surveys.cloning): surveys
+surveys_cloned = Signal()
+
+
+@receiver([post_save, post_delete], sender=Survey)
+def on_survey_changed(sender, instance: Survey, **kwargs):
+    """Сигнал: сбрасывает кэш публичной страницы при изменении, закрытии или удалении опроса."""
+    page_cache.invalidate(instance.slug)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def on_question_changed(sender, instance: Question, **kwargs):
+    """Сигнал: сбрасывает кэш публичной страницы и ETag опроса при изменении вопросов."""
+    etags.bump("content", instance.survey_id)
+    for slug in Survey.objects.filter(pk=instance.survey_id).values_list("slug", flat=True):
+        page_cache.invalidate(slug)
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def on_choice_changed(sender, instance: Choice, **kwargs):
+    """Сигнал: сбрасывает кэш публичной страницы и ETag опроса при изменении вариантов ответа."""
+    for survey_id, slug in Survey.objects.filter(questions__pk=instance.question_id).values_list("pk", "slug"):
+        etags.bump("content", survey_id)
+        page_cache.invalidate(slug)
+
+
+@receiver([post_save, post_delete], sender=SurveyTemplate)
+def on_template_changed(sender, instance: SurveyTemplate, **kwargs):
+    """Сигнал: меняет ETag каталога шаблонов."""
+    etags.bump("templates")
@@ -1,11 +1,21 @@
+import random
+
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 
+from responses.models import SurveyResponse
+from . import catalog
+from .api import QUESTIONS_PREFETCH
 from .models import Survey, Question, Choice, SurveyTemplate
+from .payloads import public_survey_data
+from .serializers import SurveyPublicSerializer
 
 User = get_user_model()
 
@@ -188,6 +198,8 @@ class SurveyTemplateTest(TestCase):
     """Тесты для шаблонов опросов."""
     
     def setUp(self):
+        cache.clear()
+        catalog.clear()
         self.user = User.objects.create_user(
             username="testuser",
             email="test@example.com",
@@ -236,3 +248,373 @@ class SurveyTemplateTest(TestCase):
         question = survey.questions.first()
         self.assertEqual(question.text, "Template question?")
         self.assertEqual(question.choices.count(), 2)
+
+    def test_instantiate_query_count_does_not_grow_with_questions(self):
+        """Тест: опрос из шаблона создается одинаковым числом запросов при любом числе вопросов"""
+        big = SurveyTemplate.objects.create(
+            title="Big",
+            category="feedback",
+            payload={
+                "title": "Big Survey",
+                "questions": [
+                    {
+                        "text": f"Q{index}",
+                        "question_type": Question.TYPE_MULTIPLE,
+                        "choices": [{"label": f"C{position}"} for position in range(5)],
+                    }
+                    for index in range(10)
+                ],
+            },
+        )
+        url = f"/api/templates/{big.id}/instantiate/"
+        self.client.post(url, format="json")
+        with self.assertNumQueries(9):
+            small = self.client.post(f"/api/templates/{self.template.id}/instantiate/", format="json")
+        with self.assertNumQueries(9):
+            response = self.client.post(url, format="json")
+
+        self.assertEqual(small.status_code, status.HTTP_201_CREATED)
+        data = response.json()
+        self.assertEqual([question["text"] for question in data["questions"]], [f"Q{index}" for index in range(10)])
+        self.assertEqual([choice["order"] for choice in data["questions"][3]["choices"]], list(range(5)))
+        survey = Survey.objects.get(slug=data["slug"])
+        self.assertTrue(survey.is_template_based)
+        self.assertEqual(Choice.objects.filter(question__survey=survey).count(), 50)
+
+    def test_invalid_template_payload_returns_400(self):
+        """Тест: шаблон без вопросов не создает опрос"""
+        empty = SurveyTemplate.objects.create(title="Empty", category="feedback", payload={})
+        response = self.client.post(f"/api/templates/{empty.id}/instantiate/", format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("questions", response.json())
+        self.assertFalse(Survey.objects.exists())
+
+    def test_summary_list_is_served_from_catalog(self):
+        """Тест: краткий список без payload отдается из каталога в памяти, изменение шаблона видно сразу"""
+        client = APIClient()
+        client.get("/api/templates/")
+        with self.assertNumQueries(0):
+            response = client.get("/api/templates/?view=summary")
+        results = {item["id"]: item for item in response.json()["results"]}
+        self.assertEqual(
+            results[self.template.id],
+            {"id": self.template.id, "title": "Test Template", "category": "satisfaction", "description": "Test template description"},
+        )
+        self.assertIn("payload", client.get(f"/api/templates/{self.template.id}/").json())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.template.title = "Renamed"
+            self.template.save()
+        results = client.get("/api/templates/?view=summary").json()["results"]
+        self.assertIn({"id": self.template.id, "title": "Renamed"}, [{"id": item["id"], "title": item["title"]} for item in results])
+        self.assertEqual(client.get("/api/templates/999/").status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SurveyPublicPageCacheTest(TestCase):
+    """Тесты для кэширования публичной страницы опроса."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="viral",
+            email="viral@example.com",
+            password="testpass123"
+        )
+        self.survey = Survey.objects.create(author=self.user, title="Viral Survey", status=Survey.STATUS_ACTIVE)
+        self.question = Question.objects.create(
+            survey=self.survey, text="Color?", question_type=Question.TYPE_SINGLE, order=1
+        )
+        Choice.objects.create(question=self.question, label="Red", order=1)
+        Choice.objects.create(question=self.question, label="Blue", order=2)
+        self.url = f"/surveys/public/{self.survey.slug}/"
+
+    def test_conditional_request_returns_304_without_queries(self):
+        """Тест: запрос с актуальным ETag получает 304 без обращений к БД"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_fragments_are_cached_between_renders(self):
+        """Тест: повторный рендер не запрашивает вопросы и варианты"""
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertContains(response, "Blue")
+
+    def test_edit_invalidates_page(self):
+        """Тест: изменение варианта или закрытие опроса меняет ETag и содержимое страницы"""
+        etag = self.client.get(self.url)["ETag"]
+        choice = self.question.choices.get(label="Blue")
+        choice.label = "Green"
+        choice.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertContains(response, "Green")
+
+        self.survey.status = Survey.STATUS_CLOSED
+        self.survey.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, "Опрос завершен")
+        self.assertNotContains(response, "Green")
+
+    def test_edit_view_updates_timestamp_and_page(self):
+        """Тест: редактирование описания обновляет updated_at и сбрасывает кэш страницы"""
+        etag = self.client.get(self.url)["ETag"]
+        updated_at = self.survey.updated_at
+        self.client.force_login(self.user)
+        self.client.post(f"/surveys/{self.survey.slug}/edit/", {"description": "New description"})
+        self.client.logout()
+
+        self.survey.refresh_from_db()
+        self.assertGreater(self.survey.updated_at, updated_at)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, "New description")
+
+
+class SurveyConditionalAPITest(TestCase):
+    """Тесты для ETag и ответов 304 в API опросов."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="poller",
+            email="poller@example.com",
+            password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.survey = Survey.objects.create(author=self.user, title="Polled Survey", status=Survey.STATUS_ACTIVE)
+        self.question = Question.objects.create(
+            survey=self.survey, text="Rating?", question_type=Question.TYPE_RATING, order=1
+        )
+
+    def test_retrieve_returns_304_for_matching_etag(self):
+        """Тест: совпавший If-None-Match получает 304 без тела, изменение вопроса меняет ETag"""
+        url = f"/api/surveys/{self.survey.slug}/"
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.text = "New rating?"
+            self.question.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_public_etag_changes_with_new_response(self):
+        """Тест: новый ответ меняет ETag публичного представления (participants_count)"""
+        url = f"/api/surveys/{self.survey.slug}/public/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Версия меняется после фиксации транзакции голоса
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f"/responses/api/{self.survey.slug}/submit/",
+                {"answers": [{"question": self.question.id, "rating_value": 4}]},
+                format="json",
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["participants_count"], 1)
+
+    def test_template_list_returns_304_without_queries(self):
+        """Тест: каталог шаблонов отвечает 304 без обращений к БД, новый шаблон меняет ETag"""
+        client = APIClient()
+        etag = client.get("/api/templates/")["ETag"]
+        with self.assertNumQueries(0):
+            response = client.get("/api/templates/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SurveyTemplate.objects.create(title="NPS", category="feedback", payload={})
+        self.assertEqual(client.get("/api/templates/", HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class SurveyListQueryTest(TestCase):
+    """Тесты для числа запросов в списке и карточке опроса API."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="lister",
+            email="lister@example.com",
+            password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_surveys(self, count):
+        for index in range(count):
+            survey = Survey.objects.create(author=self.user, title=f"Survey {index}", status=Survey.STATUS_ACTIVE)
+            for position in range(3):
+                question = Question.objects.create(
+                    survey=survey, text=f"Q{position}", question_type=Question.TYPE_SINGLE, order=position
+                )
+                Choice.objects.create(question=question, label="Yes", order=0)
+                Choice.objects.create(question=question, label="No", order=1)
+
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        """Тест: страница списка - count, опросы, вопросы, варианты"""
+        self.create_surveys(2)
+        with self.assertNumQueries(4):
+            self.client.get("/api/surveys/")
+        self.create_surveys(10)
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/surveys/")
+        self.assertEqual(len(response.json()["results"][0]["questions"][0]["choices"]), 2)
+
+    def test_summary_view_skips_questions(self):
+        """Тест: ?view=summary отдает числа вопросов и ответов без вложенных вопросов"""
+        self.create_surveys(5)
+        latest = Survey.objects.first()
+        SurveyResponse.objects.create(survey=latest)
+        SurveyResponse.objects.create(survey=latest)
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/surveys/", {"view": "summary"})
+        result = response.json()["results"][0]
+        self.assertNotIn("questions", result)
+        self.assertEqual(result["question_count"], 3)
+        self.assertEqual(result["slug"], str(latest.slug))
+        self.assertEqual(result["response_count"], 2)
+
+    def test_retrieve_loads_questions_with_two_queries(self):
+        """Тест: карточка опроса - опрос, вопросы и варианты"""
+        self.create_surveys(1)
+        survey = Survey.objects.get()
+        with self.assertNumQueries(3):
+            response = self.client.get(f"/api/surveys/{survey.slug}/")
+        self.assertEqual(len(response.json()["questions"]), 3)
+
+
+class PublicPayloadFastPathTest(TestCase):
+    """Тесты для построения публичной схемы опроса без сериализатора."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="fastpath",
+            email="fastpath@example.com",
+            password="testpass123"
+        )
+
+    def create_survey(self, index):
+        rng = random.Random(index)
+        survey = Survey.objects.create(
+            author=self.user,
+            title=f"Опрос «{index}»  ",
+            description=rng.choice(["", "Описание с \"кавычками\" и <тегами>"]),
+            survey_type=rng.choice([Survey.TYPE_ANONYMOUS, Survey.TYPE_PUBLIC]),
+            ends_at=rng.choice([None, timezone.now() + timedelta(days=index, microseconds=123456)]),
+            welcome_message="Привет",
+            logo=rng.choice(["", "survey_logos/logo.png"]),
+        )
+        for position in range(rng.randint(1, 6)):
+            question_type = rng.choice([choice for choice, _ in Question.QUESTION_TYPES])
+            question = Question.objects.create(
+                survey=survey,
+                text=f"Вопрос {position}",
+                question_type=question_type,
+                is_required=rng.random() < 0.5,
+                # Совпадающие order проверяют одинаковый порядок при равенстве
+                order=rng.randint(0, 2),
+                max_text_length=rng.choice([100, 1000]),
+            )
+            if question_type in {Question.TYPE_SINGLE, Question.TYPE_MULTIPLE}:
+                for choice in range(rng.randint(1, 5)):
+                    Choice.objects.create(question=question, label=f"Вариант {choice}", order=rng.randint(0, 2))
+        for _ in range(rng.randint(0, 3)):
+            SurveyResponse.objects.create(survey=survey)
+        return survey
+
+    def test_fast_path_matches_serializer(self):
+        """Тест: JSON из values() совпадает с SurveyPublicSerializer побайтно на сгенерированных опросах"""
+        renderer = JSONRenderer()
+        for index in range(15):
+            survey = self.create_survey(index)
+            prefetch_related_objects([survey], QUESTIONS_PREFETCH)
+            expected = renderer.render(SurveyPublicSerializer(survey).data)
+            self.assertEqual(renderer.render(public_survey_data(survey)), expected)
+
+    def test_public_action_uses_fast_path(self):
+        """Тест: публичное представление API совпадает с сериализатором"""
+        survey = self.create_survey(3)
+        prefetch_related_objects([survey], QUESTIONS_PREFETCH)
+        response = APIClient().get(f"/api/surveys/{survey.slug}/public/")
+        self.assertEqual(response.content, JSONRenderer().render(SurveyPublicSerializer(survey).data))
+
+
+class SurveyCloneTest(TestCase):
+    """Тесты для копирования опросов через API."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="cloner", email="cloner@example.com", password="testpass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def make_survey(self, questions, title="Еженедельный опрос", author=None):
+        survey = Survey.objects.create(
+            author=author or self.user,
+            title=title,
+            status=Survey.STATUS_CLOSED,
+            ends_at=timezone.now() - timedelta(days=1),
+        )
+        for index in range(questions):
+            question = Question.objects.create(
+                survey=survey, text=f"Вопрос {index}", question_type=Question.TYPE_SINGLE, order=index
+            )
+            Choice.objects.bulk_create(
+                [Choice(question=question, label=f"Вариант {position}", order=position) for position in range(3)]
+            )
+        return survey
+
+    def test_clone_copies_questions_and_choices(self):
+        """Тест: копия активна, содержит те же вопросы и варианты и не наследует прошедшую дату окончания"""
+        source = self.make_survey(3)
+        response = self.client.post(f"/api/surveys/{source.slug}/clone/", {"title": "Неделя 2"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        clone = Survey.objects.get(slug=response.json()["slug"])
+        self.assertNotEqual(clone.pk, source.pk)
+        self.assertEqual((clone.title, clone.status, clone.ends_at), ("Неделя 2", Survey.STATUS_ACTIVE, None))
+        self.assertEqual(
+            [(q["text"], [c["label"] for c in q["choices"]]) for q in response.json()["questions"]],
+            [(f"Вопрос {index}", ["Вариант 0", "Вариант 1", "Вариант 2"]) for index in range(3)],
+        )
+        self.assertEqual(source.questions.count(), 3)
+
+    def test_clone_round_trips_do_not_depend_on_survey_size(self):
+        """Тест: копирование опроса на 100 вопросов занимает столько же запросов, что и на один вопрос"""
+        small = self.make_survey(1)
+        # 100 вопросов помещаются в один INSERT и при лимите параметров SQLite (999)
+        large = self.make_survey(100)
+        self.client.post(f"/api/surveys/{small.slug}/clone/", format="json")
+        with self.assertNumQueries(12):
+            self.client.post(f"/api/surveys/{small.slug}/clone/", format="json")
+        with self.assertNumQueries(12):
+            response = self.client.post(f"/api/surveys/{large.slug}/clone/", format="json")
+        self.assertEqual(len(response.json()["questions"]), 100)
+        self.assertEqual(Choice.objects.filter(question__survey__slug=response.json()["slug"]).count(), 300)
+
+    def test_clone_many(self):
+        """Тест: пакетное копирование сохраняет порядок, а чужие опросы не копируются"""
+        first, second = self.make_survey(2, "Первый"), self.make_survey(4, "Второй")
+        other = self.make_survey(1, author=User.objects.create_user(username="other", password="testpass123"))
+
+        response = self.client.post("/api/surveys/clone-many/", {"slugs": [second.slug, first.slug]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item["title"] for item in response.json()], ["Второй", "Первый"])
+        self.assertEqual(Survey.objects.get(slug=response.json()[0]["slug"]).questions.count(), 4)
+
+        response = self.client.post("/api/surveys/clone-many/", {"slugs": [first.slug, other.slug]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json()["slugs"], [str(other.slug)])
+        self.assertEqual(Survey.objects.filter(author=self.user).count(), 4)
+
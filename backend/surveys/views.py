@@ -1,12 +1,18 @@
+import uuid
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 from django.views.generic import TemplateView, DetailView, View
 from django.utils.dateparse import parse_datetime
 from django.utils import timezone
 
-from .models import Survey, SurveyTemplate
+from . import catalog, page_cache
+from .models import Survey
 
 
 class SurveyListView(LoginRequiredMixin, TemplateView):
@@ -26,7 +32,7 @@ class SurveyBuilderView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["templates"] = SurveyTemplate.objects.all()
+        context["templates"] = catalog.get_catalog().templates
         return context
 
 
@@ -67,7 +73,7 @@ class SurveyEditView(LoginRequiredMixin, TemplateView):
                 survey.ends_at = dt
         else:
             survey.ends_at = None
-        survey.save(update_fields=["description", "ends_at"])
+        survey.save(update_fields=["description", "ends_at", "updated_at"])
         messages.success(request, "Опрос обновлен")
         return redirect("surveys:edit", slug=survey.slug)
 
@@ -89,14 +95,50 @@ class SurveyDeleteView(LoginRequiredMixin, TemplateView):
 
 
 class SurveyPublicView(TemplateView):
-    """Публичная страница опроса для заполнения."""
+    """
+    Публичная страница опроса для заполнения. Вопросы рендерятся кэшированными фрагментами,
+    условные запросы с актуальным ETag получают 304 без обращений к БД (surveys.page_cache).
+    """
     template_name = "surveys/public.html"
 
+    def get(self, request, *args, **kwargs):
+        page = page_cache.cached_version(kwargs["slug"])
+        if page is not None:
+            not_modified = get_conditional_response(
+                request, etag=page.etag, last_modified=int(page.last_modified.timestamp())
+            )
+            if not_modified is not None:
+                return self._finalize(not_modified, page)
+        return super().get(request, *args, **kwargs)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["survey"] = get_object_or_404(Survey, slug=self.kwargs["slug"])
+        survey = get_object_or_404(Survey, slug=self.kwargs["slug"])
+        context["survey"] = survey
+        # Ленивый queryset: выполняется только при промахе кэша фрагментов
+        context["questions"] = survey.questions.prefetch_related("choices")
+        context["page"] = page_cache.page_version(survey)
+        context["fragment_timeout"] = settings.SURVEY_PAGE_CACHE_TIMEOUT
         return context
 
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        return self._finalize(response, context["page"])
+
+    def _finalize(self, response, page):
+        response["ETag"] = page.etag
+        response["Last-Modified"] = http_date(page.last_modified.timestamp())
+        # Меню зависит от входа пользователя: браузер перепроверяет страницу и хранит ее отдельно для cookie
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Cookie"])
+        if settings.VOTE_THROTTLE_COOKIE not in self.request.COOKIES:
+            # Отдельная корзина ограничения голосов для браузера за общим IP (NAT); клиенты без cookie
+            # делят корзину IP + User-Agent (responses.throttling)
+            response.set_cookie(
+                settings.VOTE_THROTTLE_COOKIE, uuid.uuid4().hex, max_age=60 * 60 * 24 * 365, httponly=True, samesite="Lax"
+            )
+        return response
+
 
 class SurveyTemplatesView(TemplateView):
     """Страница со списком доступных шаблонов опросов."""
@@ -104,5 +146,5 @@ class SurveyTemplatesView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["templates"] = SurveyTemplate.objects.all()
+        context["templates"] = catalog.get_catalog().templates
         return context
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
+
+    def ready(self):
+        from django.core import checks
+
+        from config.sessions import check_session_cache
+
+        checks.register(check_session_cache, checks.Tags.caches, deploy=True)
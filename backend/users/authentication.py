@@ -0,0 +1,81 @@
+"""
+Аутентификация API по токену (rest_framework.authtoken) с кэшем в процессе.
+
+Проверенный токен (id пользователя и время создания) хранится в памяти процесса
+TOKEN_AUTH_CACHE_TTL секунд, поэтому повторные запросы клиента не обращаются к таблице
+токенов. Пользователь загружается из БД на каждый запрос (один запрос по первичному ключу):
+закэшированный объект User отдавал бы устаревшие поля, которые затем записывались бы обратно,
+и пропускал бы деактивированных пользователей. revoke_tokens удаляет токены пользователя из БД
+и из кэша текущего процесса; другие процессы перестают принимать токен не позже чем через TTL.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.authtoken.models import Token
+
+
+class TokenCache:
+    """Потокобезопасный кэш key -> (user_id, created) с временем жизни и ограничением размера."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._entries) >= settings.TOKEN_AUTH_CACHE_SIZE:
+                # Самая старая запись - первая: словарь хранит порядок вставки
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic() + settings.TOKEN_AUTH_CACHE_TTL, value)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for key in [key for key, (_expires, (cached_user_id, _created)) in self._entries.items() if cached_user_id == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication с кэшем проверенных токенов в памяти процесса."""
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            row = Token.objects.filter(key=key).values_list("user_id", "created").first()
+            if row is None:
+                raise AuthenticationFailed(_("Invalid token."))
+            cached = row
+            token_cache.set(key, cached)
+        user_id, created = cached
+        user = get_user_model().objects.filter(pk=user_id).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(_("User inactive or deleted."))
+        # Новый объект токена на запрос: общий объект из кэша не хранит связанного пользователя
+        return user, Token(key=key, user=user, created=created)
+
+
+def revoke_tokens(user):
+    """Удаляет токены пользователя (например, после смены пароля)."""
+    Token.objects.filter(user=user).delete()
+    token_cache.discard_user(user.pk)
@@ -2,6 +2,8 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 
+from surveys.models import Survey
+from responses.models import SurveyResponse
 from .models import User, EmailChangeRequest
 
 
@@ -12,6 +14,13 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ("id", "username", "email", "display_name", "organization", "bio", "time_zone", "date_joined")
         read_only_fields = ("id", "date_joined")
 
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # Только переданные поля: остальные не перезаписываются значениями загруженного объекта
+        instance.save(update_fields=list(validated_data))
+        return instance
+
 
 class RegistrationSerializer(serializers.ModelSerializer):
     """Сериализатор регистрации с проверкой совпадения паролей."""
@@ -67,3 +76,19 @@ class EmailChangeRequestSerializer(serializers.ModelSerializer):
         fields = ("id", "new_email", "created_at", "expires_at", "confirmed")
         read_only_fields = ("id", "created_at", "expires_at", "confirmed")
 
+
+class HistorySurveySerializer(serializers.ModelSerializer):
+    """Сериализатор созданного опроса в истории пользователя."""
+    class Meta:
+        model = Survey
+        fields = ("slug", "title", "status", "created_at")
+
+
+class HistoryResponseSerializer(serializers.ModelSerializer):
+    """Сериализатор ответа пользователя в истории. Ожидает select_related("survey")."""
+    survey_slug = serializers.SlugField(source="survey.slug", read_only=True)
+    survey_title = serializers.CharField(source="survey.title", read_only=True)
+
+    class Meta:
+        model = SurveyResponse
+        fields = ("id", "survey_slug", "survey_title", "submitted_at")
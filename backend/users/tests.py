@@ -1,7 +1,12 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
 
 User = get_user_model()
 
@@ -85,3 +90,130 @@ class UserRegistrationTest(TestCase):
         self.assertEqual(user.display_name, "Test User")
         self.assertEqual(user.bio, "Test bio")
         self.assertEqual(user.organization, "Test Org")
+
+
+class UserHistoryTest(TestCase):
+    """Тесты для постраничной истории пользователя."""
+
+    def setUp(self):
+        from surveys.models import Survey
+        from responses.models import SurveyResponse
+
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        for index in range(25):
+            survey = Survey.objects.create(author=self.user, title=f"Survey {index}")
+            SurveyResponse.objects.create(survey=survey, user=self.user, is_anonymous=False)
+        # Одинаковое время у всех ответов: порядок должен держаться на id
+        SurveyResponse.objects.update(submitted_at=survey.created_at)
+
+    def test_history_api_walks_all_pages_without_duplicates(self):
+        """Тест: проход по курсорам возвращает все ответы ровно один раз."""
+        seen = []
+        cursor = None
+        while True:
+            params = {"cursor": cursor} if cursor else {}
+            response = self.client.get("/auth/api/history/responses/", params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(item["id"] for item in response.data["results"])
+            cursor = response.data["next"]
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_history_api_rejects_invalid_cursor(self):
+        """Тест: поврежденный курсор дает 400."""
+        response = self.client.get("/auth/api/history/surveys/", {"cursor": "garbage"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_history_page_has_constant_queries(self):
+        """Тест: страница истории не обращается к опросам по одному (нет N+1)."""
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/auth/history/")
+        survey_queries = [q["sql"] for q in ctx.captured_queries if "surveys_survey" in q["sql"]]
+        self.assertEqual(len(survey_queries), 2)
+        self.assertEqual(len(response.context["responses"]), 20)
+        self.assertIsNotNone(response.context["responses_next"])
+        self.assertContains(response, "Показать ещё")
+
+
+class TokenAuthenticationTest(TestCase):
+    """Тесты для аутентификации API по токену."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(
+            username="integration",
+            email="integration@example.com",
+            password="testpass123"
+        )
+        self.client = APIClient()
+
+    def obtain_token(self):
+        response = self.client.post(
+            "/auth/api/token/", {"identifier": "integration", "password": "testpass123"}, format="json"
+        )
+        return response.json()["token"]
+
+    def test_token_authenticates_api_requests(self):
+        """Тест: токен из /auth/api/token/ авторизует запросы к API без сессии"""
+        client = APIClient(HTTP_AUTHORIZATION=f"Token {self.obtain_token()}")
+        response = client.get("/auth/api/profile/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["username"], "integration")
+        self.assertNotIn("sessionid", client.cookies)
+
+    def test_repeated_requests_skip_token_lookup(self):
+        """Тест: повторный запрос с тем же токеном не обращается к таблице токенов, пользователь - один запрос"""
+        client = APIClient(HTTP_AUTHORIZATION=f"Token {self.obtain_token()}")
+        client.get("/auth/api/history/surveys/")
+        with CaptureQueriesContext(connection) as queries:
+            client.get("/auth/api/history/surveys/")
+        sql = [query["sql"] for query in queries.captured_queries]
+        self.assertFalse([query for query in sql if "authtoken_token" in query])
+        self.assertEqual(len([query for query in sql if 'FROM "users_user"' in query]), 1)
+
+    def test_profile_updates_do_not_restore_stale_fields(self):
+        """Тест: последовательные PATCH профиля по токену не возвращают старые значения других полей"""
+        client = APIClient(HTTP_AUTHORIZATION=f"Token {self.obtain_token()}")
+        client.get("/auth/api/profile/")
+        client.patch("/auth/api/profile/", {"email": "new@example.com"}, format="json")
+        client.patch("/auth/api/profile/", {"bio": "x"}, format="json")
+
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.email, self.user.bio), ("new@example.com", "x"))
+
+    def test_deactivated_user_is_rejected_within_ttl(self):
+        """Тест: деактивированный пользователь теряет доступ сразу, несмотря на кэш токена"""
+        client = APIClient(HTTP_AUTHORIZATION=f"Token {self.obtain_token()}")
+        self.assertEqual(client.get("/auth/api/profile/").status_code, status.HTTP_200_OK)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(client.get("/auth/api/profile/").status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_password_change_revokes_tokens(self):
+        """Тест: смена пароля отзывает токены, в том числе закэшированные"""
+        headers = {"HTTP_AUTHORIZATION": f"Token {self.obtain_token()}"}
+        self.assertEqual(self.client.get("/auth/api/profile/", **headers).status_code, status.HTTP_200_OK)
+
+        self.client.force_login(self.user)
+        self.client.post(
+            "/auth/profile/password/",
+            {"current_password": "testpass123", "new_password": "newpass12345", "confirm_password": "newpass12345"},
+        )
+        self.client.logout()
+
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        self.assertEqual(self.client.get("/auth/api/profile/", **headers).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_delete_revokes_own_token(self):
+        """Тест: DELETE /auth/api/token/ отзывает токен"""
+        client = APIClient(HTTP_AUTHORIZATION=f"Token {self.obtain_token()}")
+        self.assertEqual(client.delete("/auth/api/token/").status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(client.get("/auth/api/profile/").status_code, status.HTTP_403_FORBIDDEN)
@@ -13,7 +13,9 @@ from .views import (
     UserHistoryView,
     RegisterAPIView,
     LoginAPIView,
+    TokenAPIView,
     ProfileAPIView,
+    UserHistoryAPIView,
 )
 
 app_name = "users"
@@ -31,6 +33,8 @@ urlpatterns = [
     path("password-reset-confirm/<uidb64>/<token>/", PasswordResetConfirm.as_view(), name="password_reset_confirm"),
     path("api/register/", RegisterAPIView.as_view(), name="api-register"),
     path("api/login/", LoginAPIView.as_view(), name="api-login"),
+    path("api/token/", TokenAPIView.as_view(), name="api-token"),
     path("api/profile/", ProfileAPIView.as_view(), name="api-profile"),
+    path("api/history/<str:section>/", UserHistoryAPIView.as_view(), name="api-history"),
 ]
 
@@ -11,8 +11,10 @@ from django.views.generic import FormView, UpdateView, TemplateView, View
 from django.core.mail import send_mail
 
 from rest_framework import generics, permissions, status, views
+from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
 
+from .authentication import revoke_tokens
 from .forms import (
     RegistrationForm,
     LoginForm,
@@ -21,7 +23,14 @@ from .forms import (
     PasswordUpdateForm,
 )
 from .models import User, EmailChangeRequest
-from .serializers import UserSerializer, RegistrationSerializer, LoginSerializer
+from .pagination import InvalidCursor, keyset_page
+from .serializers import (
+    UserSerializer,
+    RegistrationSerializer,
+    LoginSerializer,
+    HistorySurveySerializer,
+    HistoryResponseSerializer,
+)
 
 
 class LandingPageView(TemplateView):
@@ -140,6 +149,7 @@ class PasswordUpdateView(LoginRequiredMixin, FormView):
         new_password = form.cleaned_data["new_password"]
         self.request.user.set_password(new_password)
         self.request.user.save()
+        revoke_tokens(self.request.user)
         messages.success(self.request, "Пароль обновлен")
         return super().form_valid(form)
 
@@ -156,18 +166,35 @@ class PasswordResetConfirm(PasswordResetConfirmView):
     template_name = "auth/password_reset_confirm.html"
     success_url = reverse_lazy("users:login")
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        revoke_tokens(form.user)
+        return response
+
+
+def history_page(user, section, cursor=None):
+    """Страница истории пользователя: созданные опросы или ответы, по курсору."""
+    from surveys.models import Survey
+    from responses.models import SurveyResponse
+
+    if section == "surveys":
+        return keyset_page(Survey.objects.filter(author=user), "created_at", cursor)
+    return keyset_page(SurveyResponse.objects.filter(user=user).select_related("survey"), "submitted_at", cursor)
+
 
 class UserHistoryView(LoginRequiredMixin, TemplateView):
-    """История пользователя: созданные опросы и данные ответов."""
+    """История пользователя: созданные опросы и данные ответов (постранично)."""
     template_name = "auth/history.html"
 
     def get_context_data(self, **kwargs):
-        from surveys.models import Survey
-        from responses.models import SurveyResponse
-
         context = super().get_context_data(**kwargs)
-        context["created_surveys"] = Survey.objects.filter(author=self.request.user)
-        context["responses"] = SurveyResponse.objects.filter(user=self.request.user)
+        for section, items_key in (("surveys", "created_surveys"), ("responses", "responses")):
+            try:
+                items, next_cursor = history_page(self.request.user, section, self.request.GET.get(f"{section}_cursor"))
+            except InvalidCursor:
+                items, next_cursor = history_page(self.request.user, section)
+            context[items_key] = items
+            context[f"{section}_next"] = next_cursor
         return context
 
 
@@ -199,6 +226,38 @@ class LoginAPIView(views.APIView):
         return Response(UserSerializer(user).data)
 
 
+class TokenAPIView(views.APIView):
+    """API endpoint токена для интеграций: POST выдает токен по логину и паролю, DELETE отзывает токены."""
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = LoginSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        token, _ = Token.objects.get_or_create(user=serializer.validated_data["user"])
+        return Response({"token": token.key})
+
+    def delete(self, request):
+        if not request.user.is_authenticated:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        revoke_tokens(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UserHistoryAPIView(views.APIView):
+    """API endpoint истории пользователя для бесконечной прокрутки (пагинация по курсору)."""
+    permission_classes = [permissions.IsAuthenticated]
+    section_serializers = {"surveys": HistorySurveySerializer, "responses": HistoryResponseSerializer}
+
+    def get(self, request, section):
+        if section not in self.section_serializers:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        try:
+            items, next_cursor = history_page(request.user, section, request.query_params.get("cursor"))
+        except InvalidCursor:
+            return Response({"detail": "Некорректный курсор"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": self.section_serializers[section](items, many=True).data, "next": next_cursor})
+
+
 class ProfileAPIView(generics.RetrieveUpdateAPIView):
     """API endpoint для просмотра и обновления профиля пользователя."""
     serializer_class = UserSerializer